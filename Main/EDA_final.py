@@ -11,167 +11,118 @@ Original file is located at
 """
 Universal Dataset Analysis - EDA Report Generator
 Run this after installing: pip install setuptools ydata-profiling pandas numpy
-Usage: python iris_analysis.py [path_to_data_file.csv]
+Usage: python EDA_final.py [path_to_data_file.csv | directory | "glob*.csv"] [--fast | --lite | --streaming] [--columnar] [--pause]
+
+Can also be imported: load_dataset(), summarize(), profile() and
+save_stats_report() are the pipeline steps, run_analysis() runs them all and
+returns a result dict, run_batch() analyzes several files in parallel and
+compares them. Nothing here waits for input unless main() is asked to.
 """
 
+import io
 import os
+import glob
+import html
+import json
 import sys
+import time
+import shutil
 import argparse
+import threading
+import importlib.util
 
-print("=" * 60)
-print("    UNIVERSAL DATASET ANALYSIS - EDA REPORT GENERATOR")
-print("=" * 60)
-print()
+INSTALL_HINT = "pip install setuptools ydata-profiling pandas numpy"
 
-# ===================================
-# Step 1: Import libraries
-# ===================================
-print("Step 1: Importing libraries...")
-print("-" * 60)
-
-try:
-    import pandas as pd
-    import numpy as np
-    from ydata_profiling import ProfileReport
-    print("✓ All libraries imported successfully!")
-    print()
-except ImportError as e:
-    print(f"❌ Error: {e}")
-    print()
-    print("Please install the required packages:")
-    print("  pip install setuptools ydata-profiling pandas numpy")
-    print()
-    input("Press Enter to exit...")
-    sys.exit(1)
+# Bound by import_libraries(); kept at module level so the helpers below can use them
+pd = None
+np = None
+ProfileReport = None
 
-# ===================================
-# Step 2: Get data file path
-# ===================================
-print("📂 Step 2: Getting data file path...")
-print("-" * 60)
-current_dir = os.getcwd()
-print(f"  Current directory: {current_dir}")
-print()
-
-# Check for command line argument
-if len(sys.argv) > 1:
-    data_file = sys.argv[1]
-    print(f"  Using file from command line: {data_file}")
-else:
-    # Prompt user for file path
-    print("  Please enter the path to your data file (CSV format):")
-    print("  (You can drag and drop the file here, or type the path)")
-    data_file = input("  File path: ").strip().strip('"').strip("'")
-    print()
 
-# Validate file exists
-if not os.path.exists(data_file):
-    print(f"❌ Error: File not found: {data_file}")
-    print()
-    input("Press Enter to exit...")
-    sys.exit(1)
+class EdaError(Exception):
+    """A problem the user can fix (missing file, unreadable CSV, missing package)."""
 
-# Get base filename for output
-base_name = os.path.splitext(os.path.basename(data_file))[0]
-print(f"  ✓ File found: {data_file}")
-print(f"  ✓ Output report will be named: {base_name}_eda_report.html")
-print()
 
-# ===================================
-# Step 3: Load dataset
-# ===================================
-print("📊 Step 3: Loading dataset...")
-print("-" * 60)
+def import_libraries(with_profiler=False):
+    """Import pandas/numpy (and ydata_profiling when needed) once per process."""
+    global pd, np, ProfileReport
+    try:
+        if pd is None:
+            import pandas
+            import numpy
+            pd, np = pandas, numpy
+        if with_profiler and ProfileReport is None:
+            from ydata_profiling import ProfileReport as _ProfileReport
+            ProfileReport = _ProfileReport
+    except ImportError as e:
+        raise EdaError(f"{e}\nPlease install the required packages:\n  {INSTALL_HINT}") from e
 
-try:
-    # Try to detect delimiter and encoding
-    print("  Reading CSV file...")
 
-    # Try common encodings
-    encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-    df = None
+def report_file_name(base_name, mode):
+    if mode == "streaming":
+        return f"{base_name}_eda_stats.html"
+    if mode == "fast":
+        return f"{base_name}_eda_report_fast.html"
+    if mode == "lite":
+        return f"{base_name}_eda_lite.html"
+    return f"{base_name}_eda_report.html"
 
-    for encoding in encodings:
-        try:
-            # Try to read with different delimiters
-            for delimiter in [',', ';', '\t', '|']:
-                try:
-                    df = pd.read_csv(data_file, encoding=encoding, delimiter=delimiter, low_memory=False)
-                    if len(df.columns) > 1:  # Valid CSV should have multiple columns
-                        print(f"  ✓ Detected delimiter: '{delimiter}', encoding: {encoding}")
-                        break
-                except:
-                    continue
-            if df is not None:
-                break
-        except:
-            continue
 
-    # If still None, try default pandas read_csv
-    if df is None:
-        df = pd.read_csv(data_file, low_memory=False)
-        print("  ✓ Using default CSV settings")
+# ===================================
+# Fast profile helpers (mode="fast")
+# ===================================
+def stratified_sample(df, n_rows, stratify=None, seed=42):
+    """Sample about n_rows rows, keeping the class balance of `stratify` if given."""
+    if not n_rows or len(df) <= n_rows:
+        return df
+    if stratify and stratify in df.columns:
+        frac = n_rows / len(df)
+        return df.groupby(stratify, dropna=False, group_keys=False).sample(frac=frac, random_state=seed)
+    return df.sample(n=n_rows, random_state=seed)
 
-    print(f"✓ Dataset loaded successfully!")
-    print(f"  • Total rows: {len(df)}")
-    print(f"  • Total columns: {len(df.columns)}")
-    print(f"  • Columns: {', '.join(df.columns.tolist()[:10])}")  # Show first 10 columns
-    if len(df.columns) > 10:
-        print(f"    ... and {len(df.columns) - 10} more columns")
-    print()
 
-except Exception as e:
-    print(f"❌ Error loading dataset: {e}")
-    print()
-    print("Common issues:")
-    print("  • Make sure the file is a valid CSV format")
-    print("  • Check if the file path is correct")
-    print("  • Try opening the file in Excel/LibreOffice to verify it's valid")
-    print()
-    input("Press Enter to exit...")
-    sys.exit(1)
+def top_correlated_columns(df, k):
+    """Columns that appear in the k most correlated numeric pairs (by |pearson|)."""
+    numeric = df.select_dtypes("number")
+    if k <= 0 or numeric.shape[1] < 2:
+        return []
+    corr = numeric.corr().abs()
+    upper = corr.where(np.triu(np.ones(corr.shape, dtype=bool), k=1))
+    columns = []
+    for a, b in upper.stack().sort_values(ascending=False).head(k).index:
+        for column in (a, b):
+            if column not in columns:
+                columns.append(column)
+    return columns
 
-# ===================================
-# Step 4: Show preview
-# ===================================
-print("👀 Step 4: Data preview (first 5 rows)...")
-print("-" * 60)
-print(df.head().to_string())
-print()
 
-# ===================================
-# Step 5: Show basic info
-# ===================================
-print("📊 Step 5: Basic statistics...")
-print("-" * 60)
-print(df.describe().to_string())
-print()
-
-print("🔍 Missing values check:")
-print("-" * 60)
-missing = df.isnull().sum()
-print(missing.to_string())
-print(f"Total missing values: {missing.sum()}")
-print()
-
-print("📋 Data types:")
-print("-" * 60)
-print(df.dtypes.to_string())
-print()
+def build_fast_profile(df, title, interaction_columns):
+    # ydata_profiling can't restrict interactions to exact pairs, so the
+    # columns from the top-k pairs are used as interaction targets
+    return ProfileReport(
+        df,
+        title=title,
+        explorative=True,
+        minimal=False,
+        correlations={
+            "pearson": {"calculate": True},
+            "spearman": {"calculate": False},
+            "kendall": {"calculate": False},
+            "phi_k": {"calculate": False},
+        },
+        interactions={"continuous": bool(interaction_columns), "targets": interaction_columns},
+        missing_diagrams={
+            "bar": True,
+            "matrix": False,
+            "heatmap": False,
+        },
+    )
 
-# ===================================
-# Step 6: Generate EDA Report
-# ===================================
-print("🚀 Step 6: Generating comprehensive EDA report...")
-print("-" * 60)
-print("⏳ This will take 1-2 minutes, please wait...")
-print()
-
-try:
-    # Create profile report
-    profile = ProfileReport(
+
+def build_full_profile(df, title):
+    return ProfileReport(
         df,
-        title=f"{base_name} Dataset - Exploratory Data Analysis Report",
+        title=title,
         explorative=True,
         minimal=False,
         correlations={
@@ -188,70 +139,857 @@ try:
         },
     )
 
-    print("✓ Profile report object created successfully!")
+
+_overrun_profiles = []  # fast-profile threads that outlived their time budget
+
+
+def profile_overrun():
+    """True while a fast profile that ran past its time budget is still running in this process.
+
+    ydata_profiling can't be interrupted, so a long-lived process (an analysis_pool
+    worker) should exit after its job to get the CPU and memory back."""
+    _overrun_profiles[:] = [thread for thread in _overrun_profiles if thread.is_alive()]
+    return bool(_overrun_profiles)
+
+
+def profile_within_budget(df, title, output_file, time_budget, interaction_columns, log=print):
+    """Save a minimal report right away, then upgrade it to the fast report if it fits the time budget.
+
+    Returns "fast" or "minimal" depending on which report ended up in output_file.
+    """
+    started = time.time()
+    ProfileReport(df, title=title, minimal=True).to_file(output_file)
+
+    remaining = time_budget - (time.time() - started)
+    if remaining <= 0:
+        return "minimal"
+
+    # the fast report is written to a temp file and only renamed over the minimal one in time
+    tmp_file = f"{output_file[:-len('.html')]}.{os.getpid()}.{threading.get_ident()}.tmp.html"
+    state = {"done": False, "expired": False}
+    lock = threading.Lock()
+
+    def worker():
+        try:
+            build_fast_profile(df, title, interaction_columns).to_file(tmp_file)
+        except Exception as e:
+            state["error"] = e
+        with lock:
+            # whoever comes second cleans up: a late or failed report is never left behind
+            if state["expired"] or "error" in state:
+                if os.path.exists(tmp_file):
+                    os.remove(tmp_file)
+            else:
+                state["done"] = True
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    thread.join(remaining)
+    with lock:
+        if state["done"]:
+            os.replace(tmp_file, output_file)
+            return "fast"
+        state["expired"] = True
+    if "error" in state:
+        log(f"  ⚠️  Fast report failed ({state['error']}), keeping the minimal report")
+    elif thread.is_alive():
+        _overrun_profiles.append(thread)
+    return "minimal"
+
+
+# ===================================
+# Progress events
+# ===================================
+class ProgressReporter:
+    """Structured progress events for run_analysis().
+
+    callback(event) gets dicts like
+        {"event": "step" | "update" | "done", "step": "load", "rows": 120000,
+         "bytes": ..., "total_bytes": ..., "elapsed": 4.2, "step_elapsed": 3.9,
+         "eta": 6.1, "timings": [(step, seconds), ...]}
+    "update" events are throttled to one per `interval` seconds. "eta" is only
+    known while reading the file (from the bytes read so far), otherwise None.
+    """
+
+    def __init__(self, callback=None, total_bytes=None, interval=0.25):
+        self.callback = callback
+        self.total_bytes = total_bytes
+        self.interval = interval
+        self.started = time.time()
+        self.step_name = None
+        self.step_started = self.started
+        self.rows = None
+        self.bytes = None
+        self.timings = []
+        self._last_emit = 0.0
+
+    def _emit(self, event, now):
+        if self.callback is None:
+            return
+        step_elapsed = now - self.step_started
+        eta = None
+        if self.total_bytes and self.bytes and event == "update":
+            rate = self.bytes / max(step_elapsed, 1e-6)
+            eta = max(self.total_bytes - self.bytes, 0) / rate
+        self._last_emit = now
+        self.callback({
+            "event": event,
+            "step": self.step_name,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "total_bytes": self.total_bytes,
+            "elapsed": now - self.started,
+            "step_elapsed": step_elapsed,
+            "eta": eta,
+            "timings": list(self.timings),
+        })
+
+    def _close_step(self, now):
+        if self.step_name is not None:
+            self.timings.append((self.step_name, now - self.step_started))
+
+    def step(self, name):
+        now = time.time()
+        self._close_step(now)
+        self.step_name, self.step_started = name, now
+        self.rows = self.bytes = None
+        self._emit("step", now)
+
+    def update(self, rows=None, bytes_read=None):
+        if rows is not None:
+            self.rows = rows
+        if bytes_read is not None:
+            self.bytes = bytes_read
+        now = time.time()
+        if now - self._last_emit >= self.interval:
+            self._emit("update", now)
+
+    def finish(self):
+        now = time.time()
+        self._close_step(now)
+        self.step_name = None
+        self._emit("done", now)
+
+
+class _ProgressFile(io.RawIOBase):
+    """Binary file wrapper that reports bytes and (approximate) lines read to a ProgressReporter.
+
+    read_csv() pulls the file through readinto(), so the parse itself stays a single pass.
+    """
+
+    def __init__(self, path, reporter, header_lines=1, start=0):
+        super().__init__()
+        self._file = open(path, "rb")
+        self._file.seek(start)
+        self.reporter = reporter
+        self.header_lines = header_lines
+        self.bytes_read = 0
+        self.lines = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = self._file.readinto(buffer)
+        if n:
+            self.bytes_read += n
+            # counts quoted newlines too, good enough for a progress display
+            self.lines += memoryview(buffer)[:n].tobytes().count(b"\n")
+            self.reporter.update(rows=max(self.lines - self.header_lines, 0), bytes_read=self.bytes_read)
+        return n
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+# ===================================
+# Pipeline steps
+# ===================================
+def load_dataset(data_file, streaming=False, chunksize=100_000, log=print, reporter=None, columnar=False,
+                 compact=True):
+    """Step 3: read the CSV.
+
+    Returns {"df", "stats", "dialect", "rows", "compaction", "matrices", "checkpoint"}.
+    In streaming mode "df" only holds the first rows (the preview), "stats" holds the
+    streamed statistics, "matrices" the streamed Pearson/missing-value matrices and
+    "checkpoint" the eda_stats.file_checkpoint() of the bytes read (see resume_dataset());
+    "stream_matrices" is the mergeable accumulator behind "matrices".
+    `reporter` (a ProgressReporter) gets rows/bytes updates while the file is read.
+    With compact=True the frame goes through dtype_compaction.compact_frame() and
+    "compaction" holds its per-column memory report.
+    With columnar=True (not in streaming mode) the loaded frame is kept as a
+    Feather sidecar, and later loads memory-map that instead.
+    """
+    import_libraries()
+    from csv_tools import sniff_csv, read_csv_kwargs
+
+    if not os.path.exists(data_file):
+        raise EdaError(f"File not found: {data_file}")
+    reporter = reporter or ProgressReporter()
+    compact = compact and not streaming
+
+    if columnar and not streaming:
+        import columnar_cache
+        if not columnar_cache.SIDECAR_AVAILABLE:
+            log("  ⚠️  pyarrow is not installed, columnar cache disabled (pip install pyarrow)")
+            columnar = False
+        else:
+            df = columnar_cache.load_sidecar(data_file, compacted=compact)
+            if df is not None:
+                log("  ✓ Loaded from columnar cache (CSV unchanged since last run)")
+                reporter.update(rows=len(df))
+                return {"df": df, "stats": None, "dialect": sniff_csv(data_file), "rows": len(df),
+                        "compaction": None, "matrices": None, "stream_matrices": None, "checkpoint": None}
+
+    # Detect delimiter and encoding from a small prefix, then parse the file once
+    log("  Reading CSV file...")
+    df = None
+    stats = None
+    dialect = None
+    matrices = None
+    checkpoint = None
+
+    try:
+        dialect = sniff_csv(data_file)
+        delimiter_name = repr(dialect['delimiter']).strip("'")
+        log(f"  ✓ Detected delimiter: '{delimiter_name}', encoding: {dialect['encoding']}")
+        with _ProgressFile(data_file, reporter, header_lines=1 if dialect["has_header"] else 0) as source:
+            if streaming:
+                from eda_stats import stream_csv_stats
+                log(f"  Streaming mode: reading {chunksize:,} rows per chunk...")
+                from eda_matrices import StreamingMatrices
+                matrices = StreamingMatrices()
+                stats = stream_csv_stats(source, chunksize=chunksize, dialect=dialect,
+                                         on_chunk=lambda st: reporter.update(rows=st.rows),
+                                         consumers=[matrices])
+                # only the first rows stay in memory, for the preview
+                df = stats.preview
+                checkpoint = source.bytes_read
+            else:
+                df = pd.read_csv(source, low_memory=False, **read_csv_kwargs(dialect))
+    except Exception as e:
+        if streaming:
+            raise EdaError(f"Error loading dataset: {e}") from e
+        log(f"  ⚠️  Dialect detection failed ({e}), falling back to defaults")
+
+    # If still None, retry as latin-1 (decodes any byte: a cp1252/latin-1 byte past the
+    # sniffed prefix breaks utf-8), then with pandas' defaults
+    if df is None:
+        attempts = [("sniffed settings, encoding: latin-1", dict(read_csv_kwargs(dialect), encoding="latin-1"))
+                    ] if dialect is not None and dialect["encoding"] != "latin-1" else []
+        attempts += [("default CSV settings", {}), ("default CSV settings, encoding: latin-1", {"encoding": "latin-1"})]
+        for label, kwargs in attempts:
+            try:
+                df = pd.read_csv(data_file, low_memory=False, **kwargs)
+            except Exception as e:
+                error = e
+                continue
+            if dialect is not None and "encoding" in kwargs:
+                dialect = dict(dialect, encoding=kwargs["encoding"])
+            log(f"  ✓ Using {label}")
+            break
+        else:
+            raise EdaError(f"Error loading dataset: {error}") from error
+
+    compaction = None
+    if compact:
+        from dtype_compaction import compact_frame
+        reporter.step("compact")
+        compaction = compact_frame(df)
+
+    if columnar:
+        if columnar_cache.write_sidecar(data_file, df, compacted=compact):
+            log("  ✓ Saved columnar cache for faster reloads")
+
+    if checkpoint is not None:
+        from eda_stats import file_checkpoint
+        checkpoint = file_checkpoint(data_file, checkpoint)
+    return {"df": df, "stats": stats, "dialect": dialect, "rows": stats.rows if stats else len(df),
+            "compaction": compaction, "matrices": matrices.results() if matrices else None,
+            "stream_matrices": matrices, "checkpoint": checkpoint}
+
+
+def resume_dataset(data_file, state, chunksize=100_000, log=print, reporter=None):
+    """Step 3 for an append-only CSV: continue a saved streaming state with the new bytes only.
+
+    `state` comes from eda_stats.load_stream_state() and must have passed
+    eda_stats.appended_since(). Returns the same dict as load_dataset(streaming=True).
+    """
+    import_libraries()
+    from eda_stats import stream_csv_stats, file_checkpoint
+
+    reporter = reporter or ProgressReporter()
+    stats, matrices, dialect = state["stats"], state["matrices"], state["dialect"]
+    offset = state["checkpoint"]["offset"]
+    new_bytes = os.path.getsize(data_file) - offset
+    log(f"  Incremental mode: {stats.rows:,} rows already profiled, parsing {new_bytes:,} new bytes "
+        f"from offset {offset:,}...")
+    reporter.total_bytes = new_bytes
+    rows_before = stats.rows
+    read = 0
+    if new_bytes > 0:
+        try:
+            with _ProgressFile(data_file, reporter, header_lines=0, start=offset) as source:
+                stream_csv_stats(source, chunksize=chunksize, dialect=dialect, stats=stats, names=state["columns"],
+                                 on_chunk=lambda st: reporter.update(rows=st.rows - rows_before),
+                                 consumers=[matrices])
+                read = source.bytes_read
+        except Exception as e:
+            raise EdaError(f"Error loading appended rows: {e}") from e
+    log(f"  ✓ Merged {stats.rows - rows_before:,} new rows")
+    return {"df": stats.preview, "stats": stats, "dialect": dialect, "rows": stats.rows,
+            "compaction": None, "matrices": matrices.results(), "stream_matrices": matrices,
+            "checkpoint": file_checkpoint(data_file, offset + read)}
+
+
+def summarize(loaded):
+    """Steps 4-5: preview, describe, missing counts and dtypes (from the streamed stats if any).
+
+    Returns the tables plus a JSON-friendly "summary" dict.
+    """
+    from eda_compare import distribution_sketch
+    df, stats = loaded["df"], loaded["stats"]
+    missing = stats.missing_series() if stats else df.isnull().sum()
+    dtypes = stats.dtypes_series() if stats else df.dtypes
+    return {
+        "preview": df.head(),
+        "describe": stats.describe_frame() if stats else df.describe(),
+        "missing": missing,
+        "dtypes": dtypes,
+        "distinct": stats.distinct_series() if stats else None,
+        "summary": {
+            "rows": int(loaded["rows"]),
+            "columns": int(len(dtypes)),
+            "missing_total": int(missing.sum()),
+            "missing": {str(k): int(v) for k, v in missing.items()},
+            "dtypes": {str(k): str(v) for k, v in dtypes.items()},
+            # small per-column sketches, so batch runs can compare files (eda_compare)
+            "distributions": distribution_sketch(df, stats),
+        },
+    }
+
+
+def save_stats_report(tables, title, output_file, matrices=None):
+    """Save the summary tables as a lightweight HTML report (used by streaming and lite mode).
+
+    `matrices` (from eda_matrices) adds the correlation and missing-value sections.
+    """
+    summary = tables["summary"]
+    sections = [("Basic statistics", tables["describe"])]
+    if matrices is None:
+        sections.append(("Missing values", tables["missing"].to_frame("missing")))
+    sections.append(("Data types", tables["dtypes"].astype(str).to_frame("dtype")))
+    if tables["distinct"] is not None:
+        sections.append(("Distinct values", tables["distinct"].to_frame("distinct")))
+    title = html.escape(title)  # built from the file name; the tables escape column names themselves
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(f"<html><head><meta charset='utf-8'><title>{title}</title></head><body>")
+        f.write(f"<h1>{title}</h1><p>Rows: {summary['rows']:,} | Columns: {summary['columns']}</p>")
+        for section_title, table in sections:
+            f.write(f"<h2>{section_title}</h2>{table.to_html()}")
+        if matrices is not None:
+            from eda_matrices import matrices_html
+            f.write(matrices_html(matrices))
+        f.write("</body></html>")
+    return output_file
+
+
+def save_matrices_json(matrices, json_file):
+    from eda_matrices import matrices_to_json
+    with open(json_file, "w", encoding="utf-8") as f:
+        json.dump(matrices_to_json(matrices), f)
+    return json_file
+
+
+def log_matrices(matrices, log=print, top_k=5):
+    from eda_matrices import top_pairs
+    for title, key in (("Pearson", "pearson"), ("Spearman", "spearman")):
+        if matrices[key] is None or matrices[key].empty:
+            continue
+        log(f"🔗 Strongest {title} correlations:")
+        log("-" * 60)
+        for a, b, r in top_pairs(matrices[key], top_k):
+            log(f"  • {a} ~ {b}: {r:+.3f}")
+        log("")
+
+
+def profile(df, title, output_file, mode="full", sample_rows=5000, stratify=None, top_k=5,
+            time_budget=30.0, log=print):
+    """Step 6: write the ydata_profiling report. Returns "full", "fast" or "minimal"."""
+    import_libraries(with_profiler=True)
+    if mode != "fast":
+        build_full_profile(df, title).to_file(output_file)
+        return "full"
+
+    profile_df = stratified_sample(df, sample_rows, stratify)
+    interaction_columns = top_correlated_columns(profile_df, top_k)
+    log(f"  • Profiling {len(profile_df):,} of {len(df):,} rows"
+        + (f" (stratified on '{stratify}')" if stratify in df.columns else ""))
+    if interaction_columns:
+        log(f"  • Interactions limited to: {', '.join(map(str, interaction_columns))}")
+    return profile_within_budget(profile_df, title, output_file, time_budget, interaction_columns, log)
+
+
+def _cache_config(mode, sample_rows, stratify, top_k, compact=True):
+    from report_cache import report_config
+    # compacted dtypes (categoricals) change the report, so uncompacted runs get their own entries
+    extra = {"compact": False} if not compact and mode != "streaming" else {}
+    if mode == "fast":
+        return report_config("fast", sample_rows=sample_rows, stratify=stratify, top_k=top_k, **extra)
+    return report_config(mode, **extra)
+
+
+def run_analysis(data_file, mode="full", output_dir=None, use_cache=True, chunksize=100_000,
+                 sample_rows=5000, stratify=None, top_k=5, time_budget=30.0, log=print, progress=None,
+                 columnar=False, compact=True, incremental=False):
+    """Run the whole pipeline for one CSV and return a result dict:
+
+    {"status": "ok" | "cached", "report": <html path>, "report_kind": ...,
+     "summary": {...}, "elapsed": seconds, "timings": [(step, seconds), ...]}
+
+    Raises EdaError for user-fixable problems. `log` receives the progress lines,
+    `progress` the structured ProgressReporter events. columnar=True reuses or
+    creates a Feather sidecar of the CSV and compact=False keeps read_csv's
+    dtypes (see load_dataset()). incremental=True (streaming mode only) saves
+    the streamed state in the app folder (eda_stats.stream_state_path()) and, when the CSV has only grown
+    since, parses just the appended bytes (see resume_dataset()).
+    """
+    from report_cache import ReportCache
+
+    started = time.time()
+    if mode not in ("full", "fast", "lite", "streaming"):
+        raise EdaError(f"Unknown mode '{mode}', use full, fast, lite or streaming")
+    if not os.path.exists(data_file):
+        raise EdaError(f"File not found: {data_file}")
+    if incremental and mode != "streaming":
+        raise EdaError("Incremental re-profiling needs streaming mode (its statistics are the mergeable ones)")
+
+    reporter = ProgressReporter(progress, total_bytes=os.path.getsize(data_file))
+    output_dir = output_dir or os.getcwd()
+    base_name = os.path.splitext(os.path.basename(data_file))[0]
+    output_file = os.path.join(output_dir, report_file_name(base_name, mode))
+    log(f"  ✓ File found: {data_file}")
+    log(f"  ✓ Output report will be named: {os.path.basename(output_file)}")
+    log("")
+
+    state = None
+    if incremental:
+        from eda_stats import stream_state_path, load_stream_state, appended_since, save_stream_state
+        state_file = stream_state_path(data_file)
+        state = load_stream_state(state_file)
+        if state is not None and not appended_since(data_file, state["checkpoint"]):
+            log("  ⚠️  File changed before the last processed offset, profiling it from the start")
+            state = None
+        # the saved state replaces the report cache here (which would hash the whole file)
+        use_cache = False
+
+    # Report cache: same file content + same settings -> reuse the last report
+    cache_config = _cache_config(mode, sample_rows, stratify, top_k, compact)
+    report_cache = ReportCache() if use_cache else None
+    if report_cache:
+        reporter.step("cache lookup")
+        try:
+            cached = report_cache.lookup(data_file, cache_config)
+        except OSError as e:
+            log(f"  ⚠️  Report cache unavailable: {e}")
+            cached = None
+        if cached:
+            # the report plus its sidecars (the .json matrices of lite/streaming reports)
+            for file in cached["files"]:
+                shutil.copyfile(file, output_file[:-len(".html")] + os.path.splitext(file)[1])
+            reporter.finish()
+            return {"status": "cached", "report": output_file, "report_kind": mode,
+                    "summary": cached["summary"], "elapsed": time.time() - started,
+                    "timings": reporter.timings}
+
+    log("📊 Step 3: Loading dataset...")
+    log("-" * 60)
+    reporter.step("load")
+    if state is not None:
+        loaded = resume_dataset(data_file, state, chunksize=chunksize, log=log, reporter=reporter)
+    else:
+        loaded = load_dataset(data_file, streaming=(mode == "streaming"), chunksize=chunksize, log=log,
+                              reporter=reporter, columnar=columnar, compact=compact)
+    if incremental:
+        reporter.step("save state")
+        save_stream_state(state_file, {"stats": loaded["stats"], "matrices": loaded["stream_matrices"],
+                                       "dialect": loaded["dialect"], "columns": list(loaded["stats"].columns),
+                                       "checkpoint": loaded["checkpoint"]})
+    df = loaded["df"]
+    log(f"✓ Dataset loaded successfully!")
+    log(f"  • Total rows: {loaded['rows']}")
+    log(f"  • Total columns: {len(df.columns)}")
+    log(f"  • Columns: {', '.join(map(str, df.columns.tolist()[:10]))}")  # Show first 10 columns
+    if len(df.columns) > 10:
+        log(f"    ... and {len(df.columns) - 10} more columns")
+    log("")
+
+    compaction = loaded["compaction"]
+    if compaction is not None:
+        log("🗜️  Memory compaction (per column):")
+        log("-" * 60)
+        log(compaction.to_string())
+        before, after = compaction.attrs["bytes_before"], compaction.attrs["bytes_after"]
+        log(f"Total: {before / 1024 ** 2:.2f} MB -> {after / 1024 ** 2:.2f} MB"
+            f" ({before / max(after, 1):.1f}x smaller)")
+        log("")
+
+    reporter.step("summarize")
+    tables = summarize(loaded)
+    log("👀 Step 4: Data preview (first 5 rows)...")
+    log("-" * 60)
+    log(tables["preview"].to_string())
+    log("")
+
+    log("📊 Step 5: Basic statistics...")
+    log("-" * 60)
+    log(tables["describe"].to_string())
+    if loaded["stats"]:
+        log("  (quantiles are approximate in streaming mode)")
+    log("")
+
+    log("🔍 Missing values check:")
+    log("-" * 60)
+    log(tables["missing"].to_string())
+    log(f"Total missing values: {tables['missing'].sum()}")
+    log("")
+
+    log("📋 Data types:")
+    log("-" * 60)
+    log(tables["dtypes"].to_string())
+    log("")
+
+    title = f"{base_name} Dataset - Exploratory Data Analysis Report"
+    if mode == "streaming":
+        log("🔢 Distinct values (approximate for large columns):")
+        log("-" * 60)
+        log(tables["distinct"].to_string())
+        log("")
+        log_matrices(loaded["matrices"], log)
+        # The full profiler needs the whole DataFrame in memory, so streaming mode
+        # saves the tables above as a lightweight HTML report instead.
+        reporter.step("report")
+        save_stats_report(tables, f"{base_name} - Streaming Statistics", output_file, loaded["matrices"])
+        save_matrices_json(loaded["matrices"], output_file[:-len(".html")] + ".json")
+        report_kind = "streaming"
+    elif mode == "lite":
+        # Correlations and missing values from the NumPy engine instead of ydata_profiling
+        from eda_matrices import compute_matrices
+        reporter.step("matrices")
+        matrices = compute_matrices(df)
+        log_matrices(matrices, log)
+        reporter.step("report")
+        save_stats_report(tables, f"{base_name} - Correlations and Missing Values", output_file, matrices)
+        save_matrices_json(matrices, output_file[:-len(".html")] + ".json")
+        report_kind = "lite"
+    else:
+        log("🚀 Step 6: Generating comprehensive EDA report...")
+        log("-" * 60)
+        if mode == "fast":
+            log(f"⚡ Fast mode: up to {sample_rows:,} sampled rows, {time_budget:.0f}s budget")
+            log("   (run without --fast for the full report)")
+        else:
+            log("⏳ This will take 1-2 minutes, please wait...")
+        log("")
+        log(f"💾 Saving report...")
+        log(f"   Location: {output_file}")
+        log("")
+        reporter.step("profile")
+        report_kind = profile(df, title, output_file, mode, sample_rows, stratify, top_k, time_budget, log)
+        if report_kind == "minimal":
+            log("  ⚠️  Time budget reached, saved the minimal report")
+
+    if not os.path.exists(output_file):
+        raise EdaError(f"File was not created! Expected location: {output_file}")
+
+    # a minimal fallback report (time budget hit) is not worth caching
+    if report_cache and report_kind != "minimal":
+        reporter.step("cache store")
+        try:
+            sidecar = output_file[:-len(".html")] + ".json"
+            report_cache.store(data_file, cache_config, output_file, tables["summary"],
+                               extra_files=[sidecar] if report_kind in ("lite", "streaming") else [])
+        except OSError as e:
+            log(f"  ⚠️  Could not cache report: {e}")
+
+    reporter.finish()
+    return {"status": "ok", "report": output_file, "report_kind": report_kind,
+            "summary": tables["summary"], "elapsed": time.time() - started,
+            "timings": reporter.timings}
+
+
+# ===================================
+# Batch mode (directory or glob)
+# ===================================
+def is_batch_target(target):
+    return os.path.isdir(target) or any(c in target for c in "*?[")
+
+
+def resolve_batch_paths(target):
+    """CSV files for a directory or glob pattern, sorted by name (the first one is the baseline)."""
+    if os.path.isdir(target):
+        target = os.path.join(target, "*.csv")
+    return sorted(path for path in glob.glob(target) if os.path.isfile(path))
+
+
+def batch_labels(paths):
+    """Name of each path relative to their common folder: unique even when a glob
+    spans several folders with the same file name (*/data.csv)."""
+    if not paths:
+        return []
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+    return [os.path.relpath(os.path.abspath(path), root) for path in paths]
+
+
+def run_batch(paths, mode="full", workers=None, output_dir=None, timeout=None, log=print, **options):
+    """Analyze several CSVs in parallel worker processes, then compare them.
+
+    Returns {"results": [(path, result dict or None, error or None), ...],
+             "comparison": <comparison html path or None>}.
+    """
+    from csv_tools import sniff_batch
+    from analysis_pool import AnalysisPool, default_worker_count
+    from eda_compare import compare_summaries, save_comparison_report
+
+    output_dir = output_dir or os.getcwd()
+    # one dialect detection per distinct header; the workers then hit the dialect cache
+    sniff_batch(paths)
+    pool = AnalysisPool(workers=workers or min(len(paths), default_worker_count()), max_queued=len(paths),
+                        preload_profiler=mode in ("full", "fast"))
+    labels = dict(zip(paths, batch_labels(paths)))
+    results = []
+    try:
+        jobs = []
+        for path in paths:
+            # reports of same-named files from different folders go to matching subfolders
+            job_output_dir = os.path.join(output_dir, os.path.dirname(labels[path]))
+            os.makedirs(job_output_dir, exist_ok=True)
+            jobs.append((path, pool.submit(path, timeout=timeout, mode=mode, output_dir=job_output_dir, **options)))
+        for path, job in jobs:
+            job.wait()
+            if job.status == "done":
+                log(f"  ✓ {labels[path]}: {os.path.basename(job.result['report'])} ({job.elapsed:.1f}s)")
+                results.append((path, job.result, None))
+            else:
+                log(f"  ❌ {labels[path]}: {job.error}")
+                results.append((path, None, job.error))
+    finally:
+        pool.shutdown()
+
+    summaries = [(labels[path], result["summary"]) for path, result, _ in results if result]
+    comparison_file = None
+    if len(summaries) > 1:
+        comparison = compare_summaries(summaries)
+        comparison_file = save_comparison_report(comparison, os.path.join(output_dir, "eda_batch_comparison.html"))
+        drifted = [d for d in comparison["drift"] if d["drifted"]]
+        log(f"  • Schema changes: {len(comparison['schema_changes'])}")
+        log(f"  • Missing-rate changes: {len(comparison['missing_changes'])}")
+        log(f"  • Drifted columns: {len(drifted)}"
+            + (f" ({', '.join(sorted({d['column'] for d in drifted}))})" if drifted else ""))
+    return {"results": results, "comparison": comparison_file}
+
+
+def open_in_browser(output_file):
+    import subprocess
+    if sys.platform == 'win32':
+        os.startfile(output_file)
+    elif sys.platform == 'darwin':  # macOS
+        subprocess.call(['open', output_file])
+    else:  # linux
+        subprocess.call(['xdg-open', output_file])
+
+
+# ===================================
+# Command line entry point
+# ===================================
+def build_parser():
+    parser = argparse.ArgumentParser(description="Generate an EDA report for a CSV file.")
+    parser.add_argument("data_file", nargs="?",
+                        help="path to the CSV file, or a directory / quoted glob for batch mode (prompted for if omitted)")
+    parser.add_argument("--workers", type=int, help="parallel worker processes in batch mode")
+    parser.add_argument("--streaming", action="store_true",
+                        help="read the CSV in chunks with bounded memory (for files larger than RAM)")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="rows per chunk in streaming mode")
+    parser.add_argument("--fast", action="store_true",
+                        help="profile a row sample with cheap settings (result in seconds)")
+    parser.add_argument("--lite", action="store_true",
+                        help="correlations and missing values only, from the built-in NumPy engine (no ydata_profiling)")
+    parser.add_argument("--sample-rows", type=int, default=5000, help="rows to profile in fast mode")
+    parser.add_argument("--stratify", metavar="COLUMN",
+                        help="keep this column's class balance when sampling (e.g. 'Heart Disease Status')")
+    parser.add_argument("--top-k", type=int, default=5, help="interaction plots for the k most correlated pairs")
+    parser.add_argument("--time-budget", type=float, default=30.0,
+                        help="seconds allowed for the fast report before falling back to a minimal one")
+    parser.add_argument("--incremental", action="store_true",
+                        help="streaming mode that saves its state and later only parses rows appended since")
+    parser.add_argument("--columnar", action="store_true",
+                        help="keep a Feather copy of the CSV and reuse it on later runs")
+    parser.add_argument("--no-compact", action="store_true",
+                        help="keep read_csv's dtypes (no categoricals or downcasting before profiling)")
+    parser.add_argument("--no-cache", action="store_true", help="always regenerate, ignoring cached reports")
+    parser.add_argument("--no-browser", action="store_true", help="don't open the report when done")
+    parser.add_argument("--pause", action="store_true", help="wait for Enter before exiting (for new console windows)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # only wait for Enter when someone is sitting at this console
+    pause = args.pause or args.data_file is None
+
+    def finish(code):
+        if pause:
+            print()
+            input("Press Enter to exit...")
+        return code
+
+    print("=" * 60)
+    print("    UNIVERSAL DATASET ANALYSIS - EDA REPORT GENERATOR")
+    print("=" * 60)
     print()
 
-    # Save report with dynamic name
-    output_file = os.path.join(current_dir, f"{base_name}_eda_report.html")
+    # ===================================
+    # Step 1: Import libraries
+    # ===================================
+    print("Step 1: Importing libraries...")
+    print("-" * 60)
+    try:
+        import_libraries()
+        # ydata_profiling is slow to import, so it is only loaded in Step 6
+        # (a cached report never needs it)
+        if importlib.util.find_spec("ydata_profiling") is None:
+            raise EdaError(f"No module named 'ydata_profiling'\nPlease install the required packages:\n  {INSTALL_HINT}")
+        print("✓ All libraries imported successfully!")
+        print()
+    except EdaError as e:
+        print(f"❌ Error: {e}")
+        return finish(1)
 
-    print(f"💾 Saving report...")
-    print(f"   Location: {output_file}")
+    # ===================================
+    # Step 2: Get data file path
+    # ===================================
+    print("📂 Step 2: Getting data file path...")
+    print("-" * 60)
+    current_dir = os.getcwd()
+    print(f"  Current directory: {current_dir}")
     print()
 
-    profile.to_file(output_file)
+    # Check for command line argument
+    if args.data_file:
+        data_file = args.data_file
+        print(f"  Using file from command line: {data_file}")
+    else:
+        # Prompt user for file path
+        print("  Please enter the path to your data file (CSV format):")
+        print("  (You can drag and drop the file here, or type the path)")
+        data_file = input("  File path: ").strip().strip('"').strip("'")
+        print()
+
+    mode = "streaming" if args.streaming or args.incremental else "fast" if args.fast else "lite" if args.lite else "full"
+    if is_batch_target(data_file):
+        return finish(batch_main(args, data_file, mode, current_dir))
 
-    # Verify file exists
-    if os.path.exists(output_file):
-        file_size = os.path.getsize(output_file)
-        file_size_kb = file_size / 1024
-        file_size_mb = file_size_kb / 1024
+    # Validate file exists
+    if not os.path.exists(data_file):
+        print(f"❌ Error: File not found: {data_file}")
+        return finish(1)
 
+    try:
+        result = run_analysis(
+            data_file,
+            mode=mode,
+            output_dir=current_dir,
+            use_cache=not args.no_cache,
+            chunksize=args.chunksize,
+            columnar=args.columnar,
+            compact=not args.no_compact,
+            incremental=args.incremental,
+            sample_rows=args.sample_rows,
+            stratify=args.stratify,
+            top_k=args.top_k,
+            time_budget=args.time_budget,
+        )
+    except EdaError as e:
+        print(f"❌ {e}")
+        print()
+        print("Common issues:")
+        print("  • Make sure the file is a valid CSV format")
+        print("  • Check if the file path is correct")
+        print("  • Try opening the file in Excel/LibreOffice to verify it's valid")
+        return finish(1)
+    except Exception as e:
         print()
         print("=" * 60)
-        print("✅ SUCCESS! REPORT GENERATED")
-        print("=" * 60)
-        print(f"📄 File name: {base_name}_eda_report.html")
-        print(f"📍 Location: {current_dir}")
-        print(f"📊 File size: {file_size:,} bytes ({file_size_kb:.2f} KB)")
+        print("❌ ERROR DURING REPORT GENERATION")
         print("=" * 60)
+        print(f"Error type: {type(e).__name__}")
+        print(f"Error message: {str(e)}")
         print()
 
-        # List all HTML files
-        print("📁 HTML files in current directory:")
+        import traceback
+        print("Full error details:")
         print("-" * 60)
-        html_files = [f for f in os.listdir(current_dir) if f.endswith('.html')]
-        if html_files:
-            for f in html_files:
-                f_path = os.path.join(current_dir, f)
-                f_size = os.path.getsize(f_path)
-                print(f"  • {f} ({f_size:,} bytes)")
-        else:
-            print("  (No HTML files found)")
-        print()
+        print(traceback.format_exc())
+        return finish(1)
+
+    output_file = result["report"]
+    summary = result["summary"]
+    if result["status"] == "cached":
+        print("=" * 60)
+        print("⚡ CACHED REPORT FOUND (same content and settings)")
+        print("=" * 60)
+        print(f"  • Rows: {summary.get('rows', 'N/A')}  |  Columns: {summary.get('columns', 'N/A')}")
+        print(f"  • Total missing values: {summary.get('missing_total', 'N/A')}")
+        print(f"📍 Location: {output_file}")
+        print("   (run with --no-cache to regenerate)")
+        return finish(0)
 
-        # Try to open in browser
+    file_size = os.path.getsize(output_file)
+    file_size_kb = file_size / 1024
+
+    print()
+    print("=" * 60)
+    print("✅ SUCCESS! REPORT GENERATED")
+    print("=" * 60)
+    print(f"📄 File name: {os.path.basename(output_file)}")
+    print(f"📍 Location: {current_dir}")
+    print(f"📊 File size: {file_size:,} bytes ({file_size_kb:.2f} KB)")
+    print(f"⏱️  Took: {result['elapsed']:.1f}s "
+          f"({', '.join(f'{step}: {seconds:.1f}s' for step, seconds in result['timings'])})")
+    print("=" * 60)
+    print()
+
+    # List all HTML files
+    print("📁 HTML files in current directory:")
+    print("-" * 60)
+    html_files = [f for f in os.listdir(current_dir) if f.endswith('.html')]
+    if html_files:
+        for f in html_files:
+            f_path = os.path.join(current_dir, f)
+            f_size = os.path.getsize(f_path)
+            print(f"  • {f} ({f_size:,} bytes)")
+    else:
+        print("  (No HTML files found)")
+    print()
+
+    # Try to open in browser
+    if not args.no_browser:
         print("💡 Opening report in your default browser...")
         print("-" * 60)
         try:
-            import subprocess
-            if sys.platform == 'win32':
-                os.startfile(output_file)
-                print("✓ Report opened in browser!")
-            elif sys.platform == 'darwin':  # macOS
-                subprocess.call(['open', output_file])
-                print("✓ Report opened in browser!")
-            else:  # linux
-                subprocess.call(['xdg-open', output_file])
-                print("✓ Report opened in browser!")
+            open_in_browser(output_file)
+            print("✓ Report opened in browser!")
         except Exception as e:
             print(f"⚠️  Could not auto-open browser: {e}")
             print(f"📌 Please open manually: {output_file}")
 
-        print()
-        print("=" * 60)
-        print("🎉 ANALYSIS COMPLETE!")
-        print("=" * 60)
-        print()
+    print()
+    print("=" * 60)
+    print("🎉 ANALYSIS COMPLETE!")
+    print("=" * 60)
+    print()
+    if result["report_kind"] in ("full", "fast", "minimal"):
         print("The HTML report contains:")
         print("  ✓ Overview of the dataset")
         print("  ✓ Variable statistics and distributions")
@@ -261,32 +999,46 @@ try:
         print("  ✓ Interactive charts and graphs")
         print()
 
-    else:
-        print()
-        print("=" * 60)
-        print("❌ ERROR: File was not created!")
-        print("=" * 60)
-        print(f"Expected location: {output_file}")
-        print()
+    return finish(0)
 
-except Exception as e:
-    print()
-    print("=" * 60)
-    print("❌ ERROR DURING REPORT GENERATION")
-    print("=" * 60)
-    print(f"Error type: {type(e).__name__}")
-    print(f"Error message: {str(e)}")
-    print()
 
-    import traceback
-    print("Full error details:")
+def batch_main(args, target, mode, current_dir):
+    paths = resolve_batch_paths(target)
+    if not paths:
+        print(f"❌ Error: No CSV files match: {target}")
+        return 1
+    print(f"📚 Batch mode: {len(paths)} files, mode '{mode}'")
     print("-" * 60)
-    print(traceback.format_exc())
+    started = time.time()
+    batch = run_batch(
+        paths,
+        mode=mode,
+        workers=args.workers,
+        output_dir=current_dir,
+        use_cache=not args.no_cache,
+        chunksize=args.chunksize,
+        sample_rows=args.sample_rows,
+        stratify=args.stratify,
+        top_k=args.top_k,
+        time_budget=args.time_budget,
+        columnar=args.columnar,
+        compact=not args.no_compact,
+        incremental=args.incremental,
+    )
+    failed = sum(1 for _, result, _ in batch["results"] if result is None)
     print()
+    print("=" * 60)
+    print(f"✅ BATCH DONE: {len(paths) - failed} of {len(paths)} files in {time.time() - started:.1f}s")
+    print("=" * 60)
+    if batch["comparison"]:
+        print(f"📍 Comparison report: {batch['comparison']}")
+        if not args.no_browser:
+            try:
+                open_in_browser(batch["comparison"])
+            except Exception as e:
+                print(f"⚠️  Could not auto-open browser: {e}")
+    return 1 if failed else 0
 
-    input("Press Enter to exit...")
-    sys.exit(1)
 
-# Keep window open
-print()
-input("Press Enter to exit...")
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,13 @@
 #!/usr/bin/env python3
-import subprocess
 import os
-from typing import Union
-import requests
 import sys
 import json
-import google.generativeai as genai
-import sys
-
-# This is the API endpoint for the Gemini 2.5 Flash model
-API_KEY = "YOUR_API_KEY"
-
-# إعداد المكتبة
-genai.configure(api_key=API_KEY)
-
-MODEL_NAME = "gemini-2.5-flash"
+import threading
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from command_cache import CommandCache
+from model_backends import BACKENDS, get_backend, set_backend
 
 
 DEFAULT_SYSTEM_PROMPT = (
@@ -27,6 +20,19 @@ DEFAULT_SYSTEM_PROMPT = (
     "return a comment starting with #: \n# Cannot fulfill request."
 )
 
+# Set AI_SHELL_CACHE=0 to always call the model
+CACHE_ENABLED = os.environ.get("AI_SHELL_CACHE", "1") != "0"
+response_cache = CommandCache()
+
+def get_cache_stats():
+    return response_cache.stats()
+
+
+def _cacheable(command):
+    # refusals and errors ("# Cannot fulfill request.", "# Error: ...") may be transient: never replay them
+    return bool(command) and not command.startswith("#")
+
+
 def run_data_analysis_agent(file_path): #this is usless for now
     if not os.path.exists(file_path):
         return f"Error: File '{file_path}' does not exist."
@@ -34,34 +40,119 @@ def run_data_analysis_agent(file_path): #this is usless for now
     if not file_path.lower().endswith('.csv'):
         return f"Error: File '{file_path}' is not a CSV file."
 
-    eda_final_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'EDA_final.py')
-    
-    if os.path.exists(eda_final_path):
-        try:
-            result = subprocess.run(
-                [sys.executable, eda_final_path, file_path],
-                capture_output=True,
-                text=True,
-                timeout=600  # 10 minute timeout
-            )
-            
-            if result.returncode == 0:
-                return f"Data analysis completed successfully for file: {file_path}\n{result.stdout}"
-            else:
-                return f"Error: {result.stderr}"
-        except subprocess.TimeoutExpired:
-            return "Error: Analysis timed out (10 minute limit)"
-        except Exception as e:
-            return f"Error: {str(e)}"
-    
-    return f"Error: 'EDA_final.py' not found in the current directory."
+    # runs on a warm worker process: pandas/ydata_profiling are imported once per worker,
+    # and the job still gets the 10 minute limit the old subprocess had
+    try:
+        from analysis_pool import get_default_pool, PoolFull, DONE, TIMED_OUT
+    except ImportError:
+        return f"Error: 'analysis_pool.py' not found in the current directory."
+
+    try:
+        job = get_default_pool().submit(file_path, timeout=600)
+    except PoolFull as e:
+        return f"Error: {e}"
+    job.wait()
+
+    log_text = "\n".join(job.log)
+    if job.status == TIMED_OUT:
+        return "Error: Data analysis timed out after 10 minutes."
+    if job.status != DONE:
+        return f"Error: {job.error}"
+    return f"Data analysis completed successfully for file: {file_path}\n{log_text}\nReport: {job.result['report']}"
 
 def run_security_monitor():
     """Run security monitoring - placeholder for future implementation"""
     return "# Security monitor received request.\n# Note: Security monitoring features are under development.\n# This is a placeholder for future security features."
 
 
-def get_shell_command(query, system_prompt_override=None):
+FENCE_MARKERS = ("```powershell", "```bash", "```")
+
+def clean_response(text):
+    for marker in FENCE_MARKERS:
+        text = text.replace(marker, "")
+    return text.strip()
+
+
+class FenceStripper:
+    """Strips code fences from streamed text, even when a fence is split across chunks."""
+
+    def __init__(self):
+        self._pending = ""
+        self._started = False
+
+    def _held_back(self, text):
+        # length of the longest tail that could still grow into a fence marker
+        for size in range(min(len(text), len(FENCE_MARKERS[0]) - 1), 0, -1):
+            tail = text[-size:]
+            if any(marker.startswith(tail) and marker != tail for marker in FENCE_MARKERS):
+                return size
+        return 0
+
+    def _emit(self, text):
+        for marker in FENCE_MARKERS:
+            text = text.replace(marker, "")
+        if not self._started:
+            text = text.lstrip()
+            self._started = bool(text)
+        return text
+
+    def feed(self, chunk):
+        text = self._pending + chunk
+        hold = self._held_back(text)
+        self._pending = text[len(text) - hold:] if hold else ""
+        return self._emit(text[:len(text) - hold])
+
+    def flush(self):
+        text, self._pending = self._pending, ""
+        return self._emit(text)
+
+
+class StreamError(Exception):
+    """The backend failed after part of the response was already yielded: that part is not a command."""
+
+
+def stream_shell_command(query, system_prompt_override=None, use_cache=True):
+    """Like get_shell_command, but yields the cleaned response in chunks as they arrive.
+
+    A failure before the first chunk yields "# Error: ..."; a failure mid-stream raises StreamError."""
+    if query.strip() == "run quick scan":
+        yield run_security_monitor()
+        return
+
+    current_system_prompt = system_prompt_override if system_prompt_override else DEFAULT_SYSTEM_PROMPT
+
+    use_cache = use_cache and CACHE_ENABLED
+    stripper = FenceStripper()
+    raw_parts = []
+    try:
+        # a bad backend name in the config or a missing SDK is reported like any other model error
+        backend = get_backend()
+        if use_cache:
+            cached = response_cache.get(query, current_system_prompt, backend.model_name)
+            if cached is not None:
+                yield cached
+                return
+
+        for chunk in backend.stream(current_system_prompt, query):
+            raw_parts.append(chunk)
+            text = stripper.feed(chunk)
+            if text:
+                yield text
+        text = stripper.flush()
+        if text:
+            yield text
+    except Exception as e:
+        if raw_parts:
+            raise StreamError(str(e)) from e
+        yield f"# Error: {str(e)}"
+        return
+
+    command = clean_response("".join(raw_parts))
+    if use_cache and _cacheable(command):
+        response_cache.put(query, current_system_prompt, backend.model_name, command)
+
+
+def get_shell_command(query, system_prompt_override=None, use_cache=True):
  
     if query.strip() == "run quick scan":
         return run_security_monitor()
@@ -69,43 +160,161 @@ def get_shell_command(query, system_prompt_override=None):
     #set the system prompt
     current_system_prompt = system_prompt_override if system_prompt_override else DEFAULT_SYSTEM_PROMPT
 
+    use_cache = use_cache and CACHE_ENABLED
     try:
-        #start the model
-        model = genai.GenerativeModel(
-            model_name=MODEL_NAME,
-            system_instruction=current_system_prompt
-        )
+        backend = get_backend()
+        if use_cache:
+            cached = response_cache.get(query, current_system_prompt, backend.model_name)
+            if cached is not None:
+                return cached
 
-        response = model.generate_content(query)
+        #ask the selected backend (gemini / local)
+        response_text = backend.generate(current_system_prompt, query)
         
         #clean the response
-        command = response.text.strip()
-        command = command.replace("```powershell", "").replace("```bash", "").replace("```", "").strip()
+        command = clean_response(response_text)
+
+        if use_cache and _cacheable(command):
+            response_cache.put(query, current_system_prompt, backend.model_name, command)
         
         return command
 
     except Exception as e:
         return f"# Error: {str(e)}"
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        test_query = input("Enter your query: ")
-        command_output = get_shell_command(test_query)
-        print(f"Query: {test_query}\nCommand: {command_output}")
-    else:
-        user_query = " ".join(sys.argv[1:])
-        command = get_shell_command(user_query)
-        print(command)
+# --- Batch mode ---
+class RateLimiter:
+    """Spaces calls evenly so no more than `rate` start per second (0 = unlimited)."""
 
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
 
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
 
 
+def read_batch_queries(lines, skipped=None):
+    """Read queries as plain lines or JSONL objects with a "query" field (and optional "id").
 
+    Malformed JSONL lines are left out; (line number, reason) of each goes to the `skipped` list if given."""
+    items = []
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                reason = f"invalid JSON: {e}"
+            else:
+                if isinstance(record, dict) and isinstance(record.get("query"), str):
+                    items.append({"id": record.get("id"), "query": record["query"]})
+                    continue
+                reason = 'no "query" string'
+            if skipped is not None:
+                skipped.append((number, reason))
+        else:
+            items.append({"id": None, "query": line})
+    return items
+
+
+def run_batch(items, out, workers=4, rate=0.0, system_prompt_override=None):
+    """Generate commands for many queries concurrently and write JSONL results in input order."""
+    limiter = RateLimiter(rate)
+
+    def work(index_item):
+        index, item = index_item
+        limiter.wait()
+        started = time.perf_counter()
+        command = get_shell_command(item["query"], system_prompt_override=system_prompt_override)
+        result = {
+            "index": index,
+            "id": item["id"],
+            "query": item["query"],
+            "command": command,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+        if command.startswith("# Error"):
+            result["error"] = command
+        return result
 
+    started = time.perf_counter()
+    errors = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        # map() yields in input order, so results stream out as soon as their turn comes
+        for result in pool.map(work, enumerate(items)):
+            errors += "error" in result
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+    elapsed = time.perf_counter() - started
 
+    return {
+        "total": len(items),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_qps": round(len(items) / elapsed, 2) if elapsed > 0 else 0.0,
+        "cache": get_cache_stats(),
+    }
 
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Turn natural language into shell commands.",
+                                     epilog="Everything after the options is the query, dashes included. "
+                                            "Put -- before a query that itself starts with '-'.")
+    parser.add_argument("query", nargs=argparse.REMAINDER, help="query to translate (prompted for if empty)")
+    parser.add_argument("--batch", metavar="FILE", help="read one query per line (or JSONL) from FILE, '-' for stdin")
+    parser.add_argument("--output", metavar="FILE", help="write batch JSONL results to FILE instead of stdout")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent model requests in batch mode")
+    parser.add_argument("--rate", type=float, default=0.0, help="max requests started per second (0 = unlimited)")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), help="model backend (default: $AI_SHELL_BACKEND or config)")
+    args = parser.parse_args(argv)
 
+    if args.backend:
+        set_backend(args.backend)
 
+    if args.query[:1] == ["--"]:
+        args.query = args.query[1:]
 
+    if args.batch:
+        skipped = []
+        if args.batch == "-":
+            items = read_batch_queries(sys.stdin, skipped)
+        else:
+            with open(args.batch, "r", encoding="utf-8") as f:
+                items = read_batch_queries(f, skipped)
+        for number, reason in skipped:
+            print(f"{args.batch}:{number}: skipped ({reason})", file=sys.stderr)
 
+        out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+        try:
+            summary = run_batch(items, out, workers=args.workers, rate=args.rate)
+        finally:
+            if args.output:
+                out.close()
+        summary["skipped"] = len(skipped)
+        print(json.dumps({"summary": summary}), file=sys.stderr)
+        return 1 if summary["errors"] or skipped else 0
+
+    if not args.query:
+        test_query = input("Enter your query: ")
+        command_output = get_shell_command(test_query)
+        print(f"Query: {test_query}\nCommand: {command_output}")
+    else:
+        user_query = " ".join(args.query)
+        command = get_shell_command(user_query)
+        print(command)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
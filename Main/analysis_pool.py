@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Warm worker pool for data analysis jobs
+A fixed number of worker processes import pandas and ydata_profiling once at
+startup and then run EDA_final.run_analysis() jobs from a queue. The pool
+enforces a concurrency limit, a queue limit, per-job timeouts and cancellation
+(a running job is cancelled by terminating its worker, which is then replaced).
+A worker whose fast profile overran its time budget exits after the job and
+is replaced too, so the abandoned profile doesn't run on into later jobs.
+"""
+
+import os
+import time
+import queue
+import itertools
+import threading
+import multiprocessing
+from multiprocessing.connection import wait as wait_for_connections
+
+DEFAULT_TIMEOUT = 600  # 10 minutes, same as the old subprocess.run limit
+DEFAULT_MAX_QUEUED = 16
+MAX_STARTUP_FAILURES = 3  # workers that die before getting ready; after that the pool gives up
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMED_OUT = "timeout"
+FINISHED_STATES = (DONE, FAILED, CANCELLED, TIMED_OUT)
+
+
+class PoolFull(Exception):
+    """Raised by submit() when the job queue is at its limit."""
+
+
+def default_worker_count():
+    return max(1, min(4, (os.cpu_count() or 2) - 1))
+
+
+def _worker_main(conn, preload_profiler=True):
+    # Runs in the worker process: import the heavy libraries once, then serve jobs
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    import EDA_final
+    try:
+        EDA_final.import_libraries(with_profiler=preload_profiler)
+    except EDA_final.EdaError as e:
+        conn.send(("error", None, str(e)))
+        return  # never report ready: the pool counts this as a failed start
+    conn.send(("ready", None, None))
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        job_id, file_path, options = message
+        try:
+            result = EDA_final.run_analysis(file_path, log=lambda line: conn.send(("log", job_id, line)),
+                                            progress=lambda event: conn.send(("progress", job_id, event)),
+                                            **options)
+            conn.send(("done", job_id, result))
+        except Exception as e:
+            conn.send(("failed", job_id, f"{type(e).__name__}: {e}"))
+        if EDA_final.profile_overrun():
+            break  # recycle: the pool replaces this worker
+
+
+class AnalysisJob:
+    def __init__(self, job_id, file_path, options, timeout):
+        self.id = job_id
+        self.file_path = file_path
+        self.options = options
+        self.timeout = timeout
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.log = []
+        self.progress = None  # last EDA_final.ProgressReporter event
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self._done = threading.Event()
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def wait(self, timeout=None):
+        """Block until the job finishes. Returns True if it did."""
+        return self._done.wait(timeout)
+
+
+class _Worker:
+    def __init__(self, context, preload_profiler=True):
+        parent_conn, child_conn = context.Pipe()
+        self.conn = parent_conn
+        self.process = context.Process(target=_worker_main, args=(child_conn, preload_profiler), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.error = None  # why it failed to start, from its "error" message
+        self.job = None
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class AnalysisPool:
+    def __init__(self, workers=None, default_timeout=DEFAULT_TIMEOUT, max_queued=DEFAULT_MAX_QUEUED, on_update=None,
+                 preload_profiler=True):
+        """on_update(job, event, data) is called from the pool thread for
+        "queued", "started", "log", "progress", "done", "failed", "cancelled" and "timeout".
+
+        preload_profiler=False skips importing ydata_profiling in the workers
+        (for lite/streaming jobs that never need it)."""
+        self.worker_count = workers or default_worker_count()
+        self.preload_profiler = preload_profiler
+        self.default_timeout = default_timeout
+        self.max_queued = max_queued
+        self.on_update = on_update
+        # spawn, not fork: the GUI process has Tk state that must not be copied
+        self._context = multiprocessing.get_context("spawn")
+        self._workers = []
+        self._pending = []
+        self._jobs = {}
+        self._commands = queue.Queue()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._thread = None
+        self._stopping = False
+        self._startup_failures = 0
+        self.broken = None  # error message once workers can't start at all
+
+    # --- public API ---
+    def start(self):
+        """Spawn and warm up the workers. Safe to call more than once."""
+        with self._lock:
+            if self._thread is not None:
+                return self
+            self._workers = [_Worker(self._context, self.preload_profiler) for _ in range(self.worker_count)]
+            self._thread = threading.Thread(target=self._run, name="analysis-pool", daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, file_path, timeout=None, **options):
+        """Queue a run_analysis(file_path, **options) job and return its AnalysisJob."""
+        self.start()
+        with self._lock:
+            if self.broken:
+                raise PoolFull(self.broken)
+            if len(self._pending) >= self.max_queued:
+                raise PoolFull(f"Too many analysis jobs queued ({self.max_queued}), try again later.")
+            job = AnalysisJob(next(self._ids), file_path, options, timeout or self.default_timeout)
+            self._jobs[job.id] = job
+            self._pending.append(job)
+        self._notify(job, "queued")
+        return job
+
+    def cancel(self, job_id):
+        self._commands.put(("cancel", job_id))
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": len(self._workers),
+                "busy": sum(1 for w in self._workers if w.job is not None),
+                "queued": len(self._pending),
+                "finished": sum(1 for j in self._jobs.values() if j.status in FINISHED_STATES),
+            }
+
+    def shutdown(self, wait=True):
+        self._stopping = True
+        self._commands.put(("stop", None))
+        if wait and self._thread is not None:
+            self._thread.join(timeout=10)
+
+    # --- pool thread ---
+    def _notify(self, job, event, data=None):
+        if self.on_update is not None:
+            try:
+                self.on_update(job, event, data)
+            except Exception:
+                pass
+
+    def _finish(self, job, status, result=None, error=None):
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished = time.time()
+        job._done.set()
+        self._notify(job, status, result if status == DONE else error)
+
+    def _replace_worker(self, worker):
+        worker.kill()
+        with self._lock:
+            index = self._workers.index(worker)
+            self._workers[index] = _Worker(self._context, self.preload_profiler)
+
+    def _handle_command(self, command, job_id):
+        if command == "stop":
+            return False
+        job = self._jobs.get(job_id)
+        if job is None or job.status in FINISHED_STATES:
+            return True
+        with self._lock:
+            if job in self._pending:
+                self._pending.remove(job)
+                worker = None
+            else:
+                worker = next((w for w in self._workers if w.job is job), None)
+        if worker is not None:
+            self._replace_worker(worker)
+        self._finish(job, CANCELLED, error="Cancelled by user")
+        return True
+
+    def _handle_message(self, worker, message):
+        kind, job_id, data = message
+        if kind == "ready":
+            worker.ready = True
+            self._startup_failures = 0
+        elif kind == "error":
+            worker.ready = False
+            worker.error = data
+        elif worker.job is not None and worker.job.id == job_id:
+            job = worker.job
+            if kind == "log":
+                job.log.append(data)
+                self._notify(job, "log", data)
+            elif kind == "progress":
+                job.progress = data
+                self._notify(job, "progress", data)
+            elif kind in ("done", "failed"):
+                worker.job = None
+                self._finish(job, DONE if kind == "done" else FAILED,
+                             result=data if kind == "done" else None,
+                             error=data if kind == "failed" else None)
+
+    def _worker_died(self, worker):
+        # crash, OOM kill, recycling...: fail its job and replace it, unless workers can't even start
+        job = worker.job
+        if not worker.ready:
+            self._startup_failures += 1
+        if self._startup_failures >= MAX_STARTUP_FAILURES:
+            worker.kill()
+            with self._lock:
+                self._workers.remove(worker)
+                pending = self._pending if not self._workers else []
+                if not self._workers:
+                    self._pending = []
+            self.broken = "Analysis workers failed to start" + (f": {worker.error}" if worker.error else "")
+            for failed in pending:
+                self._finish(failed, FAILED, error=self.broken)
+        else:
+            self._replace_worker(worker)
+        if job is not None:
+            self._finish(job, FAILED, error="Analysis worker exited unexpectedly")
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                worker = next((w for w in self._workers if w.ready and w.job is None), None)
+                if worker is None or not self._pending:
+                    return
+                job = self._pending.pop(0)
+                worker.job = job
+            job.status = RUNNING
+            job.started = time.time()
+            try:
+                worker.conn.send((job.id, job.file_path, job.options))
+            except OSError:
+                # died since the last poll (BrokenPipeError...): respawn it and fail the job
+                self._worker_died(worker)
+                continue
+            self._notify(job, "started")
+
+    def _check_timeouts(self):
+        now = time.time()
+        for worker in list(self._workers):
+            job = worker.job
+            if job is not None and now - job.started > job.timeout:
+                self._replace_worker(worker)
+                self._finish(job, TIMED_OUT, error=f"Analysis timed out ({job.timeout:.0f}s limit)")
+
+    def _run(self):
+        running = True
+        while running:
+            while True:
+                try:
+                    command, job_id = self._commands.get_nowait()
+                except queue.Empty:
+                    break
+                running = self._handle_command(command, job_id) and running
+            if not running:
+                break
+
+            self._dispatch()
+            connections = {w.conn: w for w in self._workers}
+            for conn in wait_for_connections(list(connections), timeout=0.2):
+                worker = connections[conn]
+                try:
+                    self._handle_message(worker, conn.recv())
+                except (EOFError, OSError):
+                    self._worker_died(worker)
+            self._check_timeouts()
+
+        running = []
+        for worker in self._workers:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.kill()
+            if worker.job is not None:
+                running.append(worker.job)
+                worker.job = None
+        with self._lock:
+            pending, self._pending = self._pending, []
+        # jobs killed mid-run are finished too, or their wait() would block forever
+        for job in running + pending:
+            self._finish(job, CANCELLED, error="Pool shut down")
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool():
+    """Process-wide pool shared by the agent and scripts."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = AnalysisPool()
+        return _default_pool
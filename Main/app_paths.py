@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""
+Shared on-disk locations for the AI Shell Helper caches.
+Override the base folder with the AI_SHELL_HELPER_HOME environment variable.
+"""
+
+import os
+
+APP_HOME = os.environ.get(
+    "AI_SHELL_HELPER_HOME",
+    os.path.join(os.path.expanduser("~"), ".ai_shell_helper")
+)
+
+
+def app_path(*parts):
+    """Return a path inside APP_HOME, creating the parent folder if needed."""
+    path = os.path.join(APP_HOME, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
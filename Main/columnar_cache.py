@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Columnar sidecar cache for CSVs that are analyzed again and again
+The first load of a CSV is written to an uncompressed Feather (Arrow IPC) file
+with its inferred (and compacted, see dtype_compaction) dtypes.
+Later loads memory-map that file instead of parsing the CSV text again.
+Sidecars live in the app cache directory and are keyed on (path, mtime, size),
+so editing the CSV makes its sidecar stale. Needs pyarrow; without it every
+function here is a no-op that reports a miss.
+"""
+
+import os
+import json
+import hashlib
+import importlib.util
+
+from app_paths import app_path
+
+SIDECAR_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+
+def _signature(csv_path):
+    st = os.stat(csv_path)
+    return [os.path.abspath(csv_path), st.st_mtime_ns, st.st_size]
+
+
+def sidecar_paths(csv_path):
+    """(feather file, metadata json) for csv_path."""
+    name = hashlib.sha1(os.path.abspath(csv_path).encode("utf-8")).hexdigest()
+    data_path = app_path("columnar", f"{name}.feather")
+    return data_path, f"{data_path[:-len('.feather')]}.json"
+
+
+def _read_meta(csv_path):
+    """Sidecar metadata if the sidecar is still fresh for csv_path, else None."""
+    data_path, meta_path = sidecar_paths(csv_path)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("signature") != _signature(csv_path) or not os.path.exists(data_path):
+        return None
+    return meta
+
+
+def load_sidecar(csv_path, columns=None, nrows=None, compacted=None):
+    """DataFrame from a fresh sidecar of csv_path (optionally just the first nrows), or None.
+
+    compacted=True/False only accepts a sidecar written from a compacted/uncompacted frame.
+    """
+    meta = _read_meta(csv_path) if SIDECAR_AVAILABLE else None
+    if meta is None or (compacted is not None and meta.get("compacted", False) != compacted):
+        return None
+    import pyarrow.feather as feather
+    try:
+        table = feather.read_table(sidecar_paths(csv_path)[0], columns=columns, memory_map=True)
+    except Exception:
+        return None
+    if nrows is not None:
+        table = table.slice(0, nrows)
+    # split_blocks/self_destruct keep peak memory close to one copy of the data
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def sidecar_shape(csv_path):
+    """(rows, columns) of a fresh sidecar without opening it, or None."""
+    meta = _read_meta(csv_path) if SIDECAR_AVAILABLE else None
+    if meta is None:
+        return None
+    return meta["rows"], meta["columns"]
+
+
+def write_sidecar(csv_path, df, compacted=False):
+    """Store df (already parsed from csv_path) as its sidecar. Returns the sidecar path or None."""
+    if not SIDECAR_AVAILABLE:
+        return None
+    import pyarrow.feather as feather
+    data_path, meta_path = sidecar_paths(csv_path)
+    signature = _signature(csv_path)
+    tmp_path = f"{data_path}.{os.getpid()}.tmp"
+    if not all(isinstance(name, str) for name in df.columns):
+        return None  # headerless CSV: Arrow would turn the 0..n column labels into strings
+    try:
+        # uncompressed so later reads can memory-map the columns directly
+        feather.write_feather(df.reset_index(drop=True), tmp_path, compression="uncompressed")
+        os.replace(tmp_path, data_path)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"signature": signature, "rows": len(df), "columns": len(df.columns),
+                       "compacted": compacted}, f)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+    return data_path
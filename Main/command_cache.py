@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Persistent query -> command cache for ai_shell_helper
+Entries are keyed on (normalized query, system prompt hash, model name),
+evicted by LRU + TTL, capped in size and stored as JSON on disk.
+The GUI and --batch runs may share the file from two processes, so every save
+merges with what is on disk instead of overwriting it.
+"""
+
+import os
+import json
+import time
+import atexit
+import hashlib
+import threading
+from collections import OrderedDict
+
+from app_paths import app_path
+
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600  # one week
+
+
+def normalize_query(query):
+    """Collapse whitespace only; case matters for commands and file names."""
+    return " ".join(query.split())
+
+
+def make_key(query, system_prompt, model_name):
+    prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+    raw = json.dumps([normalize_query(query), prompt_hash, model_name])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class CommandCache:
+    def __init__(self, path=None, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.path = path or app_path("command_cache.json")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> {"value", "created", "used"}, oldest first
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dirty = False
+        atexit.register(self.flush)
+
+    def _read_disk(self):
+        """Unexpired entries in the cache file, oldest used first."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return []
+        now = time.time()
+        items = sorted(data.get("entries", {}).items(), key=lambda kv: kv[1].get("used", 0))
+        return [(key, entry) for key, entry in items if now - entry.get("created", 0) <= self.ttl_seconds]
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        self._entries.update(self._read_disk())
+
+    def _save(self, merge=True):
+        if merge:
+            # keep entries other processes stored since we loaded (the more recently used copy wins)
+            merged = dict(self._read_disk())
+            for key, entry in self._entries.items():
+                if entry["used"] >= merged.get(key, {}).get("used", 0):
+                    merged[key] = entry
+            items = sorted(merged.items(), key=lambda kv: kv[1].get("used", 0))[-self.max_entries:]
+            self._entries = OrderedDict(items)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"entries": self._entries}, f)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def get(self, query, system_prompt, model_name):
+        key = make_key(query, system_prompt, model_name)
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry["created"] > self.ttl_seconds:
+                del self._entries[key]
+                self._dirty = True
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry["used"] = time.time()
+            self._entries.move_to_end(key)
+            self._dirty = True
+            return entry["value"]
+
+    def put(self, query, system_prompt, model_name, value):
+        key = make_key(query, system_prompt, model_name)
+        now = time.time()
+        with self._lock:
+            self._load()
+            self._entries[key] = {"value": value, "created": now, "used": now}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            try:
+                self._save()
+            except OSError:
+                pass  # the cache is an optimization, never fail a request because of it
+
+    def flush(self):
+        with self._lock:
+            if self._dirty:
+                try:
+                    self._save()
+                except OSError:
+                    pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._loaded = True
+            self.hits = 0
+            self.misses = 0
+            try:
+                self._save(merge=False)
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Persistent command history
+Every generated command is stored in a local SQLite database together with the
+query that produced it, when it was generated / last used and, once executed,
+its exit code and duration. One row per distinct command (a UNIQUE index does
+the de-duplication). Search uses an FTS5 trigram index, so any substring of a
+command or query matches. Where SQLite has no trigram tokenizer, search falls
+back to LIKE.
+"""
+
+import time
+import sqlite3
+
+from app_paths import app_path
+
+MIN_TRIGRAM_TERM = 3  # shorter search terms can't use the trigram index
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    query TEXT,
+    command TEXT NOT NULL UNIQUE,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    uses INTEGER NOT NULL DEFAULT 1,
+    exit_code INTEGER,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS history_last_used ON history(last_used);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+    query, command, content='history', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS history_ai AFTER INSERT ON history BEGIN
+    INSERT INTO history_fts(rowid, query, command) VALUES (new.id, new.query, new.command);
+END;
+CREATE TRIGGER IF NOT EXISTS history_ad AFTER DELETE ON history BEGIN
+    INSERT INTO history_fts(history_fts, rowid, query, command) VALUES ('delete', old.id, old.query, old.command);
+END;
+CREATE TRIGGER IF NOT EXISTS history_au AFTER UPDATE OF query, command ON history BEGIN
+    INSERT INTO history_fts(history_fts, rowid, query, command) VALUES ('delete', old.id, old.query, old.command);
+    INSERT INTO history_fts(rowid, query, command) VALUES (new.id, new.query, new.command);
+END;
+"""
+
+COLUMNS = ("id", "query", "command", "created", "last_used", "uses", "exit_code", "duration")
+
+
+def _like_pattern(term):
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class CommandHistory:
+    def __init__(self, path=None):
+        self.path = path or app_path("history.sqlite3")
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        try:
+            self._db.executescript(_FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False  # no FTS5 / trigram tokenizer in this SQLite build
+        self._db.commit()
+
+    def add(self, query, command):
+        """Record a generated (or re-used) command. Returns its row id."""
+        now = time.time()
+        self._db.execute(
+            "INSERT INTO history (query, command, created, last_used) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(command) DO UPDATE SET last_used = excluded.last_used, uses = uses + 1, "
+            "query = COALESCE(excluded.query, query)",
+            (query, command, now, now))
+        self._db.commit()
+        return self._db.execute("SELECT id FROM history WHERE command = ?", (command,)).fetchone()[0]
+
+    def record_run(self, command, exit_code, duration):
+        """Store the result of executing command (exit_code None when it was stopped)."""
+        self._db.execute(
+            "INSERT INTO history (query, command, created, last_used, exit_code, duration) VALUES (NULL, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(command) DO UPDATE SET last_used = excluded.last_used, "
+            "exit_code = excluded.exit_code, duration = excluded.duration",
+            (command, time.time(), time.time(), exit_code, duration))
+        self._db.commit()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def search(self, text=""):
+        """Ids of the entries matching every whitespace-separated term of text, most recent first."""
+        terms = text.split()
+        indexed = [t for t in terms if len(t) >= MIN_TRIGRAM_TERM] if self.fts else []
+        scanned = [t for t in terms if t not in indexed]
+        sql, where, params = "SELECT h.id FROM history h", [], []
+        if indexed:
+            sql += " JOIN history_fts ON history_fts.rowid = h.id"
+            where.append("history_fts MATCH ?")
+            params.append(" AND ".join('"{}"'.format(t.replace('"', '""')) for t in indexed))
+        for term in scanned:
+            where.append("(h.command LIKE ? ESCAPE '\\' OR h.query LIKE ? ESCAPE '\\')")
+            params += [_like_pattern(term)] * 2
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY h.last_used DESC"
+        return [row[0] for row in self._db.execute(sql, params)]
+
+    def rows(self, ids):
+        """{id: {column: value}} for the given ids (e.g. the visible window of a search)."""
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        cursor = self._db.execute(f"SELECT {', '.join(COLUMNS)} FROM history WHERE id IN ({placeholders})", list(ids))
+        return {row[0]: dict(zip(COLUMNS, row)) for row in cursor}
+
+    def pairs(self, limit):
+        """(query, command) of the most recently used entries that have a query, newest first."""
+        cursor = self._db.execute("SELECT query, command FROM history WHERE query IS NOT NULL AND query != '' "
+                                  "ORDER BY last_used DESC LIMIT ?", (limit,))
+        return cursor.fetchall()
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Streaming shell command execution for the GUI
+A command runs in its own process group with stdout and stderr read incrementally
+by two reader threads. The GUI drains the coalesced output once per frame instead
+of waiting for the command to exit. Pending output is capped (the newest text is
+kept, the oldest dropped and counted), so a chatty command can't fill memory, and
+stop() kills the whole process group, pipelines and children included.
+"""
+
+import os
+import sys
+import time
+import codecs
+import signal
+import threading
+import subprocess
+
+READ_BYTES = 64 * 1024
+STOP_GRACE_SECONDS = 2.0  # SIGTERM first, SIGKILL if the group is still there after this
+DEFAULT_OUTPUT_CAP = int(os.environ.get("AI_SHELL_OUTPUT_CAP", 1_000_000))  # characters
+
+STDOUT = "stdout"
+STDERR = "stderr"
+
+
+class CommandRun:
+    def __init__(self, command, max_chars=DEFAULT_OUTPUT_CAP):
+        self.command = command
+        self.max_chars = max_chars
+        self.process = None
+        self.returncode = None
+        self.stopped = False
+        self.started = None
+        self.finished = None
+        self.omitted = 0  # characters dropped before anyone drained them
+        self._pending = []  # [stream, text] in arrival order
+        self._pending_chars = 0
+        self._lock = threading.Lock()
+        self._readers = []
+        self._done = threading.Event()
+
+    def start(self):
+        """Spawn the command. Raises OSError if it can't be started."""
+        if sys.platform == "win32":
+            group = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            group = {"start_new_session": True}
+        # shell=True is needed so pipes and redirections (| and >) work
+        self.process = subprocess.Popen(self.command, shell=True, stdin=subprocess.DEVNULL,
+                                        stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0, **group)
+        self.started = time.time()
+        for stream, pipe in ((STDOUT, self.process.stdout), (STDERR, self.process.stderr)):
+            reader = threading.Thread(target=self._read, args=(stream, pipe), daemon=True)
+            reader.start()
+            self._readers.append(reader)
+        threading.Thread(target=self._wait, daemon=True).start()
+        return self
+
+    def _read(self, stream, pipe):
+        # unbuffered pipe: read() returns whatever is available, as soon as it is
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        with pipe:
+            for data in iter(lambda: pipe.read(READ_BYTES), b""):
+                self._push(stream, decoder.decode(data))
+        self._push(stream, decoder.decode(b"", final=True))
+
+    def _push(self, stream, text):
+        if not text:
+            return
+        with self._lock:
+            if self._pending and self._pending[-1][0] == stream:
+                self._pending[-1][1] += text
+            else:
+                self._pending.append([stream, text])
+            self._pending_chars += len(text)
+            # keep the tail: drop the oldest text beyond the cap
+            while self._pending_chars > self.max_chars:
+                excess = self._pending_chars - self.max_chars
+                first = self._pending[0]
+                if len(first[1]) <= excess:
+                    self._pending.pop(0)
+                    dropped = len(first[1])
+                else:
+                    first[1] = first[1][excess:]
+                    dropped = excess
+                self._pending_chars -= dropped
+                self.omitted += dropped
+
+    def _wait(self):
+        self.returncode = self.process.wait()
+        for reader in self._readers:
+            reader.join()
+        self.finished = time.time()
+        self._done.set()
+
+    def drain(self):
+        """Output since the last call as [(stream, text), ...], adjacent chunks of a stream merged."""
+        with self._lock:
+            chunks, self._pending = self._pending, []
+            self._pending_chars = 0
+        return [(stream, text) for stream, text in chunks]
+
+    @property
+    def done(self):
+        """Process exited and both pipes are fully read (drain() may still hold the last output)."""
+        return self.finished is not None
+
+    @property
+    def duration(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def stop(self):
+        """Kill the command's whole process group (the shell, its pipeline and any children).
+
+        Also works after the shell exited while a background child still holds the pipes."""
+        if self.process is None or self.done:
+            return
+        self.stopped = True
+        if sys.platform == "win32":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(self.process.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            return
+        try:
+            os.killpg(self.process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return  # the whole group is gone already
+        threading.Thread(target=self._kill_after_grace, daemon=True).start()
+
+    def _kill_after_grace(self):
+        if self._done.wait(STOP_GRACE_SECONDS):
+            return
+        try:
+            # also catches children that outlived the shell but still hold the pipes
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+CSV helpers shared by EDA_final.py and the GUI
+Dialect sniffing reads a bounded byte prefix once to pick the encoding,
+delimiter and quote character, so the full file is parsed exactly once. The
+first line is taken as the header unless the caller says there is none
+(csv.Sniffer's header guess is wrong for all-text files).
+Row counting scans the raw bytes in large blocks (quote aware) without parsing,
+and can estimate the count from the same prefix first. The same scan can build
+a sparse byte-offset row index (RowIndex) so any window of rows can be read
+without parsing the rows before it.
+"""
+
+import os
+import io
+import csv
+import json
+import codecs
+import itertools
+import time
+import threading
+from array import array
+from collections import Counter
+
+from app_paths import app_path
+
+SNIFF_BYTES = 256 * 1024
+COUNT_BLOCK_BYTES = 4 * 1024 * 1024
+ROW_INDEX_STRIDE = 1024  # one byte offset per this many rows
+CANDIDATE_ENCODINGS = ['utf-8', 'cp1252', 'latin-1']  # latin-1 never fails, so it goes last
+CANDIDATE_DELIMITERS = [',', ';', '\t', '|']
+MAX_CACHED_FILES = 2000  # dialect cache entries kept, least recently stored evicted first
+
+_dialect_cache = {}
+_dialect_cache_lock = threading.Lock()
+_DIALECT_CACHE_FILE = None
+
+
+def _file_signature(path):
+    st = os.stat(path)
+    return [os.path.abspath(path), st.st_mtime_ns, st.st_size]
+
+
+def _decode_sample(raw):
+    """Return (encoding, text) for the first candidate that decodes the sample."""
+    if raw.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig', raw[len(codecs.BOM_UTF8):].decode('utf-8', errors='replace')
+    for encoding in CANDIDATE_ENCODINGS:
+        try:
+            # final=False tolerates a multi-byte character cut off at the end of the sample
+            return encoding, codecs.getincrementaldecoder(encoding)().decode(raw, final=False)
+        except UnicodeDecodeError:
+            continue
+    return 'latin-1', raw.decode('latin-1')
+
+
+def _complete_lines(text, truncated):
+    lines = text.splitlines()
+    if truncated and len(lines) > 1:
+        lines = lines[:-1]  # last line is probably cut off by the sample boundary
+    return lines
+
+
+def _delimiter_score(lines, delimiter, quotechar):
+    counts = [len(row) for row in csv.reader(lines, delimiter=delimiter, quotechar=quotechar) if row]
+    if not counts:
+        return (0, 0)
+    width, freq = Counter(counts).most_common(1)[0]
+    if width < 2:
+        return (0, 0)
+    return (freq / len(counts), width)
+
+
+def detect_dialect(raw, truncated=False, has_header=True):
+    """Detect encoding, delimiter and quotechar from the first bytes of a CSV."""
+    encoding, text = _decode_sample(raw)
+    lines = _complete_lines(text, truncated)
+    sample = "\n".join(lines)
+
+    quotechar = '"'
+    try:
+        sniffed = csv.Sniffer().sniff(sample, delimiters="".join(CANDIDATE_DELIMITERS))
+        quotechar = sniffed.quotechar or '"'
+    except csv.Error:
+        pass
+
+    scores = {d: _delimiter_score(lines, d, quotechar) for d in CANDIDATE_DELIMITERS}
+    delimiter = max(CANDIDATE_DELIMITERS, key=lambda d: scores[d])
+    if scores[delimiter] == (0, 0):
+        delimiter = ','
+
+    return {
+        "encoding": encoding,
+        "delimiter": delimiter,
+        "quotechar": quotechar,
+        "has_header": has_header,
+        "columns": scores[delimiter][1],
+    }
+
+
+def _read_disk_cache():
+    try:
+        with open(_DIALECT_CACHE_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _load_disk_cache():
+    global _DIALECT_CACHE_FILE
+    if _DIALECT_CACHE_FILE is None:
+        _DIALECT_CACHE_FILE = app_path("csv_dialects.json")
+        _dialect_cache.update(_read_disk_cache())
+
+
+def _merge_entries(ours, theirs):
+    # same file version: keep both processes' fields; otherwise the most recently stored wins
+    if ours["signature"] == theirs.get("signature"):
+        return {**theirs, **ours}
+    return ours if ours.get("stored", 0) >= theirs.get("stored", 0) else theirs
+
+
+def _save_disk_cache():
+    # batch sniffing and EDA worker processes share the file: merge with what the
+    # others wrote since we loaded it instead of overwriting it with our view
+    merged = _read_disk_cache()
+    for path, entry in _dialect_cache.items():
+        merged[path] = _merge_entries(entry, merged[path]) if path in merged else entry
+    if len(merged) > MAX_CACHED_FILES:
+        newest = sorted(merged, key=lambda path: merged[path].get("stored", 0))[-MAX_CACHED_FILES:]
+        merged = {path: merged[path] for path in newest}
+    _dialect_cache.clear()
+    _dialect_cache.update(merged)
+    tmp_path = f"{_DIALECT_CACHE_FILE}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(merged, f)
+        os.replace(tmp_path, _DIALECT_CACHE_FILE)
+    except OSError:
+        pass
+
+
+def _cache_get(signature, field):
+    with _dialect_cache_lock:
+        _load_disk_cache()
+        entry = _dialect_cache.get(signature[0])
+        if entry and entry["signature"] == signature and field in entry:
+            return entry[field]
+    return None
+
+
+def _cache_put(signature, field, value):
+    with _dialect_cache_lock:
+        _load_disk_cache()
+        entry = _dialect_cache.get(signature[0])
+        if not entry or entry["signature"] != signature:
+            entry = _dialect_cache[signature[0]] = {"signature": signature}
+        entry[field] = value
+        entry["stored"] = time.time()
+        _save_disk_cache()
+
+
+def sniff_csv(path, sample_bytes=SNIFF_BYTES, use_cache=True, has_header=True):
+    """Sniff the dialect of `path`. Results are cached per (path, mtime, size).
+
+    has_header=False only when the caller knows the file has no header line."""
+    signature = _file_signature(path)
+    if use_cache:
+        dialect = _cache_get(signature, "dialect")
+        if dialect is not None:
+            return dict(dialect, has_header=has_header)
+
+    with open(path, "rb") as f:
+        raw = f.read(sample_bytes)
+    dialect = detect_dialect(raw, truncated=len(raw) == sample_bytes, has_header=has_header)
+
+    if use_cache:
+        _cache_put(signature, "dialect", dialect)
+    return dialect
+
+
+class _LineCounter:
+    """Counts record-ending newlines in byte blocks, skipping newlines inside quoted fields."""
+
+    def __init__(self, quotechar='"'):
+        self.quote = quotechar.encode("ascii") if quotechar else None
+        self.in_quotes = False
+        self.lines = 0
+        self.last_byte = b""
+
+    def feed(self, block):
+        if not block:
+            return
+        self.last_byte = block[-1:]
+        if self.quote is None or (not self.in_quotes and self.quote not in block):
+            self.lines += block.count(b"\n")
+            return
+        # split on the quote char: pieces alternate outside/inside quotes
+        # (an escaped "" is an empty inside piece, so the parity stays right)
+        pieces = block.split(self.quote)
+        outside = not self.in_quotes
+        for piece in pieces:
+            if outside:
+                self.lines += piece.count(b"\n")
+            outside = not outside
+        self.in_quotes = outside  # state after the last piece, flipped once too often
+
+    def records(self):
+        """Number of records seen, counting a last line without a trailing newline."""
+        if self.last_byte and self.last_byte != b"\n":
+            return self.lines + 1
+        return self.lines
+
+
+def _data_rows(records, dialect):
+    return max(records - (1 if dialect["has_header"] else 0), 0)
+
+
+def cached_row_count(path, dialect=None):
+    """Exact data row count from an earlier count_rows() of this exact file, else None."""
+    records = _cache_get(_file_signature(path), "records")
+    if records is None:
+        return None
+    return _data_rows(records, dialect or {"has_header": True})
+
+
+def estimate_rows(path, dialect=None, sample_bytes=SNIFF_BYTES):
+    """Return (rows, exact): exact when the file fits in the sample, else extrapolated from it."""
+    dialect = dialect or sniff_csv(path)
+    size = os.path.getsize(path)
+    counter = _LineCounter(dialect["quotechar"])
+    with open(path, "rb") as f:
+        raw = f.read(sample_bytes)
+    counter.feed(raw)
+    if len(raw) >= size:
+        return _data_rows(counter.records(), dialect), True
+    if counter.lines == 0:
+        return 0, False
+    # lines in the sample / sample bytes, extrapolated to the whole file
+    return _data_rows(int(round(counter.lines * size / len(raw))), dialect), False
+
+
+def count_rows(path, dialect=None, block_bytes=COUNT_BLOCK_BYTES, use_cache=True):
+    """Exact number of data rows (header excluded), quoted newlines respected.
+
+    Scans raw bytes in large blocks without decoding or parsing. Cached per (path, mtime, size).
+    """
+    signature = _file_signature(path)
+    dialect = dialect or sniff_csv(path)
+    # the cache holds records, header line included: the header is the caller's call
+    records = _cache_get(signature, "records") if use_cache else None
+    if records is None:
+        counter = _LineCounter(dialect["quotechar"])
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(block_bytes), b""):
+                counter.feed(block)
+        records = counter.records()
+        if use_cache:
+            _cache_put(signature, "records", records)
+    return _data_rows(records, dialect)
+
+
+class RowIndex:
+    """Sparse byte-offset index of a CSV: where every ROW_INDEX_STRIDE-th data row starts.
+
+    build() scans the raw bytes once (quote aware, like count_rows) and can run in a
+    background thread; read_rows() works for every row indexed so far. A row window
+    is read by seeking to the nearest indexed row and parsing at most stride + count
+    records, so memory and time per window don't depend on the file size.
+    """
+
+    def __init__(self, path, dialect=None, stride=ROW_INDEX_STRIDE):
+        self.path = path
+        self.dialect = dialect or sniff_csv(path)
+        self.stride = stride
+        self.signature = _file_signature(path)
+        self.offsets = array("q")
+        self.rows = 0  # data rows indexed so far
+        self.complete = False
+        self.header = self._read_header()
+        self._lock = threading.Lock()
+
+    def _read_header(self):
+        if not self.dialect["has_header"]:
+            return [f"column_{i}" for i in range(self.dialect["columns"])]
+        with open(self.path, "rb") as f:
+            return next(self._reader(f), [])
+
+    def _reader(self, raw_file):
+        text = io.TextIOWrapper(raw_file, encoding=self.dialect["encoding"], errors="replace", newline="")
+        return csv.reader(text, delimiter=self.dialect["delimiter"], quotechar=self.dialect["quotechar"])
+
+    def build(self, block_bytes=COUNT_BLOCK_BYTES, on_progress=None, should_stop=None):
+        """Scan the file. on_progress(rows) runs after every block; should_stop() aborts the scan.
+
+        Returns True when the whole file was indexed (the row count is then cached for count_rows)."""
+        quote = self.dialect["quotechar"].encode("ascii") if self.dialect["quotechar"] else None
+        records = -1 if self.dialect["has_header"] else 0  # data row index of the record being read
+        if records == 0:
+            self.offsets.append(0)
+        in_quotes = False
+        position = 0
+        last_byte = b""
+        with open(self.path, "rb") as f:
+            for block in iter(lambda: f.read(block_bytes), b""):
+                if should_stop is not None and should_stop():
+                    return False
+                found = []
+                pieces = block.split(quote) if quote is not None and (in_quotes or quote in block) else [block]
+                piece_start = position
+                outside = not in_quotes
+                for piece in pieces:
+                    if outside:
+                        newline = piece.find(b"\n")
+                        while newline != -1:
+                            records += 1
+                            if records % self.stride == 0:
+                                found.append(piece_start + newline + 1)
+                            newline = piece.find(b"\n", newline + 1)
+                    piece_start += len(piece) + 1
+                    outside = not outside
+                if len(pieces) > 1:
+                    in_quotes = outside
+                position += len(block)
+                last_byte = block[-1:]
+                with self._lock:
+                    self.offsets.extend(found)
+                    self.rows = max(records, 0)
+                if on_progress is not None:
+                    on_progress(self.rows)
+
+        with self._lock:
+            if last_byte and last_byte != b"\n":
+                self.rows = max(records + 1, 0)  # last record has no trailing newline
+            elif self.offsets and self.offsets[-1] >= position:
+                self.offsets.pop()  # offset of the "row" after the final newline
+            self.complete = True
+        if on_progress is not None:
+            on_progress(self.rows)
+        if _file_signature(self.path) == self.signature:
+            _cache_put(self.signature, "records", self.rows + (1 if self.dialect["has_header"] else 0))
+        return True
+
+    def read_rows(self, start, count):
+        """Data rows [start, start + count) as lists of strings (fewer past the indexed rows)."""
+        with self._lock:
+            count = max(0, min(count, self.rows - start))
+            block = start // self.stride
+            if count == 0 or block >= len(self.offsets):
+                return []
+            offset = self.offsets[block]
+        skip = start - block * self.stride
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return list(itertools.islice(self._reader(f), skip, skip + count))
+
+
+def _header_line(path, limit=64 * 1024):
+    with open(path, "rb") as f:
+        return f.readline(limit)
+
+
+def sniff_batch(paths):
+    """Sniff a batch of files of the same export, returning {path: dialect}.
+
+    A file whose header line is byte-identical to one already sniffed reuses that
+    dialect instead of being sniffed again. Everything lands in the dialect cache,
+    so later sniff_csv() calls (also in other processes) are hits.
+    """
+    by_header = {}
+    dialects = {}
+    for path in paths:
+        signature = _file_signature(path)
+        dialect = _cache_get(signature, "dialect")
+        if dialect is None:
+            header = _header_line(path)
+            dialect = by_header.get(header)
+            if dialect is None:
+                dialect = sniff_csv(path)
+            else:
+                _cache_put(signature, "dialect", dialect)
+            by_header.setdefault(header, dialect)
+        dialects[path] = dict(dialect, has_header=True)  # entries cached before it was the default may say False
+    return dialects
+
+
+def read_csv_kwargs(dialect):
+    """pandas.read_csv keyword arguments for a sniffed dialect."""
+    return {
+        "encoding": dialect["encoding"],
+        "sep": dialect["delimiter"],
+        "quotechar": dialect["quotechar"],
+        "header": 0 if dialect["has_header"] else None,
+    }
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Dtype compaction for DataFrames about to be profiled
+read_csv leaves Yes/No and Low/Medium/High columns as Python strings and every
+number as 64-bit. compact_frame() converts low-cardinality text to categoricals,
+downcasts integers to the smallest type that holds them and floats to float32
+when that loses nothing, and reports memory before and after per column.
+"""
+
+import numpy as np
+import pandas as pd
+
+CATEGORY_MAX_UNIQUE = 1000
+CATEGORY_MAX_RATIO = 0.5  # at most one distinct value per two rows
+
+
+def categorize(df, max_unique=CATEGORY_MAX_UNIQUE, max_ratio=CATEGORY_MAX_RATIO):
+    """Convert low-cardinality text columns (Gender, Smoking, ...) to categoricals in place."""
+    converted = []
+    for name in df.columns:
+        column = df[name]
+        if not (pd.api.types.is_object_dtype(column) or pd.api.types.is_string_dtype(column)):
+            continue
+        unique = column.nunique(dropna=True)
+        if unique <= max_unique and unique <= max_ratio * max(len(column), 1):
+            df[name] = column.astype("category")
+            converted.append(name)
+    return converted
+
+
+def _downcast(column):
+    if pd.api.types.is_bool_dtype(column):
+        return column
+    if pd.api.types.is_integer_dtype(column):
+        downcast = "unsigned" if len(column) and column.min() >= 0 else "integer"
+        return pd.to_numeric(column, downcast=downcast)
+    if pd.api.types.is_float_dtype(column) and column.dtype != np.float32:
+        values = column.to_numpy()
+        with np.errstate(over="ignore"):  # out of float32 range becomes inf, which fails the check below
+            as_float32 = values.astype(np.float32)
+        # only when every value survives the round trip (NaN compares unequal, so allow it)
+        if np.all((as_float32 == values) | np.isnan(values)):
+            return column.astype(np.float32)
+    return column
+
+
+def compact_frame(df, categories=True):
+    """Compact df in place. Returns a per-column report DataFrame with dtypes and KB before/after."""
+    before = df.memory_usage(deep=True, index=False)
+    before_dtypes = df.dtypes.astype(str)
+    if categories:
+        categorize(df)
+    for name in df.columns:
+        compacted = _downcast(df[name])
+        if compacted is not df[name]:
+            df[name] = compacted
+    after = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        "dtype before": before_dtypes,
+        "dtype after": df.dtypes.astype(str),
+        "KB before": (before / 1024).round(1),
+        "KB after": (after / 1024).round(1),
+    })
+    report.attrs["bytes_before"] = int(before.sum())
+    report.attrs["bytes_after"] = int(after.sum())
+    return report
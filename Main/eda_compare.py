@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Comparison of EDA summaries across files with the same schema (daily drops)
+Every run_analysis() summary carries small per-column distribution sketches
+(percentiles for numeric columns, top value frequencies for the rest), so files
+can be compared without loading them again:
+  - schema changes: added/removed columns and dtype family changes
+  - missing-rate changes per column
+  - distribution drift against the first (baseline) file: an approximate
+    Kolmogorov-Smirnov distance for numeric columns and the total variation
+    distance for categorical ones
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+SKETCH_PERCENTILES = np.linspace(0.01, 0.99, 99)
+SKETCH_TOP_VALUES = 50
+DRIFT_THRESHOLD = 0.1
+MISSING_CHANGE_THRESHOLD = 1.0  # percentage points
+
+
+def distribution_sketch(df, stats=None):
+    """Per-column {"kind": "numeric", "percentiles": [...]} or {"kind": "categorical", "frequencies": {...}}.
+
+    With streaming stats the numeric percentiles come from the quantile sample and
+    categorical columns are skipped (only their distinct count is tracked).
+    """
+    sketch = {}
+    if stats is not None:
+        for name, column in stats.columns.items():
+            if column.numeric and len(column.sample):
+                sketch[str(name)] = {"kind": "numeric",
+                                     "percentiles": np.quantile(column.sample, SKETCH_PERCENTILES).tolist()}
+        return sketch
+    for name in df.columns:
+        column = df[name]
+        if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+            values = column.dropna().to_numpy(dtype=np.float64)
+            if len(values):
+                sketch[str(name)] = {"kind": "numeric",
+                                     "percentiles": np.quantile(values, SKETCH_PERCENTILES).tolist()}
+        else:
+            frequencies = column.astype(str).where(column.notna()).value_counts(normalize=True)
+            sketch[str(name)] = {"kind": "categorical",
+                                 "frequencies": {str(k): float(v) for k, v in frequencies.head(SKETCH_TOP_VALUES).items()}}
+    return sketch
+
+
+def dtype_family(dtype_name):
+    """Coarse dtype so float32 vs float64 (compaction) is not reported as a schema change."""
+    name = dtype_name.lower()
+    if name.startswith("bool"):
+        return "bool"
+    if name.startswith(("int", "uint", "float")):
+        return "numeric"
+    if name.startswith("datetime"):
+        return "datetime"
+    return "text"
+
+
+def numeric_drift(a, b):
+    """Approximate KS distance between two percentile sketches."""
+    a, b = np.asarray(a), np.asarray(b)
+    points = np.union1d(a, b)
+    # CDF of each sketch at every point: position among its percentiles
+    cdf_a = np.interp(points, a, SKETCH_PERCENTILES, left=0.0, right=1.0)
+    cdf_b = np.interp(points, b, SKETCH_PERCENTILES, left=0.0, right=1.0)
+    return float(np.max(np.abs(cdf_a - cdf_b)))
+
+
+def categorical_drift(a, b):
+    """Total variation distance between two frequency tables."""
+    keys = set(a) | set(b)
+    return 0.5 * sum(abs(a.get(k, 0.0) - b.get(k, 0.0)) for k in keys)
+
+
+def compare_summaries(named_summaries):
+    """Compare [(file label, summary), ...]; labels must be unique, the first one is the baseline."""
+    if not named_summaries:
+        return None
+    names = [name for name, _ in named_summaries]
+    baseline_name, baseline = named_summaries[0]
+    base_families = {col: dtype_family(d) for col, d in baseline["dtypes"].items()}
+    base_sketch = baseline.get("distributions", {})
+
+    schema, drift, missing_rates = [], [], {}
+    for name, summary in named_summaries:
+        families = {col: dtype_family(d) for col, d in summary["dtypes"].items()}
+        rows = max(summary["rows"], 1)
+        missing_rates[name] = {col: 100.0 * count / rows for col, count in summary["missing"].items()}
+        if name == baseline_name:
+            continue
+        for col in base_families.keys() - families.keys():
+            schema.append({"file": name, "column": col, "change": "removed"})
+        for col in families.keys() - base_families.keys():
+            schema.append({"file": name, "column": col, "change": "added"})
+        for col in base_families.keys() & families.keys():
+            if base_families[col] != families[col]:
+                schema.append({"file": name, "column": col,
+                               "change": f"{base_families[col]} -> {families[col]}"})
+
+        sketch = summary.get("distributions", {})
+        for col, base in base_sketch.items():
+            other = sketch.get(col)
+            if other is None or other["kind"] != base["kind"]:
+                continue
+            if base["kind"] == "numeric":
+                score = numeric_drift(base["percentiles"], other["percentiles"])
+            else:
+                score = categorical_drift(base["frequencies"], other["frequencies"])
+            drift.append({"file": name, "column": col, "kind": base["kind"], "score": round(score, 4),
+                          "drifted": score >= DRIFT_THRESHOLD})
+
+    missing = pd.DataFrame(missing_rates).round(2)  # columns x files
+    missing_changes = []
+    if baseline_name in missing:
+        for name in names[1:]:
+            delta = (missing[name] - missing[baseline_name]).dropna()
+            for col, change in delta[delta.abs() >= MISSING_CHANGE_THRESHOLD].items():
+                missing_changes.append({"file": name, "column": col,
+                                        "baseline %": float(missing.at[col, baseline_name]),
+                                        "now %": float(missing.at[col, name]), "change": round(float(change), 2)})
+
+    return {
+        "baseline": baseline_name,
+        "files": [{"file": name, "rows": summary["rows"], "columns": summary["columns"],
+                   "missing_total": summary["missing_total"]} for name, summary in named_summaries],
+        "schema_changes": schema,
+        "missing_rates": missing,
+        "missing_changes": missing_changes,
+        "drift": drift,
+    }
+
+
+def save_comparison_report(comparison, output_file):
+    """Write the comparison as HTML plus a .json next to it. Returns the HTML path."""
+    def table(records, empty):
+        return pd.DataFrame(records).to_html(index=False) if records else f"<p>{empty}</p>"
+
+    drift = pd.DataFrame(comparison["drift"])
+    drift_html = "<p>No comparable columns.</p>"
+    if not drift.empty:
+        scores = drift.pivot(index="column", columns="file", values="score")
+        drift_html = scores.to_html(float_format=lambda v: f"{v:.3f}")
+        flagged = drift[drift["drifted"]]
+        drift_html += "<h3>Drifted columns</h3>" + table(flagged.to_dict("records"), "None above the threshold.")
+
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write("<html><head><meta charset='utf-8'><title>EDA comparison</title></head><body>")
+        f.write(f"<h1>EDA comparison</h1><p>Baseline: {comparison['baseline']}</p>")
+        f.write("<h2>Files</h2>" + table(comparison["files"], ""))
+        f.write("<h2>Schema changes</h2>" + table(comparison["schema_changes"], "No schema changes."))
+        f.write(f"<h2>Missing-rate changes (&ge; {MISSING_CHANGE_THRESHOLD:g} points)</h2>"
+                + table(comparison["missing_changes"], "No missing-rate changes."))
+        f.write("<h2>Missing rate per file (%)</h2>" + comparison["missing_rates"].to_html())
+        f.write(f"<h2>Distribution drift vs baseline (KS / total variation, flagged &ge; {DRIFT_THRESHOLD:g})</h2>"
+                + drift_html)
+        f.write("</body></html>")
+
+    json_data = dict(comparison)
+    json_data["missing_rates"] = json.loads(comparison["missing_rates"].to_json())
+    with open(output_file[:-len(".html")] + ".json", "w", encoding="utf-8") as f:
+        json.dump(json_data, f)
+    return output_file
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Vectorized correlation and missing-value matrices
+A lightweight alternative to the correlation and missing-value sections of
+ydata_profiling, built from a few matrix products per block of rows:
+  - Pearson with pairwise-complete observations (like df.corr()), from
+    accumulated pairwise sums, so blocks/chunks can be added one at a time
+  - Spearman as Pearson on ranks computed once per column
+  - missing values as a packed nullity bitmask: per-column counts,
+    co-occurrence counts and the nullity correlation (missingno-style heatmap)
+Memory is bounded by the block size, not the number of rows.
+"""
+
+import html
+import warnings
+
+import numpy as np
+import pandas as pd
+
+BLOCK_ROWS = 262_144
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def numeric_columns(df):
+    return [name for name in df.columns
+            if pd.api.types.is_numeric_dtype(df[name]) and not pd.api.types.is_bool_dtype(df[name])]
+
+
+def _as_float_matrix(frame, columns):
+    return np.column_stack([pd.to_numeric(frame[name], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+                            for name in columns]) if columns else np.empty((len(frame), 0))
+
+
+def average_ranks(values):
+    """Column-wise 1-based ranks of a float matrix, ties averaged, NaN kept as NaN."""
+    columns = np.ascontiguousarray(values.T)  # one contiguous row per column
+    ranks = np.full(columns.shape, np.nan)
+    for j, column in enumerate(columns):
+        valid = np.flatnonzero(~np.isnan(column))
+        present = column[valid]
+        order = np.argsort(present)  # ties are averaged below, so the sort need not be stable
+        ordered = present[order]
+        # tie groups [start, end) in sorted order all get the mean of their positions
+        starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+        ends = np.r_[starts[1:], len(ordered)]
+        group_rank = (starts + ends + 1) / 2.0
+        ranks[j, valid[order]] = np.repeat(group_rank, ends - starts)
+    return ranks.T
+
+
+class PairwiseMoments:
+    """Pairwise-complete sums for a correlation matrix, accumulated over row blocks."""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.shift = None
+        self.n = np.zeros((k, k))
+        self.sx = np.zeros((k, k))   # sx[i, j]: sum of column i over rows where i and j are both present
+        self.sxx = np.zeros((k, k))
+        self.sxy = np.zeros((k, k))
+
+    def update(self, values):
+        """Add a (rows x columns) float block, NaN meaning missing."""
+        if len(values) == 0:
+            return
+        if self.shift is None:
+            # centring on the first block's means keeps the one-pass sums well conditioned
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                self.shift = np.nan_to_num(np.nanmean(values, axis=0))
+        x = values - self.shift
+        present = ~np.isnan(x)
+        mask = present.astype(np.float64)
+        x = np.where(present, x, 0.0)
+        self.n += mask.T @ mask
+        self.sx += x.T @ mask
+        self.sxx += (x * x).T @ mask
+        self.sxy += x.T @ x
+
+    def correlation(self, min_periods=2):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = self.sxy - self.sx * self.sx.T / self.n
+            var = self.sxx - self.sx * self.sx / self.n
+            corr = cov / np.sqrt(var * var.T)
+        corr[(self.n < min_periods) | ~np.isfinite(corr)] = np.nan
+        np.clip(corr, -1.0, 1.0, out=corr)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+class NullityCounts:
+    """Missing-value counts and co-occurrence from a bit-packed nullity mask."""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.rows = 0
+        self.missing = np.zeros(k, dtype=np.int64)
+        self.together = np.zeros((k, k), dtype=np.int64)  # rows where both i and j are missing
+
+    def update(self, isnull):
+        """Add a (rows x columns) boolean block."""
+        if len(isnull) == 0:
+            return
+        self.rows += len(isnull)
+        counts = isnull.sum(axis=0)
+        self.missing += counts
+        # one bit per row: columns become rows of ceil(n / 8) bytes
+        packed = np.ascontiguousarray(np.packbits(isnull, axis=0).T)
+        for i in np.flatnonzero(counts):
+            self.together[i] += _POPCOUNT[packed[i] & packed].sum(axis=1, dtype=np.int64)
+
+    def nullity_correlation(self):
+        """Correlation of the missing indicators; NaN for columns that are never or always missing."""
+        n, c = float(self.rows), self.missing.astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = (n * self.together - np.outer(c, c)) / np.sqrt(np.outer(c * (n - c), c * (n - c)))
+        corr[~np.isfinite(corr)] = np.nan
+        np.clip(corr, -1.0, 1.0, out=corr)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    def counts_frame(self):
+        rows = max(self.rows, 1)
+        return pd.DataFrame({"missing": self.missing, "missing %": (100.0 * self.missing / rows).round(2)},
+                            index=self.columns)
+
+
+class StreamingMatrices:
+    """Pearson and nullity matrices for a CSV read in chunks (see eda_stats.stream_csv_stats)."""
+
+    def __init__(self):
+        self.pearson = None
+        self.nullity = None
+
+    def update(self, chunk):
+        if self.pearson is None:
+            self.pearson = PairwiseMoments(numeric_columns(chunk))
+            self.nullity = NullityCounts(chunk.columns)
+        self.pearson.update(_as_float_matrix(chunk, self.pearson.columns))
+        self.nullity.update(chunk[self.nullity.columns].isna().to_numpy())
+
+    def results(self):
+        if self.pearson is None:
+            return None
+        return {"pearson": self.pearson.correlation(), "spearman": None,
+                "missing": self.nullity.counts_frame(), "nullity": self.nullity.nullity_correlation(),
+                "rows": self.nullity.rows}
+
+
+def _blocks(values, block_rows):
+    for start in range(0, len(values), block_rows):
+        yield values[start:start + block_rows]
+
+
+def compute_matrices(df, spearman=True, block_rows=BLOCK_ROWS):
+    """Pearson, Spearman and missing-value matrices for an in-memory DataFrame.
+
+    Spearman ranks each column once over all its values, so with missing values it
+    can differ slightly from df.corr("spearman"), which re-ranks every pair.
+    """
+    columns = numeric_columns(df)
+    values = _as_float_matrix(df, columns)
+    pearson = PairwiseMoments(columns)
+    for block in _blocks(values, block_rows):
+        pearson.update(block)
+
+    spearman_frame = None
+    if spearman:
+        ranks = PairwiseMoments(columns)
+        ranked = average_ranks(values)
+        for block in _blocks(ranked, block_rows):
+            ranks.update(block)
+        spearman_frame = ranks.correlation()
+
+    nullity = NullityCounts(df.columns)
+    isnull = df.isna().to_numpy()
+    for block in _blocks(isnull, block_rows):
+        nullity.update(block)
+
+    return {"pearson": pearson.correlation(), "spearman": spearman_frame,
+            "missing": nullity.counts_frame(), "nullity": nullity.nullity_correlation(),
+            "rows": len(df)}
+
+
+def top_pairs(corr, k=10):
+    """The k most correlated distinct column pairs as (a, b, r), strongest first."""
+    values = corr.to_numpy()
+    i, j = np.triu_indices(len(values), k=1)
+    r = values[i, j]
+    keep = np.isfinite(r)
+    i, j, r = i[keep], j[keep], r[keep]
+    order = np.argsort(-np.abs(r))[:k]
+    return [(corr.index[i[o]], corr.columns[j[o]], float(r[o])) for o in order]
+
+
+def matrices_to_json(result):
+    def frame(matrix):
+        if matrix is None:
+            return None
+        return {"columns": [str(c) for c in matrix.columns],
+                "values": [[None if np.isnan(v) else round(float(v), 6) for v in row] for row in matrix.to_numpy()]}
+
+    missing = result["missing"]
+    return {
+        "rows": int(result["rows"]),
+        "pearson": frame(result["pearson"]),
+        "spearman": frame(result["spearman"]),
+        "nullity_correlation": frame(result["nullity"]),
+        "missing": {str(name): int(count) for name, count in missing["missing"].items()},
+    }
+
+
+def _heatmap_html(matrix):
+    """A correlation matrix as an HTML table with blue (negative) / red (positive) cells."""
+    rows = ["<table class='heatmap'><tr><th></th>"
+            + "".join(f"<th>{html.escape(str(name))}</th>" for name in matrix.columns) + "</tr>"]
+    for name, row in zip(matrix.index, matrix.to_numpy()):
+        cells = []
+        for value in row:
+            if np.isnan(value):
+                cells.append("<td style='background:#eee'></td>")
+                continue
+            color = "220,38,38" if value > 0 else "37,99,235"
+            cells.append(f"<td style='background:rgba({color},{abs(value):.2f})'>{value:.2f}</td>")
+        rows.append(f"<tr><th>{html.escape(str(name))}</th>{''.join(cells)}</tr>")
+    return "".join(rows) + "</table>"
+
+
+HEATMAP_CSS = ("<style>table.heatmap{border-collapse:collapse;font-size:11px}"
+               "table.heatmap td{width:42px;text-align:center;border:1px solid #fff}"
+               "table.heatmap th{font-weight:normal;text-align:left;padding:0 4px}</style>")
+
+
+def matrices_html(result, top_k=10):
+    """HTML sections for the matrices, for embedding in a report body."""
+    parts = [HEATMAP_CSS]
+    for title, key in (("Pearson correlation", "pearson"), ("Spearman correlation", "spearman")):
+        matrix = result[key]
+        if matrix is None or matrix.empty:
+            continue
+        pairs = "".join(f"<li>{html.escape(str(a))} ~ {html.escape(str(b))}: {r:+.3f}</li>"
+                        for a, b, r in top_pairs(matrix, top_k))
+        parts.append(f"<h2>{title}</h2><ul>{pairs}</ul>{_heatmap_html(matrix)}")
+    parts.append(f"<h2>Missing values</h2>{result['missing'].to_html()}")
+    nullity = result["nullity"]
+    missing_columns = [name for name, count in zip(nullity.columns, result["missing"]["missing"]) if count]
+    if len(missing_columns) > 1:
+        parts.append("<h2>Missing value correlation</h2>"
+                     + _heatmap_html(nullity.loc[missing_columns, missing_columns]))
+    return "".join(parts)
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Streaming statistics for EDA on CSVs larger than RAM
+The CSV is read in chunks and every column keeps a small, mergeable state:
+  - count / mean / M2 (Chan's parallel variance) / min / max
+  - missing count
+  - a bottom-k random sample for approximate quantiles
+  - a HyperLogLog sketch (plus an exact hash set while small) for distinct counts
+Memory stays bounded by the chunk size and the sketch sizes, not the file size.
+Because the state is mergeable it can be saved with a byte checkpoint and
+resumed when rows are appended to the CSV (see save_stream_state()). Saved
+states are plain data, never pickles: the arrays (samples, HLL registers,
+matrix sums) go in an .npz and everything else in a JSON string next to them.
+"""
+
+import io
+import os
+import json
+import hashlib
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from app_paths import app_path
+from csv_tools import sniff_csv, read_csv_kwargs
+from eda_matrices import StreamingMatrices, PairwiseMoments, NullityCounts
+
+DEFAULT_CHUNKSIZE = 100_000
+QUANTILE_SAMPLE_SIZE = 16_384
+HLL_PRECISION = 14  # 2**14 registers -> ~0.8% standard error
+EXACT_DISTINCT_LIMIT = 10_000
+STATE_VERSION = 2  # 2: .npz + JSON in the app folder instead of a pickle next to the report
+CHECK_BYTES = 64 * 1024  # hashed at the start and just before the checkpoint offset
+DESCRIBE_PERCENTILES = (0.25, 0.5, 0.75)
+
+
+def _bit_length(values):
+    """Vectorized int.bit_length() for a uint64 array."""
+    x = values.copy()
+    length = np.zeros(len(x), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        mask = x >= np.uint64(1 << shift)
+        length[mask] += shift
+        x[mask] >>= np.uint64(shift)
+    return length + (x > 0).astype(np.uint8)
+
+
+class HyperLogLog:
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        if len(hashes) == 0:
+            return
+        p = self.precision
+        index = (hashes >> np.uint64(64 - p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - p)) - 1)
+        rank = (64 - p) - _bit_length(rest).astype(np.int64) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * np.log(m / zeros)  # linear counting for small cardinalities
+        return raw
+
+
+class ColumnStats:
+    """Mergeable running statistics for one column."""
+
+    def __init__(self, name, sample_size=QUANTILE_SAMPLE_SIZE, rng=None):
+        self.name = name
+        self.sample_size = sample_size
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.dtype = None
+        self.numeric = True
+        self.count = 0
+        self.missing = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.sample = np.empty(0, dtype=np.float64)
+        self.sample_keys = np.empty(0, dtype=np.float64)
+        self.hll = HyperLogLog()
+        self.exact_hashes = set()
+
+    def _merge_dtype(self, dtype):
+        if self.dtype is None or self.dtype == dtype:
+            self.dtype = dtype
+        elif pd.api.types.is_numeric_dtype(self.dtype) and pd.api.types.is_numeric_dtype(dtype) \
+                and not pd.api.types.is_bool_dtype(self.dtype) and not pd.api.types.is_bool_dtype(dtype):
+            self.dtype = np.result_type(self.dtype, dtype)
+        else:
+            self.dtype = np.dtype(object)
+        if not (pd.api.types.is_numeric_dtype(self.dtype) and not pd.api.types.is_bool_dtype(self.dtype)):
+            self._drop_numeric()
+
+    def _drop_numeric(self):
+        self.numeric = False
+        self.mean = self.m2 = 0.0
+        self.min = self.max = None
+        self.sample = self.sample[:0]
+        self.sample_keys = self.sample_keys[:0]
+
+    def _add_hashes(self, hashes):
+        self.hll.add_hashes(hashes)
+        if self.exact_hashes is not None:
+            self.exact_hashes.update(np.unique(hashes).tolist())
+            if len(self.exact_hashes) > EXACT_DISTINCT_LIMIT:
+                self.exact_hashes = None
+
+    def _merge_moments(self, n, mean, m2):
+        if n == 0:
+            return
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+
+    def _merge_sample(self, values, keys):
+        values = np.concatenate([self.sample, values])
+        keys = np.concatenate([self.sample_keys, keys])
+        if len(keys) > self.sample_size:
+            keep = np.argpartition(keys, self.sample_size)[:self.sample_size]
+            values, keys = values[keep], keys[keep]
+        self.sample, self.sample_keys = values, keys
+
+    def update(self, series):
+        self._merge_dtype(series.dtype)
+        valid = series.dropna()
+        self.missing += len(series) - len(valid)
+
+        values = valid.to_numpy(dtype=np.float64) if self.numeric else None
+        # hash numerics as float64 so 5 (int chunk) and 5.0 (chunk with NaNs) count once
+        hashed = pd.Series(values) if self.numeric else valid
+        self._add_hashes(pd.util.hash_pandas_object(hashed, index=False).to_numpy(dtype=np.uint64))
+
+        if not self.numeric:
+            self.count += len(valid)
+            return
+        if len(values) == 0:
+            return
+        chunk_mean = float(values.mean())
+        self._merge_moments(len(values), chunk_mean, float(((values - chunk_mean) ** 2).sum()))
+        chunk_min, chunk_max = float(values.min()), float(values.max())
+        self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+        self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+        self._merge_sample(values, self.rng.random(len(values)))
+
+    def merge(self, other):
+        """Fold another ColumnStats for the same column (e.g. from another chunk range) into this one."""
+        if other.dtype is not None:
+            self._merge_dtype(other.dtype)
+        self.missing += other.missing
+        self.hll.merge(other.hll)
+        if self.exact_hashes is not None and other.exact_hashes is not None:
+            self.exact_hashes |= other.exact_hashes
+            if len(self.exact_hashes) > EXACT_DISTINCT_LIMIT:
+                self.exact_hashes = None
+        else:
+            self.exact_hashes = None
+        if not self.numeric or not other.numeric:
+            self.count += other.count
+            if self.numeric:
+                self._drop_numeric()
+            return
+        self._merge_moments(other.count, other.mean, other.m2)
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+        self._merge_sample(other.sample, other.sample_keys)
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else float("nan")
+
+    @property
+    def distinct(self):
+        if self.exact_hashes is not None:
+            return len(self.exact_hashes)
+        return int(round(self.hll.estimate()))
+
+    def quantiles(self, probs=DESCRIBE_PERCENTILES):
+        if len(self.sample) == 0:
+            return [float("nan")] * len(probs)
+        return [float(q) for q in np.quantile(self.sample, probs)]
+
+
+class StreamingStats:
+    """Per-column streaming statistics for a whole CSV."""
+
+    def __init__(self, sample_size=QUANTILE_SAMPLE_SIZE, seed=None):
+        self.sample_size = sample_size
+        self.rng = np.random.default_rng(seed)
+        self.columns = {}
+        self.rows = 0
+        self.chunks = 0
+        self.preview = None
+
+    def update(self, chunk):
+        if self.preview is None:
+            self.preview = chunk.head().copy()
+        for name in chunk.columns:
+            column = self.columns.get(name)
+            if column is None:
+                column = self.columns[name] = ColumnStats(name, self.sample_size, self.rng)
+            column.update(chunk[name])
+        self.rows += len(chunk)
+        self.chunks += 1
+
+    def merge(self, other):
+        for name, other_column in other.columns.items():
+            column = self.columns.get(name)
+            if column is None:
+                self.columns[name] = other_column
+            else:
+                column.merge(other_column)
+        self.rows += other.rows
+        self.chunks += other.chunks
+        if self.preview is None:
+            self.preview = other.preview
+
+    def describe_frame(self):
+        """Same layout as df.describe() (numeric columns only)."""
+        index = ["count", "mean", "std", "min"] + [f"{int(p * 100)}%" for p in DESCRIBE_PERCENTILES] + ["max"]
+        data = {}
+        for name, column in self.columns.items():
+            if not column.numeric:
+                continue
+            nan = float("nan")
+            data[name] = [float(column.count),
+                          column.mean if column.count else nan,
+                          column.std,
+                          column.min if column.min is not None else nan,
+                          *column.quantiles(),
+                          column.max if column.max is not None else nan]
+        return pd.DataFrame(data, index=index)
+
+    def missing_series(self):
+        """Same as df.isnull().sum()."""
+        return pd.Series({name: column.missing for name, column in self.columns.items()}, dtype="int64")
+
+    def dtypes_series(self):
+        """Same as df.dtypes."""
+        return pd.Series({name: column.dtype for name, column in self.columns.items()}, dtype=object)
+
+    def distinct_series(self):
+        return pd.Series({name: column.distinct for name, column in self.columns.items()}, dtype="int64")
+
+
+def iter_csv_chunks(data_file, chunksize=DEFAULT_CHUNKSIZE, dialect=None, names=None):
+    """read_csv in chunks. With `names` the source has no header line (e.g. a resumed tail)."""
+    if dialect is None:
+        dialect = sniff_csv(data_file)
+    kwargs = read_csv_kwargs(dialect)
+    if names is not None:
+        kwargs.update(header=None, names=names)
+    return pd.read_csv(data_file, chunksize=chunksize, low_memory=False, **kwargs)
+
+
+def stream_csv_stats(data_file, chunksize=DEFAULT_CHUNKSIZE, dialect=None, seed=None, on_chunk=None,
+                     consumers=(), stats=None, names=None):
+    """Compute StreamingStats for a CSV without loading it into memory.
+
+    on_chunk(stats) is called after every chunk, e.g. to report progress.
+    Every consumer's update(chunk) also sees each chunk (e.g. eda_matrices.StreamingMatrices).
+    Pass a previous `stats` (and the column `names`) to continue it with rows read from data_file.
+    """
+    stats = stats if stats is not None else StreamingStats(seed=seed)
+    for chunk in iter_csv_chunks(data_file, chunksize, dialect, names):
+        stats.update(chunk)
+        for consumer in consumers:
+            consumer.update(chunk)
+        if on_chunk is not None:
+            on_chunk(stats)
+    return stats
+
+
+# --- incremental state for append-only files ---
+def _region_hash(f, start, length):
+    f.seek(start)
+    return hashlib.sha256(f.read(length)).hexdigest()
+
+
+def file_checkpoint(path, offset):
+    """Identify the first `offset` bytes of path cheaply: hashes of its first and last CHECK_BYTES."""
+    with open(path, "rb") as f:
+        tail_start = max(0, offset - CHECK_BYTES)
+        tail = _region_hash(f, tail_start, offset - tail_start)
+        f.seek(max(offset - 1, 0))
+        last_byte = f.read(1) if offset else b"\n"
+        return {
+            "offset": offset,
+            "head": _region_hash(f, 0, min(offset, CHECK_BYTES)),
+            "tail": tail,
+            "ends_with_newline": last_byte == b"\n",
+        }
+
+
+def appended_since(path, checkpoint):
+    """True if path still starts with the checkpointed bytes, so only rows after the offset are new."""
+    offset = checkpoint["offset"]
+    if os.path.getsize(path) < offset:
+        return False
+    current = file_checkpoint(path, offset)
+    if current["head"] != checkpoint["head"] or current["tail"] != checkpoint["tail"]:
+        return False
+    # a last line without newline may still be growing; only trust a clean record boundary
+    return checkpoint["ends_with_newline"] or os.path.getsize(path) == offset
+
+
+def stream_state_path(data_file):
+    """Where the incremental state of data_file is kept (in the app folder, one file per CSV path)."""
+    name = hashlib.sha256(os.path.abspath(data_file).encode("utf-8")).hexdigest()[:32]
+    return app_path("stream_states", f"{name}.npz")
+
+
+def _json_value(value):
+    return value.item() if isinstance(value, np.generic) else str(value)
+
+
+def _pack_stats(stats, arrays):
+    columns = []
+    for i, (name, column) in enumerate(stats.columns.items()):
+        columns.append({"name": name, "dtype": None if column.dtype is None else str(column.dtype),
+                        "numeric": column.numeric, "count": column.count, "missing": column.missing,
+                        "mean": column.mean, "m2": column.m2, "min": column.min, "max": column.max,
+                        "exact": column.exact_hashes is not None})
+        arrays[f"stats.{i}.sample"] = column.sample
+        arrays[f"stats.{i}.sample_keys"] = column.sample_keys
+        arrays[f"stats.{i}.hll"] = column.hll.registers
+        if column.exact_hashes is not None:
+            arrays[f"stats.{i}.exact"] = np.array(sorted(column.exact_hashes), dtype=np.uint64)
+    preview = stats.preview
+    return {"sample_size": stats.sample_size, "rows": stats.rows, "chunks": stats.chunks,
+            "rng": stats.rng.bit_generator.state, "columns": columns,
+            "preview": None if preview is None else {"columns": list(preview.columns),
+                                                     "csv": preview.to_csv(index=False)}}
+
+
+def _unpack_stats(meta, arrays):
+    stats = StreamingStats(sample_size=meta["sample_size"])
+    if meta["rng"].get("bit_generator") == type(stats.rng.bit_generator).__name__:
+        stats.rng.bit_generator.state = meta["rng"]
+    stats.rows, stats.chunks = meta["rows"], meta["chunks"]
+    for i, saved in enumerate(meta["columns"]):
+        column = ColumnStats(saved["name"], stats.sample_size, stats.rng)
+        column.dtype = None if saved["dtype"] is None else pd.api.types.pandas_dtype(saved["dtype"])
+        for field in ("numeric", "count", "missing", "mean", "m2", "min", "max"):
+            setattr(column, field, saved[field])
+        column.sample = arrays[f"stats.{i}.sample"]
+        column.sample_keys = arrays[f"stats.{i}.sample_keys"]
+        column.hll.registers = arrays[f"stats.{i}.hll"]
+        column.exact_hashes = set(arrays[f"stats.{i}.exact"].tolist()) if saved["exact"] else None
+        stats.columns[saved["name"]] = column
+    if meta["preview"] is not None:
+        stats.preview = pd.read_csv(io.StringIO(meta["preview"]["csv"]))
+        stats.preview.columns = meta["preview"]["columns"]
+    return stats
+
+
+def _pack_matrices(matrices, arrays):
+    if matrices is None or matrices.pearson is None:
+        return None
+    pearson, nullity = matrices.pearson, matrices.nullity
+    for field in ("n", "sx", "sxx", "sxy"):
+        arrays[f"pearson.{field}"] = getattr(pearson, field)
+    if pearson.shift is not None:
+        arrays["pearson.shift"] = pearson.shift
+    arrays["nullity.missing"] = nullity.missing
+    arrays["nullity.together"] = nullity.together
+    return {"pearson_columns": pearson.columns, "nullity_columns": nullity.columns, "rows": nullity.rows}
+
+
+def _unpack_matrices(meta, arrays):
+    matrices = StreamingMatrices()
+    if meta is None:
+        return matrices
+    matrices.pearson = PairwiseMoments(meta["pearson_columns"])
+    for field in ("n", "sx", "sxx", "sxy"):
+        setattr(matrices.pearson, field, arrays[f"pearson.{field}"])
+    matrices.pearson.shift = arrays["pearson.shift"] if "pearson.shift" in arrays else None
+    matrices.nullity = NullityCounts(meta["nullity_columns"])
+    matrices.nullity.rows = meta["rows"]
+    matrices.nullity.missing = arrays["nullity.missing"]
+    matrices.nullity.together = arrays["nullity.together"]
+    return matrices
+
+
+def save_stream_state(state_file, state):
+    """Save {"stats", "matrices", "dialect", "columns", "checkpoint"} atomically (see stream_state_path())."""
+    arrays = {}
+    meta = {"version": STATE_VERSION, "dialect": state["dialect"], "columns": state["columns"],
+            "checkpoint": state["checkpoint"], "stats": _pack_stats(state["stats"], arrays),
+            "matrices": _pack_matrices(state["matrices"], arrays)}
+    arrays["meta"] = np.array(json.dumps(meta, default=_json_value))
+    tmp_path = f"{state_file}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, state_file)
+
+
+def load_stream_state(state_file):
+    """The saved state, or None if missing, unreadable or from another version."""
+    try:
+        with np.load(state_file, allow_pickle=False) as saved:
+            arrays = {name: saved[name] for name in saved.files}
+        meta = json.loads(str(arrays.pop("meta")))
+        if meta.get("version") != STATE_VERSION:
+            return None
+        return {"stats": _unpack_stats(meta["stats"], arrays), "matrices": _unpack_matrices(meta["matrices"], arrays),
+                "dialect": meta["dialect"], "columns": meta["columns"], "checkpoint": meta["checkpoint"]}
+    except (OSError, ValueError, KeyError, TypeError, zipfile.BadZipFile):
+        return None
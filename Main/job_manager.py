@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Background job manager for the GUI
+Generate, explain and scan run as jobs, at most `workers` of them at a time.
+Every job has an id, a status and timings (time queued, time running). Worker
+threads never touch Tk: they put events on a single queue that the GUI drains
+once per frame with poll(), which then calls the job's callbacks on the Tk thread.
+Cancellation and timeouts (queued jobs included) are cooperative. The job is
+finished right away (its later results are dropped) and job.cancelled tells the
+function to stop early. Its slot is freed at once too: every job gets its own
+thread, so one stuck in a hung model call doesn't hold back the queue. Those
+abandoned threads still count against a hard cap of workers + max_stuck live
+threads; past it new jobs wait in the queue until a stuck call returns.
+Work that already runs on its own threads (a streaming shell command) is
+tracked with watch() instead, polled once per frame without taking a slot.
+"""
+
+import time
+import queue
+import itertools
+import threading
+import traceback
+from collections import deque
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_STUCK = 4  # cancelled / timed out jobs whose thread hasn't returned yet
+KEEP_FINISHED = 100  # finished jobs kept for the jobs panel
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMED_OUT = "timeout"
+FINISHED_STATES = (DONE, FAILED, CANCELLED, TIMED_OUT)
+
+
+class Job:
+    def __init__(self, manager, job_id, kind, label, timeout, on_event, on_done, on_error):
+        self.id = job_id
+        self.kind = kind
+        self.label = label
+        self.timeout = timeout
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.on_event = on_event
+        self.on_done = on_done
+        self.on_error = on_error
+        self._manager = manager
+        self._cancel = threading.Event()
+        self._check = None  # (check, args) of a watch()ed job
+
+    @property
+    def cancelled(self):
+        """True once the job was cancelled or timed out; long jobs should check it and return."""
+        return self._cancel.is_set()
+
+    def post(self, event, data=None):
+        """From the job function: deliver on_event(job, event, data) on the Tk thread."""
+        self._manager._events.put((self, event, data))
+
+    @property
+    def wait_time(self):
+        return ((self.started or self.finished or time.time()) - self.submitted)
+
+    @property
+    def run_time(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+
+class JobManager:
+    def __init__(self, workers=DEFAULT_WORKERS, max_stuck=DEFAULT_MAX_STUCK):
+        self.workers = workers
+        self.max_threads = workers + max_stuck
+        self._events = queue.Queue()
+        self._ids = itertools.count(1)
+        self._active = {}
+        self._queued = deque()  # (job, func, args) waiting for a slot
+        self._running = 0  # submitted jobs running, not counting the ones already cancelled / timed out
+        self._threads = 0  # live job threads, stuck ones included
+        self._finished = deque(maxlen=KEEP_FINISHED)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    # --- any thread ---
+    def submit(self, kind, func, *args, label=None, timeout=None, on_event=None, on_done=None, on_error=None):
+        """Run func(job, *args) on a worker thread and return the Job.
+
+        Callbacks run on the thread calling poll(): on_event(job, event, data) for
+        job.post() events, on_done(job, result), on_error(job, message) for failures,
+        cancellation and timeouts. The timeout counts from submission while the job
+        is queued and from its start once it runs."""
+        job = Job(self, next(self._ids), kind, label or kind, timeout, on_event, on_done, on_error)
+        with self._lock:
+            self._active[job.id] = job
+            self._queued.append((job, func, args))
+            self._start_queued()
+        return job
+
+    def watch(self, kind, check, *args, label=None, timeout=None, on_event=None, on_done=None, on_error=None):
+        """Track work running on its own threads (e.g. a CommandRun) without taking a worker.
+
+        check(job, *args) runs on the polling thread at every poll() and returns True once
+        the work is over; like a job function it can job.post() events. Callbacks as in submit()."""
+        job = Job(self, next(self._ids), kind, label or kind, timeout, on_event, on_done, on_error)
+        job._check = (check, args)
+        job.status = RUNNING
+        job.started = job.submitted
+        with self._lock:
+            self._active[job.id] = job
+        return job
+
+    def call_soon(self, func, *args):
+        """Run func(*args) on the polling (Tk) thread at the next poll()."""
+        self._events.put((None, func, args))
+
+    def cancel(self, job_id):
+        self._events.put((None, self._finish_cancelled, (job_id, CANCELLED, "Cancelled by user")))
+
+    # --- worker threads ---
+    def _start_queued(self):
+        # with self._lock held
+        while (self._queued and self._running < self.workers and self._threads < self.max_threads
+               and not self._closed):
+            job, func, args = self._queued.popleft()
+            job.status = RUNNING
+            job.started = time.time()
+            self._running += 1
+            self._threads += 1
+            threading.Thread(target=self._run, args=(job, func, args), name=f"gui-job-{job.id}", daemon=True).start()
+
+    def _run(self, job, func, args):
+        try:
+            result = func(job, *args)
+        except Exception as e:
+            self._events.put((job, FAILED, f"{type(e).__name__}: {e}"))
+        else:
+            self._events.put((job, DONE, result))
+        finally:
+            with self._lock:
+                self._threads -= 1
+                self._start_queued()  # a stuck thread returning can make room under the cap
+
+    # --- polling (Tk) thread ---
+    def poll(self, max_events=1000):
+        """Check watched work, deliver queued events and enforce timeouts. Returns the number of events handled."""
+        for job in self.active():
+            if job._check is not None:
+                self._check_watched(job)
+        handled = 0
+        while handled < max_events:
+            try:
+                job, event, data = self._events.get_nowait()
+            except queue.Empty:
+                break
+            handled += 1
+            if job is None:
+                self._call(event, *data)
+            elif event in (DONE, FAILED):
+                self._finish(job, event, data)
+            elif job.status not in FINISHED_STATES and job.on_event is not None:
+                self._call(job.on_event, job, event, data)
+        self._check_timeouts()
+        return handled
+
+    def _check_watched(self, job):
+        check, args = job._check
+        try:
+            finished = check(job, *args)
+        except Exception as e:
+            self._events.put((job, FAILED, f"{type(e).__name__}: {e}"))
+            return
+        if finished:
+            self._events.put((job, DONE, None))  # after the events check() just posted
+
+    def _call(self, func, *args):
+        try:
+            func(*args)
+        except Exception:
+            traceback.print_exc()  # a broken callback must not stop the poll loop
+
+    def _finish(self, job, status, data):
+        with self._lock:
+            if job.status in FINISHED_STATES:
+                return False  # already cancelled / timed out: drop the late result
+            if job.status == QUEUED:
+                self._queued = deque(entry for entry in self._queued if entry[0] is not job)
+            elif job._check is None:
+                self._running -= 1  # its thread, if still stuck, counts against max_threads until it returns
+            job.status = status
+            job.finished = time.time()
+            self._active.pop(job.id, None)
+            self._finished.append(job)
+            self._start_queued()
+        if status == DONE:
+            job.result = data
+            if job.on_done is not None:
+                self._call(job.on_done, job, data)
+        else:
+            job.error = data
+            job._cancel.set()
+            if job.on_error is not None:
+                self._call(job.on_error, job, data)
+        return True
+
+    def _finish_cancelled(self, job_id, status, message):
+        job = self._active.get(job_id)
+        if job is not None:
+            self._finish(job, status, message)
+
+    def _check_timeouts(self):
+        now = time.time()
+        for job in self.active():
+            if not job.timeout:
+                continue
+            if job.started is None and now - job.submitted > job.timeout:
+                self._finish(job, TIMED_OUT, f"Timed out after {job.timeout:g}s in the queue")
+            elif job.started is not None and now - job.started > job.timeout:
+                self._finish(job, TIMED_OUT, f"Timed out after {job.timeout:g}s")
+
+    def active(self, kind=None):
+        with self._lock:
+            return [job for job in self._active.values() if kind is None or job.kind == kind]
+
+    def jobs(self):
+        """Active jobs and the most recent finished ones, newest first."""
+        with self._lock:
+            return sorted(list(self._active.values()) + list(self._finished), key=lambda job: -job.id)
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            self._queued.clear()
+        for job in self.active():
+            job._cancel.set()
@@ -1,31 +1,74 @@
 #!/usr/bin/env python3
-import customtkinter as ctk
-from customtkinter import filedialog
-import subprocess
+import time
+_STARTUP_T0 = time.perf_counter()
+
+import importlib
+import importlib.util
 import sys
 import os
 import datetime
 import threading
-from collections import deque # (جديد) عشان سجل الأوامر
+import shutil
+import webbrowser
+from collections import OrderedDict
+
+# --- Startup timing: set AI_SHELL_STARTUP_REPORT=1 (or pass --startup-report) to print it ---
+STARTUP_REPORT = os.environ.get("AI_SHELL_STARTUP_REPORT") == "1" or "--startup-report" in sys.argv
+STARTUP_TIMINGS = [] # (label, seconds)
+
+def timed_import(module_name, label=None):
+    started = time.perf_counter()
+    module = importlib.import_module(module_name)
+    STARTUP_TIMINGS.append((label or module_name, time.perf_counter() - started))
+    return module
+
+def print_startup_report():
+    print("Startup timings:")
+    for label, seconds in STARTUP_TIMINGS:
+        print(f"  {label:<32} {seconds * 1000:8.1f} ms")
+
+ctk = timed_import("customtkinter")
+from customtkinter import filedialog
+from tkinter import ttk
 
-# --- (جديد) إضافة مكتبة pandas عشان نقدر نقرا الملف بسرعة ---
-try:
-    import pandas as pd
-    PANDAS_AVAILABLE = True
-except ImportError:
-    PANDAS_AVAILABLE = False
+# --- (جديد) pandas بيتحمل أول ما نافذة الـ EDA تفتح، مش وقت التشغيل ---
+PANDAS_AVAILABLE = importlib.util.find_spec("pandas") is not None
+if not PANDAS_AVAILABLE:
     print("Warning: 'pandas' library not found. Data Analysis feature will be disabled.")
     print("Please install it: pip install pandas")
 
+_pandas = None
+
+def get_pandas():
+    global _pandas
+    if _pandas is None:
+        _pandas = timed_import("pandas", "pandas (lazy)")
+    return _pandas
+
 # --- Import the function from your ai_shell_helper.py file ---
+# (the model SDK itself is only imported on the first generate)
 try:
     # (جديد) تعديل بسيط في ملف الهيلبر (هييجي في الملف الجاي)
-    from ai_shell_helper import get_shell_command
+    _helper = timed_import("ai_shell_helper")
+    get_shell_command = _helper.get_shell_command
+    stream_shell_command = _helper.stream_shell_command
+    get_cache_stats = _helper.get_cache_stats
 except ImportError:
     print("Error: 'ai_shell_helper.py' not found.")
     print("Please make sure all .py files are in the same folder.")
     sys.exit(1)
 
+from report_cache import ReportCache, report_config
+from csv_tools import sniff_csv, estimate_rows, cached_row_count, RowIndex
+from columnar_cache import SIDECAR_AVAILABLE, sidecar_shape
+from analysis_pool import AnalysisPool, PoolFull
+from command_history import CommandHistory
+from similar_queries import SIMILARITY_AVAILABLE, MAX_QUERIES, SimilarQueryIndex
+from command_runner import CommandRun, STDERR
+from job_manager import JobManager, DONE
+from output_log import OutputLog, SPILL_ENABLED
+from app_paths import app_path
+
 # --- Find the path to EDA_final.py ---
 EDA_SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'EDA_final.py')
 
@@ -48,45 +91,396 @@ EXPLAIN_SYSTEM_PROMPT = (
     "  - `| wc -l`: Pipes the results to 'word count' to count the lines."
 )
 
+# How often streamed model text is painted into the UI
+STREAM_FLUSH_MS = 50
+AI_JOB_TIMEOUT = 120 # seconds for one generate / explain / scan request
+
+# History window: rows drawn at once, pause in typing before searching
+HISTORY_VISIBLE_ROWS = 18
+HISTORY_SEARCH_DELAY_MS = 120
+
+# CSV preview: rows drawn at once, rows read per page, pages kept in memory
+PREVIEW_VISIBLE_ROWS = 14
+PREVIEW_PAGE_ROWS = 256
+PREVIEW_MAX_PAGES = 8
+
+
+class VirtualTable(ctk.CTkFrame):
+    """A Treeview that only ever holds visible_rows items, scrolled over total_rows rows.
+
+    Subclasses set total_rows and implement row_values(row), which returns the
+    values of one row (or None while they are not available yet); render()
+    repaints the visible window after a scroll or when new rows arrive.
+    """
+
+    def __init__(self, master, app, visible_rows, style_name="Virtual"):
+        super().__init__(master, fg_color=app.BOX_BG)
+        self.app = app
+        self.visible_rows = visible_rows
+        self.total_rows = 0
+        self.first_row = 0
+        self._items = []
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        style = ttk.Style(self)
+        style.configure(f"{style_name}.Treeview", background=app.BOX_BG, fieldbackground=app.BOX_BG,
+                        foreground=app.TEXT_COLOR_NORMAL, rowheight=22, borderwidth=0)
+        style.configure(f"{style_name}.Treeview.Heading", background=app.COLOR_GRAY, foreground=app.TEXT_COLOR_NORMAL)
+
+        self.tree = ttk.Treeview(self, show="headings", height=visible_rows, selectmode="none",
+                                 style=f"{style_name}.Treeview")
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.v_scroll = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.v_scroll.grid(row=0, column=1, sticky="ns")
+        self.h_scroll = ctk.CTkScrollbar(self, orientation="horizontal", command=self.tree.xview)
+        self.h_scroll.grid(row=1, column=0, sticky="ew")
+        self.tree.configure(xscrollcommand=self.h_scroll.set)
+
+        self.status_label = ctk.CTkLabel(self, text="", font=app.FONT_STATUS, text_color=app.TEXT_COLOR_DIM)
+        self.status_label.grid(row=2, column=0, columnspan=2, padx=8, sticky="w")
+
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(sequence, self._on_wheel)
+
+    def set_columns(self, columns):
+        """columns: [(id, heading, width, anchor), ...]. Recreates the visible items."""
+        self.tree.delete(*self.tree.get_children())
+        self.tree.configure(columns=[column for column, _, _, _ in columns])
+        for column, heading, width, anchor in columns:
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, minwidth=min(width, 50), stretch=False, anchor=anchor)
+        self._items = [self.tree.insert("", "end", values=()) for _ in range(self.visible_rows)]
+        self.render()
+
+    def row_values(self, row):
+        raise NotImplementedError
+
+    def placeholder(self, row):
+        return ("...",)
+
+    def row_at(self, y):
+        """Row number under the pixel y of the tree, or None."""
+        item = self.tree.identify_row(y)
+        if item not in self._items:
+            return None
+        row = self.first_row + self._items.index(item)
+        return row if row < self.total_rows else None
+
+    def render(self):
+        for i, item in enumerate(self._items):
+            row = self.first_row + i
+            values = ()
+            if row < self.total_rows:
+                values = self.row_values(row)
+                if values is None:
+                    values = self.placeholder(row)
+            self.tree.item(item, values=values)
+
+        if self.total_rows:
+            self.v_scroll.set(self.first_row / self.total_rows,
+                              min(1.0, (self.first_row + self.visible_rows) / self.total_rows))
+        else:
+            self.v_scroll.set(0.0, 1.0)
+
+    def scroll_to(self, first_row):
+        first_row = max(0, min(first_row, self.total_rows - self.visible_rows))
+        if first_row != self.first_row:
+            self.first_row = first_row
+            self.render()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(value) * self.total_rows))
+        elif action == "scroll":
+            step = self.visible_rows if unit == "pages" else 1
+            self.scroll_to(self.first_row + int(value) * step)
+
+    def _on_wheel(self, event):
+        direction = -1 if event.num == 4 or event.delta > 0 else 1
+        self.scroll_to(self.first_row + 3 * direction)
+        return "break"
+
+
+class PreviewPane(VirtualTable):
+    """Virtualized CSV preview.
+
+    The table only ever holds PREVIEW_VISIBLE_ROWS rows. Their values are read on
+    demand, a page at a time, through a csv_tools.RowIndex built in the background,
+    and at most PREVIEW_MAX_PAGES pages are kept, so memory stays constant however
+    big the file is and nothing is parsed beyond the rows being looked at.
+    """
+
+    def __init__(self, master, app, visible_rows=PREVIEW_VISIBLE_ROWS):
+        super().__init__(master, app, visible_rows, style_name="Preview")
+        self._generation = 0
+        self._pages = OrderedDict()  # page number -> rows, least recently drawn first
+        self._wanted = set()
+        self._missing = set()
+        self._wake = None
+
+    def load(self, file_path, dialect, on_indexed=None):
+        """Show file_path. on_indexed(file_path, rows) is called once the whole file is indexed."""
+        self._stop()
+        generation = self._generation
+        self._wake = threading.Event()
+        self._pages.clear()
+        self._wanted = set()
+        self.total_rows = 0
+        self.first_row = 0
+        self.status_label.configure(text="Indexing rows...")
+        threading.Thread(target=self._index_thread, args=(generation, self._wake, file_path, dialect, on_indexed),
+                         daemon=True).start()
+
+    def destroy(self):
+        self._stop()
+        super().destroy()
+
+    def _stop(self):
+        # a new generation makes the threads of the previous file exit
+        self._generation += 1
+        if self._wake is not None:
+            self._wake.set()
+
+    # --- background threads ---
+    def _index_thread(self, generation, wake, file_path, dialect, on_indexed):
+        try:
+            index = RowIndex(file_path, dialect)
+        except Exception as e:
+            self.after(0, self._show_error, generation, str(e))
+            return
+        self.after(0, self._set_header, generation, index.header)
+        threading.Thread(target=self._fetch_thread, args=(generation, wake, index), daemon=True).start()
+        try:
+            finished = index.build(on_progress=lambda rows: self.after(0, self._on_index_progress, generation, rows, False),
+                                   should_stop=lambda: generation != self._generation)
+        except Exception as e:
+            self.after(0, self._show_error, generation, str(e))
+            return
+        if finished:
+            self.after(0, self._on_index_progress, generation, index.rows, True)
+            if on_indexed is not None:
+                self.after(0, on_indexed, file_path, index.rows)
+
+    def _fetch_thread(self, generation, wake, index):
+        # reads the pages the table is waiting for; only pages whose rows are all indexed
+        while True:
+            wake.wait()
+            wake.clear()
+            if generation != self._generation:
+                return
+            for page in sorted(self._wanted):
+                if page in self._pages:
+                    continue
+                end = (page + 1) * PREVIEW_PAGE_ROWS
+                if end > index.rows and not index.complete:
+                    continue
+                try:
+                    rows = index.read_rows(page * PREVIEW_PAGE_ROWS, PREVIEW_PAGE_ROWS)
+                except Exception as e:
+                    self.after(0, self._show_error, generation, str(e))
+                    return
+                self.after(0, self._store_page, generation, page, rows)
+
+    # --- Tk thread ---
+    def _set_header(self, generation, header):
+        if generation != self._generation:
+            return
+        self.set_columns([("row", "#", 70, "e")] + [(f"c{i}", name, 120, "w") for i, name in enumerate(header)])
+
+    def _show_error(self, generation, error):
+        if generation == self._generation:
+            self.status_label.configure(text=f"Preview unavailable: {error}", text_color=self.app.COLOR_RED)
+
+    def _on_index_progress(self, generation, rows, complete):
+        if generation != self._generation:
+            return
+        self.total_rows = rows
+        text = f"{rows:,} rows" if complete else f"Indexing rows... {rows:,} so far"
+        self.status_label.configure(text=text)
+        self.render()
+
+    def _store_page(self, generation, page, rows):
+        if generation != self._generation:
+            return
+        self._pages[page] = rows
+        while len(self._pages) > PREVIEW_MAX_PAGES:
+            self._pages.popitem(last=False)
+        self.render()
+
+    def row_values(self, row):
+        page, position = divmod(row, PREVIEW_PAGE_ROWS)
+        rows = self._pages.get(page)
+        if rows is None or position >= len(rows):
+            self._missing.add(page)
+            return None
+        self._pages.move_to_end(page)
+        return (f"{row + 1:,}", *rows[position])
+
+    def placeholder(self, row):
+        return (f"{row + 1:,}", "...")
+
+    def render(self):
+        self._missing = set()
+        super().render()
+        # prefetch the page after the visible one so slow scrolling never waits
+        next_page = (self.first_row + self.visible_rows) // PREVIEW_PAGE_ROWS + 1
+        if next_page * PREVIEW_PAGE_ROWS < self.total_rows and next_page not in self._pages:
+            self._missing.add(next_page)
+        self._wanted = self._missing
+        if self._missing and self._wake is not None:
+            self._wake.set()
+
+
+# --- (جديد) نافذة الـ Jobs ---
+class JobsWindow(ctk.CTkToplevel):
+    """Status and latency of the App's background jobs (see job_manager.py), refreshed live."""
+
+    REFRESH_MS = 500
+
+    def __init__(self, master_app):
+        super().__init__(master_app)
+        self.master_app = master_app
+
+        self.configure(fg_color=master_app.APP_BG)
+        self.title("Background Jobs")
+        self.geometry("760x360")
+        self.transient(master_app)
+        self.resizable(True, True)
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        columns = ("id", "kind", "status", "waited", "ran", "label")
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", selectmode="browse")
+        for column, width in zip(columns, (50, 80, 80, 70, 70, 380)):
+            self.tree.heading(column, text=column.capitalize())
+            self.tree.column(column, width=width, stretch=column == "label")
+        self.tree.grid(row=0, column=0, padx=10, pady=(10, 5), sticky="nsew")
+
+        self.cancel_button = ctk.CTkButton(
+            self,
+            text="⏹ Cancel selected job",
+            command=self.cancel_selected,
+            font=master_app.FONT_BUTTON_SIDE,
+            fg_color=master_app.COLOR_GRAY,
+            hover_color=master_app.COLOR_GRAY_HOVER
+        )
+        self.cancel_button.grid(row=1, column=0, padx=10, pady=(5, 10), sticky="e")
+        self.refresh()
+
+    def refresh(self):
+        if not self.winfo_exists():
+            return
+        jobs = self.master_app.jobs.jobs()
+        shown = set(self.tree.get_children())
+        for position, job in enumerate(jobs):
+            iid = str(job.id)
+            values = (job.id, job.kind, job.status, f"{job.wait_time:.2f}s", f"{job.run_time:.2f}s", job.label)
+            if iid in shown:
+                self.tree.item(iid, values=values)
+                self.tree.move(iid, "", position)
+            else:
+                self.tree.insert("", position, iid=iid, values=values)
+        for iid in shown - {str(job.id) for job in jobs}:
+            self.tree.delete(iid)
+        self.after(self.REFRESH_MS, self.refresh)
+
+    def cancel_selected(self):
+        for iid in self.tree.selection():
+            self.master_app.jobs.cancel(int(iid))
+
+
 # --- (جديد) نافذة الـ History ---
+class HistoryTable(VirtualTable):
+    """Rows of a command_history search, read from SQLite only for the visible window."""
+
+    def __init__(self, master, app, history, visible_rows=HISTORY_VISIBLE_ROWS):
+        super().__init__(master, app, visible_rows, style_name="History")
+        self.history = history
+        self.ids = []
+        self._visible = {}
+        self.set_columns([("when", "When", 130, "w"), ("command", "Command", 420, "w"), ("query", "Query", 260, "w"),
+                          ("exit", "Exit", 50, "e"), ("duration", "Duration", 80, "e")])
+
+    def show(self, ids):
+        self.ids = ids
+        self.total_rows = len(ids)
+        self.first_row = 0
+        self.render()
+
+    def render(self):
+        # one query for the whole visible window
+        self._visible = self.history.rows(self.ids[self.first_row:self.first_row + self.visible_rows])
+        super().render()
+
+    def entry(self, row):
+        return self._visible.get(self.ids[row])
+
+    def row_values(self, row):
+        entry = self.entry(row)
+        if entry is None:
+            return None
+        when = datetime.datetime.fromtimestamp(entry["last_used"]).strftime("%Y-%m-%d %H:%M")
+        exit_code = "" if entry["exit_code"] is None else entry["exit_code"]
+        duration = "" if entry["duration"] is None else f"{entry['duration']:.2f}s"
+        return (when, entry["command"].replace("\n", " "), (entry["query"] or "").replace("\n", " "), exit_code, duration)
+
+
 class HistoryWindow(ctk.CTkToplevel):
     def __init__(self, master_app, command_history):
         super().__init__(master_app)
         self.master_app = master_app
+        self.command_history = command_history
+        self._search_after = None
         
         self.configure(fg_color=master_app.APP_BG)
         self.title("Command History")
-        self.geometry("600x400")
+        self.geometry("980x520")
         self.transient(master_app)
         self.resizable(True, True)
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
 
-        if not command_history:
-            label = ctk.CTkLabel(self, text="History is empty.", font=master_app.FONT_TEXT)
-            label.pack(padx=20, pady=20, expand=True)
-            return
+        self.search_entry = ctk.CTkEntry(self, placeholder_text="🔍 Search commands and queries...", font=master_app.FONT_TEXT)
+        self.search_entry.grid(row=0, column=0, padx=10, pady=(10, 5), sticky="ew")
+        self.search_entry.bind("<KeyRelease>", self._schedule_search)
+        self.search_entry.bind("<Return>", lambda event: self.select_row(self.table.first_row))
+
+        self.table = HistoryTable(self, master_app, command_history)
+        self.table.grid(row=1, column=0, padx=10, pady=(5, 10), sticky="nsew")
+        self.table.tree.bind("<Double-1>", self._on_double_click)
+        self.search()
+        self.search_entry.focus()
+
+    def _schedule_search(self, event=None):
+        # wait for a pause in typing, so each keystroke doesn't run its own query
+        if self._search_after is not None:
+            self.after_cancel(self._search_after)
+        self._search_after = self.after(HISTORY_SEARCH_DELAY_MS, self.search)
+
+    def search(self):
+        self._search_after = None
+        text = self.search_entry.get().strip()
+        ids = self.command_history.search(text)
+        self.table.show(ids)
+        total = len(self.command_history) if text else len(ids)
+        if not total:
+            self.table.status_label.configure(text="History is empty.")
+        else:
+            self.table.status_label.configure(text=f"{len(ids):,} of {total:,} commands  |  double-click to use one")
 
-        scroll_frame = ctk.CTkScrollableFrame(self, fg_color="transparent")
-        scroll_frame.pack(fill="both", expand=True, padx=10, pady=10)
+    def _on_double_click(self, event):
+        row = self.table.row_at(event.y)
+        if row is not None:
+            self.select_row(row)
 
-        # نعرضهم من الأحدث للأقدم
-        for command in reversed(command_history):
-            self.add_history_entry(scroll_frame, command)
-            
-    def add_history_entry(self, frame, command):
-        btn_text = command.replace('\n', ' ').strip()
-        if len(btn_text) > 80:
-            btn_text = btn_text[:80] + "..."
-            
-        btn = ctk.CTkButton(
-            frame,
-            text=btn_text,
-            font=self.master_app.FONT_MONO,
-            anchor="w",
-            fg_color=self.master_app.COLOR_GRAY,
-            hover_color=self.master_app.COLOR_GRAY_HOVER,
-            command=lambda c=command: self.select_command(c)
-        )
-        btn.pack(fill="x", pady=4, padx=5)
+    def select_row(self, row):
+        if row >= self.table.total_rows:
+            return
+        entry = self.table.entry(row)
+        if entry is not None:
+            self.select_command(entry["command"])
 
     def select_command(self, command):
         self.master_app.set_command_from_history(command)
@@ -99,16 +493,18 @@ class EdaWindow(ctk.CTkToplevel):
         
         self.master_app = master_app 
         self.selected_file_path = None
+        self.rows_exact = False
         
         self.configure(fg_color=master_app.APP_BG)
         self.title("Data Analysis")
-        self.geometry("500x300")
+        self.geometry("900x620")
         self.transient(master_app) 
-        self.resizable(False, False)
+        self.resizable(True, True)
         
         self.grid_columnconfigure(0, weight=1)
-        self.grid_rowconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=0)
         self.grid_rowconfigure(1, weight=1)
+        self.grid_rowconfigure(2, weight=0)
         
         main_frame = ctk.CTkFrame(self, fg_color=master_app.NAV_RAIL_BG) 
         main_frame.grid(row=0, column=0, padx=20, pady=20, sticky="nsew")
@@ -140,6 +536,10 @@ class EdaWindow(ctk.CTkToplevel):
             text_color=master_app.TEXT_COLOR_NORMAL 
         )
         self.info_label.grid(row=2, column=0, columnspan=2, padx=10, pady=5, sticky="w")
+
+        # (جديد) معاينة الداتا: بتقرا الصفوف اللي ظاهرة بس
+        self.preview = PreviewPane(self, master_app)
+        self.preview.grid(row=1, column=0, padx=20, pady=(0, 10), sticky="nsew")
         
         self.generate_button = ctk.CTkButton(
             self,
@@ -151,7 +551,7 @@ class EdaWindow(ctk.CTkToplevel):
             fg_color=master_app.COLOR_PRIMARY, 
             hover_color=master_app.COLOR_PRIMARY_HOVER 
         )
-        self.generate_button.grid(row=1, column=0, padx=20, pady=15, sticky="ew")
+        self.generate_button.grid(row=2, column=0, padx=20, pady=15, sticky="ew")
 
     def browse_file(self):
         file_path = filedialog.askopenfilename(
@@ -165,32 +565,88 @@ class EdaWindow(ctk.CTkToplevel):
         self.file_label.configure(text=f"Selected: {os.path.basename(file_path)}", text_color=self.master_app.TEXT_COLOR_DIM)
         self.master_app.log_to_output(f"File selected for EDA: {os.path.basename(file_path)}")
         
+        self.rows_exact = False
         self.info_label.configure(text="Reading file info...", text_color=self.master_app.TEXT_COLOR_DIM)
         self.generate_button.configure(state="disabled")
-        threading.Thread(target=self._get_file_info, args=(file_path,), daemon=True).start()
+        self.master_app.jobs.submit("file info", self._get_file_info, file_path, label=os.path.basename(file_path),
+                                    on_event=self._on_file_info_event,
+                                    on_error=lambda job, error: self._update_file_info(file_path, -1, -1, error))
+
+    def _get_file_info(self, job, file_path):
+        dialect = sniff_csv(file_path)
+        job.post("preview", (file_path, dialect))
+        # a columnar copy from an earlier analysis knows its exact shape already
+        shape = sidecar_shape(file_path)
+        if shape is not None:
+            job.post("info", (file_path, shape[0], shape[1], None))
+            return
+        cols = dialect["columns"]
+        rows = cached_row_count(file_path, dialect)
+        if rows is not None:
+            job.post("info", (file_path, rows, cols, None))
+            return
+        # instant estimate from the sniffed prefix; the preview's row index scan
+        # (quote aware, like count_rows) then gives the exact count
+        rows, exact = estimate_rows(file_path, dialect)
+        job.post("info", (file_path, rows, cols, None, not exact))
 
-    def _get_file_info(self, file_path):
-        try:
-            df = pd.read_csv(file_path, nrows=2) 
-            cols = len(df.columns)
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                rows = sum(1 for line in f) - 1 
+    def _on_file_info_event(self, job, event, data):
+        if not self.winfo_exists():
+            return
+        if event == "preview":
+            if data[0] == self.selected_file_path:
+                self.preview.load(*data, on_indexed=self._on_preview_indexed)
+        else:
+            self._update_file_info(*data)
 
-            self.after(0, self._update_file_info, rows, cols, None)
-        except Exception as e:
-            self.after(0, self._update_file_info, -1, -1, str(e))
+    def _on_preview_indexed(self, file_path, rows):
+        if file_path == self.selected_file_path and not self.rows_exact:
+            self._update_file_info(file_path, rows, len(self.preview.tree["columns"]) - 1, None)
 
-    def _update_file_info(self, rows, cols, error):
+    def _update_file_info(self, file_path, rows, cols, error, estimated=False):
+        if not self.winfo_exists() or file_path != self.selected_file_path:
+            # window closed, or another file was picked while this one was being counted
+            return
+        if estimated and self.rows_exact:
+            return  # the row index finished before the estimate got here
         if error:
             self.info_label.configure(text=f"Error: Could not read file.", text_color=self.master_app.COLOR_RED)
             self.master_app.log_to_output(f"Error reading CSV info: {error}")
             self.generate_button.configure(state="disabled")
+        elif estimated:
+            self.info_label.configure(text=f"Rows: ~{rows:,} (counting...)  |  Columns: {cols}", text_color=self.master_app.TEXT_COLOR_DIM)
+            self.generate_button.configure(state="normal")
         else:
-            self.info_label.configure(text=f"Rows: {rows}  |  Columns: {cols}", text_color=self.master_app.TEXT_COLOR_NORMAL)
+            self.rows_exact = True
+            self.info_label.configure(text=f"Rows: {rows:,}  |  Columns: {cols}", text_color=self.master_app.TEXT_COLOR_NORMAL)
             self.master_app.log_to_output(f"File Info: {rows} rows, {cols} columns.")
             self.generate_button.configure(state="normal") 
 
+    def _open_cached_report(self):
+        """Reuse a cached report for this exact file content, without starting EDA_final.py."""
+        try:
+            # fast_only: never hash a big file on the Tk thread, EDA_final.py does that
+            cached = ReportCache().lookup(self.selected_file_path, report_config("full"), fast_only=True)
+        except OSError:
+            return False
+        if not cached:
+            return False
+
+        base_name = os.path.splitext(os.path.basename(self.selected_file_path))[0]
+        output_file = os.path.join(os.getcwd(), f"{base_name}_eda_report.html")
+        try:
+            shutil.copyfile(cached["report"], output_file)
+        except OSError:
+            output_file = cached["report"]
+        summary = cached["summary"]
+        self.master_app.log_to_output(f"Cached EDA report found for {os.path.basename(self.selected_file_path)} (same content, skipped re-analysis).")
+        self.master_app.log_to_output(
+            f"Rows: {summary.get('rows', 'N/A')}  |  Columns: {summary.get('columns', 'N/A')}  |  "
+            f"Missing values: {summary.get('missing_total', 'N/A')}\nReport: {output_file}"
+        )
+        webbrowser.open(f"file://{os.path.abspath(output_file)}")
+        return True
+
     def run_eda_script(self):
         if not self.selected_file_path:
             return
@@ -199,17 +655,15 @@ class EdaWindow(ctk.CTkToplevel):
             self.master_app.log_to_output(f"Error: 'EDA_final.py' not found at {EDA_SCRIPT_PATH}")
             return
 
-        self.master_app.log_to_output(f"Starting data analysis on {os.path.basename(self.selected_file_path)}...")
-        self.master_app.log_to_output("A new terminal window will open to run the analysis.")
-        
+        if self._open_cached_report():
+            self.destroy()
+            return
+
         try:
-            if sys.platform == "win32":
-                subprocess.Popen([sys.executable, EDA_SCRIPT_PATH, self.selected_file_path], creationflags=subprocess.CREATE_NEW_CONSOLE)
-            else:
-                subprocess.Popen([sys.executable, EDA_SCRIPT_PATH, self.selected_file_path])
-            self.master_app.log_to_output("EDA script launched. Check the new window/console for progress.")
-        except Exception as e:
-            self.master_app.log_to_output(f"Failed to launch data analysis: {str(e)}")
+            job = self.master_app.get_analysis_pool().submit(self.selected_file_path, columnar=SIDECAR_AVAILABLE)
+            self.master_app.log_to_output(f"Data analysis job #{job.id} queued for {os.path.basename(self.selected_file_path)}.")
+        except PoolFull as e:
+            self.master_app.log_to_output(f"Failed to start data analysis: {e}", "error_tag")
             
         self.destroy() 
 
@@ -260,8 +714,23 @@ class App(ctk.CTk):
         # --- State ---
         self.sidebar_expanded = False
         self.eda_window = None 
+        self.analysis_pool = None
+        self.command_run = None
+        self.jobs = JobManager() # (جديد) كل الشغل اللي في الخلفية بيعدي من هنا
+        self.jobs_window = None
+        self.generate_job = None
+        self._explanations = [] # explain jobs in the order asked: {"job", "chunks", "done", "error"}
+        # (جديد) اللوج بقى ring buffer بيترسم مرة كل frame، والنسخة الكاملة في ملف
+        self.output_log = OutputLog(spill_path=app_path("logs", "output.log") if SPILL_ENABLED else None)
+        self._output_flush_scheduled = False
+        self._output_chars = 0 # characters currently in output_box
         self.history_window = None # (جديد)
-        self.command_history = deque(maxlen=20) # (جديد) سجل لآخر 20 أمر
+        self.command_history = CommandHistory() # (جديد) سجل الأوامر محفوظ في SQLite
+        self._generate_query = None
+        # (جديد) أسئلة شبه اللي اتسألت قبل كده بتاخد الأمر القديم من غير ما نكلم الـ AI
+        self.similar_queries = None # built from the history in a background job
+        self._similar_backlog = [] # (query, command) generated while it is being built
+        self._reused_query = None # Generate again with this query asks the AI anyway
 
         # --- Window Setup ---
         self.title("AI Shell Helper")
@@ -284,7 +753,8 @@ class App(ctk.CTk):
         self.nav_rail.grid_rowconfigure(1, weight=0) 
         self.nav_rail.grid_rowconfigure(2, weight=0) 
         self.nav_rail.grid_rowconfigure(3, weight=0) # (جديد) زرار الـ History
-        self.nav_rail.grid_rowconfigure(4, weight=1) # Spacer
+        self.nav_rail.grid_rowconfigure(4, weight=0) # (جديد) زرار الـ Jobs
+        self.nav_rail.grid_rowconfigure(5, weight=1) # Spacer
 
         self.sidebar_toggle_button = ctk.CTkButton(
             self.nav_rail,
@@ -342,6 +812,20 @@ class App(ctk.CTk):
         )
         self.history_button.grid(row=3, column=0, padx=10, pady=10, sticky="w")
 
+        # (جديد) زرار الـ Jobs
+        self.jobs_button = ctk.CTkButton(
+            self.nav_rail,
+            text="⏱",
+            command=self.open_jobs_window,
+            font=self.FONT_BUTTON_SIDE,
+            height=40,
+            width=self.NAV_RAIL_WIDTH_MIN - 20,
+            anchor="center", 
+            fg_color=self.COLOR_GRAY,
+            hover_color=self.COLOR_GRAY_HOVER
+        )
+        self.jobs_button.grid(row=4, column=0, padx=10, pady=10, sticky="w")
+
         # --- 2. Main Content Area (Right Side) ---
         main_content = ctk.CTkFrame(self, fg_color="transparent")
         main_content.grid(row=0, column=1, sticky="nsew", padx=20, pady=15)
@@ -493,6 +977,10 @@ class App(ctk.CTk):
             self.log_to_output("Warning: 'pandas' library not found.")
             self.log_to_output("Data Analysis feature is disabled. Please run: pip install pandas")
 
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.after_idle(self._on_first_idle)
+        self.after(STREAM_FLUSH_MS, self._poll_jobs)
+
     # --- Sidebar Toggle Function ---
     def toggle_sidebar(self):
         if self.sidebar_expanded:
@@ -501,6 +989,7 @@ class App(ctk.CTk):
             self.data_button.configure(text="📊", anchor="center", width=self.NAV_RAIL_WIDTH_MIN - 20)
             self.security_button.configure(text="🛡️", anchor="center", width=self.NAV_RAIL_WIDTH_MIN - 20)
             self.history_button.configure(text="🕒", anchor="center", width=self.NAV_RAIL_WIDTH_MIN - 20)
+            self.jobs_button.configure(text="⏱", anchor="center", width=self.NAV_RAIL_WIDTH_MIN - 20)
             self.sidebar_expanded = False
         else:
             self.nav_rail.configure(width=self.NAV_RAIL_WIDTH_MAX)
@@ -508,22 +997,200 @@ class App(ctk.CTk):
             self.data_button.configure(text="📊 Data Analysis", anchor="w", width=self.NAV_RAIL_WIDTH_MAX - 20)
             self.security_button.configure(text="🛡️ Security Scan", anchor="w", width=self.NAV_RAIL_WIDTH_MAX - 20)
             self.history_button.configure(text="🕒 Command History", anchor="w", width=self.NAV_RAIL_WIDTH_MAX - 20)
+            self.jobs_button.configure(text="⏱ Background Jobs", anchor="w", width=self.NAV_RAIL_WIDTH_MAX - 20)
             self.sidebar_expanded = True
 
     # --- Button Functions ---
     def log_to_output(self, message, tag="info_tag"):
-        """Helper function to add messages to the output box."""
-        self.output_box.configure(state="normal")
+        """Helper function to add messages to the output box (painted on the next frame)."""
         timestamp = f"[{datetime.datetime.now().strftime('%H:%M:%S')}] "
-        self.output_box.insert("end", timestamp, "timestamp_tag")
-        self.output_box.insert("end", f"{message}\n\n", tag)
+        self.output_log.append(timestamp, "timestamp_tag")
+        self.output_log.append(f"{message}\n\n", tag)
+        self._schedule_output_flush()
+
+    def _append_to_output(self, text, tag="info_tag"):
+        """Append raw text (no timestamp) to the output box, used for streamed responses."""
+        self.output_log.append(text, tag)
+        self._schedule_output_flush()
+
+    def _schedule_output_flush(self):
+        if not self._output_flush_scheduled:
+            self._output_flush_scheduled = True
+            self.after(STREAM_FLUSH_MS, self._flush_output)
+
+    def _flush_output(self):
+        """Paint everything logged since the last frame, then trim the box to the log caps."""
+        self._output_flush_scheduled = False
+        chunks, skipped = self.output_log.take()
+        if not chunks:
+            return
+        self.output_box.configure(state="normal")
+        if skipped:
+            # only point at the log file when there is one
+            where = f", see {self.output_log.spill_path}" if self.output_log.spill_path else ""
+            self._insert_output("end", f"[... {skipped:,} characters skipped{where} ...]\n\n", "timestamp_tag")
+        for text, tag in chunks:
+            self._insert_output("end", text, tag)
+        self._trim_output()
         self.output_box.configure(state="disabled")
         self.output_box.see("end")
 
+    def _insert_output(self, index, text, tags):
+        self.output_box.insert(index, text, tags)
+        self._output_chars += len(text)
+
+    def _delete_output(self, index1, index2):
+        self._output_chars -= len(self.output_box.get(index1, index2))
+        self.output_box.delete(index1, index2)
+
+    def _trim_output(self):
+        # drop whole lines from the top until both caps hold
+        lines = int(self.output_box.index("end-1c").split(".")[0])
+        if lines > self.output_log.max_lines:
+            self._delete_output("1.0", f"{lines - self.output_log.max_lines + 1}.0")
+        excess = self._output_chars - self.output_log.max_chars
+        if excess > 0:
+            self._delete_output("1.0", f"1.0 + {excess} chars lineend + 1 chars")
+
+    def _poll_jobs(self):
+        # the one place where results of background jobs reach the Tk thread
+        self.jobs.poll()
+        self.after(STREAM_FLUSH_MS, self._poll_jobs)
+
+    def _load_pandas_job(self, job):
+        get_pandas()
+        return dict(STARTUP_TIMINGS).get("pandas (lazy)", 0.0)
+
+    def _on_pandas_loaded(self, job, seconds):
+        if STARTUP_REPORT:
+            self.log_to_output(f"Loaded pandas in {seconds * 1000:.0f} ms")
+
+    def _on_first_idle(self):
+        STARTUP_TIMINGS.append(("window ready (total)", time.perf_counter() - _STARTUP_T0))
+        if STARTUP_REPORT:
+            print_startup_report()
+            report = ", ".join(f"{label}: {seconds * 1000:.0f} ms" for label, seconds in STARTUP_TIMINGS)
+            self.log_to_output(f"Startup timings: {report}")
+        if SIMILARITY_AVAILABLE:
+            self.jobs.submit("similar index", lambda job, pairs: SimilarQueryIndex.from_pairs(pairs),
+                             self.command_history.pairs(MAX_QUERIES), label="Index past queries",
+                             on_done=self._on_similar_index_built)
+
+    def _on_similar_index_built(self, job, index):
+        for query, command in self._similar_backlog:
+            index.add(query, command)
+        self._similar_backlog = []
+        self.similar_queries = index
+
+    def _remember_similar(self, query, command):
+        if self.similar_queries is not None:
+            self.similar_queries.add(query, command)
+        elif SIMILARITY_AVAILABLE:
+            self._similar_backlog.append((query, command))
+
+    def _reuse_similar_command(self, query):
+        """Fill in the command of an earlier query asking the same thing. True if the AI call can be skipped."""
+        if self.similar_queries is None or query == self._reused_query:
+            self._reused_query = None
+            return False
+        same = self.similar_queries.same(query)
+        if same is None:
+            similar = self.similar_queries.similar(query)
+            if similar is not None:
+                score, past_query, command = similar
+                self.log_to_output(f"Similar earlier query ({score:.0%}): '{past_query}' -> {command}", "info_tag")
+            return False
+        past_query, command = same
+        self._reused_query = query
+        self._generate_query = query
+        self.command_box.delete("1.0", "end")
+        self.command_box.insert("1.0", command)
+        self.command_history.add(query, command)
+        self.log_to_output(f"Reused the command of earlier query '{past_query}' (no AI call). "
+                           "Press Generate again to ask the AI anyway.", "info_tag")
+        self._update_ui_after_generation(command, from_history=True)
+        return True
+
+    def _ready_status_text(self):
+        stats = get_cache_stats()
+        return f"Ready  |  Cache: {stats['hits']} hits, {stats['misses']} misses"
+
+    def get_analysis_pool(self):
+        """Warm EDA worker processes, started the first time the EDA window opens."""
+        if self.analysis_pool is None:
+            self.analysis_pool = AnalysisPool(on_update=self._on_analysis_update)
+            self.analysis_pool.start()
+        return self.analysis_pool
+
+    def _on_analysis_update(self, job, event, data):
+        # called on the pool thread
+        self.jobs.call_soon(self._show_analysis_update, job, event, data)
+
+    def _show_analysis_update(self, job, event, data):
+        name = os.path.basename(job.file_path)
+        if event == "started":
+            self.log_to_output(f"Data analysis job #{job.id} started on {name}.")
+        elif event == "log":
+            self.log_to_output(f"[EDA #{job.id}] {data}")
+        elif event == "progress":
+            self._show_analysis_progress(job, data)
+        elif event == "done":
+            timings = ", ".join(f"{step} {seconds:.1f}s" for step, seconds in data.get("timings", []))
+            self.log_to_output(f"Data analysis job #{job.id} finished in {job.elapsed:.1f}s ({timings}).\nReport: {data['report']}")
+            webbrowser.open(f"file://{os.path.abspath(data['report'])}")
+        elif event in ("failed", "timeout", "cancelled"):
+            self.log_to_output(f"Data analysis job #{job.id} {event}: {data}", "error_tag")
+        if event in ("done", "failed", "timeout", "cancelled"):
+            self.status_bar.configure(text=self._ready_status_text())
+
+    def _show_analysis_progress(self, job, event):
+        """Keep one live progress line per job in the output box, rewritten in place."""
+        if event["event"] == "done":
+            text = f"EDA #{job.id}: done in {event['elapsed']:.1f}s"
+        else:
+            text = f"EDA #{job.id}: {event['step']}  |  elapsed {event['elapsed']:.1f}s"
+            if event["rows"] is not None:
+                text += f"  |  {event['rows']:,} rows"
+            if event["bytes"] is not None and event["total_bytes"]:
+                text += f"  |  {100 * event['bytes'] / event['total_bytes']:.0f}%"
+            if event["eta"] is not None:
+                text += f"  |  ETA {event['eta']:.0f}s"
+        self.status_bar.configure(text=text)
+
+        tag = f"eda_progress_{job.id}"
+        self._flush_output() # keep the line after the messages logged before it
+        self.output_box.configure(state="normal")
+        ranges = self.output_box.tag_ranges(tag)
+        if ranges:
+            start = self.output_box.index(ranges[0])
+            self._delete_output(ranges[0], ranges[1])
+        else:
+            start = self.output_box.index("end-1c")
+        self._insert_output(start, f"{text}\n\n", ("info_tag", tag))
+        self.output_box.configure(state="disabled")
+        self.output_box.see("end")
+
+    def on_close(self):
+        if self.command_run is not None:
+            self.command_run.stop()
+        self.jobs.shutdown()
+        if self.analysis_pool is not None:
+            self.analysis_pool.shutdown(wait=False)
+        self._flush_output()
+        self.output_log.close()
+        self.command_history.close()
+        self.destroy()
+
     def open_eda_window(self):
         if self.eda_window is None or not self.eda_window.winfo_exists():
             self.eda_window = EdaWindow(self) 
             self.eda_window.focus()
+            # spawn the workers now so they are warm by the time a file is picked
+            self.get_analysis_pool()
+            if _pandas is None:
+                # warm pandas up while the user is still picking a file
+                self.jobs.submit("pandas", self._load_pandas_job, label="Load pandas", on_done=self._on_pandas_loaded,
+                                 on_error=lambda job, error: self.log_to_output(f"Failed to load pandas: {error}", "error_tag"))
         else:
             self.eda_window.focus() 
 
@@ -535,6 +1202,11 @@ class App(ctk.CTk):
         else:
             self.history_window.focus()
             
+    def open_jobs_window(self):
+        if self.jobs_window is None or not self.jobs_window.winfo_exists():
+            self.jobs_window = JobsWindow(self)
+        self.jobs_window.focus()
+
     # (جديد) وظيفة استرجاع الأمر من الـ History
     def set_command_from_history(self, command):
         self.command_box.delete("1.0", "end")
@@ -542,39 +1214,59 @@ class App(ctk.CTk):
         # (جديد) بعد ما نرجعه، نفعّل الزراير بتاعته
         self.after(10, self._update_ui_after_generation, command, from_history=True)
 
-    # --- Generate Command (Threaded) ---
-    def _generate_command_thread(self, query):
-        try:
-            # (معدل) نستخدم البرومبت الديفولت (None)
-            command = get_shell_command(query, system_prompt_override=None)
-            self.after(0, self._update_ui_after_generation, command)
-        except Exception as e:
-            error_message = f"# Error: {str(e)}"
-            self.after(0, self._update_ui_after_generation, error_message)
+    # --- Generate Command (job) ---
+    def _generate_command_job(self, job, query):
+        parts = []
+        # (معدل) نستخدم البرومبت الديفولت (None)
+        # a backend failure mid-stream raises StreamError: the job fails and the partial text is never a command
+        for chunk in stream_shell_command(query, system_prompt_override=None):
+            if job.cancelled:
+                break
+            parts.append(chunk)
+            job.post("chunk", chunk)
+        return "".join(parts).strip()
+
+    def _append_to_command_box(self, job, event, text):
+        if job is self.generate_job:
+            self.command_box.insert("end", text)
+            self.command_box.see("end")
+
+    def _on_generate_done(self, job, command):
+        if job is self.generate_job:
+            self.generate_job = None
+            self._update_ui_after_generation(command)
+
+    def _on_generate_error(self, job, error):
+        if job is self.generate_job:
+            # superseded jobs are cancelled too, but only the current one owns the UI
+            self.generate_job = None
+            self._update_ui_after_generation(f"# Error: {error}")
 
     def _update_ui_after_generation(self, command, from_history=False):
         if not from_history:
+            # replace the streamed preview with the final cleaned command
+            self.command_box.delete("1.0", "end")
             self.command_box.insert("1.0", command)
         
         if command.startswith("# Cannot fulfill") or command.startswith("# Error"):
             if not from_history:
                 self.log_to_output(f"AI returned an error: {command}", "error_tag")
             # (جديد) اقفل الزراير لو الأمر فيه خطأ
-            self.execute_button.configure(state="disabled", fg_color=self.COLOR_RED_DISABLED, hover_color=self.COLOR_RED_DISABLED)
+            self._set_execute_enabled(False)
             self.explain_button.configure(state="disabled")
         else:
             if not from_history:
                 self.log_to_output("Command generated successfully.", "info_tag")
                 # (جديد) خزّن الأمر في الـ History
-                if command not in self.command_history:
-                    self.command_history.append(command)
+                self.command_history.add(self._generate_query, command)
+                self._remember_similar(self._generate_query, command)
             
             # (جديد) افتح الزراير
-            self.execute_button.configure(state="normal", fg_color=self.COLOR_RED_ACTIVE, hover_color=self.COLOR_RED_ACTIVE_HOVER)
+            self._set_execute_enabled(True)
             self.explain_button.configure(state="normal")
         
         self.generate_button.configure(state="normal", text="► GENERATE COMMAND (Ctrl+Enter)")
-        self.status_bar.configure(text="Ready")
+        self.status_bar.configure(text=self._ready_status_text())
 
     def generate_command_event(self, event=None):
         query = self.query_box.get("1.0", "end-1c").strip()
@@ -582,31 +1274,64 @@ class App(ctk.CTk):
             self.log_to_output("Error: Query is empty.", "error_tag")
             return
 
+        # a new query replaces the one still generating (the button stays usable)
+        if self.generate_job is not None:
+            self.jobs.cancel(self.generate_job.id)
+            self.generate_job = None
+
+        if self._reuse_similar_command(query):
+            return
+
         self.status_bar.configure(text="Generating command...")
         self.command_box.delete("1.0", "end")
         
-        # (جديد) اقفل كل الزراير المتعلقة بالكود
-        self.generate_button.configure(state="disabled", text="⌛ Generating...")
-        self.execute_button.configure(state="disabled", fg_color=self.COLOR_RED_DISABLED, hover_color=self.COLOR_RED_DISABLED)
+        # (جديد) اقفل الزراير المتعلقة بالكود لحد ما الأمر يخلص
+        self.generate_button.configure(text="⌛ Generating... (Ctrl+Enter to restart)")
+        self._set_execute_enabled(False)
         self.explain_button.configure(state="disabled")
         
-        threading.Thread(target=self._generate_command_thread, args=(query,), daemon=True).start()
-
-    # --- (جديد) Explain Command (Threaded) ---
-    def _explain_command_thread(self, command):
-        try:
-            # (جديد) نبعت البرومبت بتاع الشرح
-            explanation = get_shell_command(command, system_prompt_override=EXPLAIN_SYSTEM_PROMPT)
-            self.after(0, self._update_ui_after_explain, explanation)
-        except Exception as e:
-            self.after(0, self._update_ui_after_explain, f"# Error explaining command: {str(e)}")
-
-    def _update_ui_after_explain(self, explanation):
-        self.log_to_output("--- AI EXPLANATION ---", "info_tag")
-        self.log_to_output(explanation, "info_tag")
-        self.log_to_output("--- END OF EXPLANATION ---", "info_tag")
-        self.explain_button.configure(state="normal", text="✨ Explain")
-        self.status_bar.configure(text="Ready")
+        self._generate_query = query
+        self.generate_job = self.jobs.submit("generate", self._generate_command_job, query, label=query[:80],
+                                             timeout=AI_JOB_TIMEOUT, on_event=self._append_to_command_box,
+                                             on_done=self._on_generate_done, on_error=self._on_generate_error)
+
+    # --- (جديد) Explain Command (job) ---
+    def _explain_command_job(self, job, command):
+        # (جديد) نبعت البرومبت بتاع الشرح
+        for chunk in stream_shell_command(command, system_prompt_override=EXPLAIN_SYSTEM_PROMPT):
+            if job.cancelled:
+                break
+            job.post("chunk", chunk)
+
+    # Explanations can run in parallel but are printed one after another, in the order
+    # they were asked: the oldest one streams live, the others buffer until their turn.
+    def _on_explain_chunk(self, job, event, text):
+        entry = next(e for e in self._explanations if e["job"] is job)
+        if entry is self._explanations[0]:
+            self._append_to_output(text)
+        else:
+            entry["chunks"].append(text)
+
+    def _on_explain_finished(self, job, error=None):
+        entry = next(e for e in self._explanations if e["job"] is job)
+        entry["done"] = True
+        entry["error"] = error if job.status != DONE else None
+        while self._explanations and self._explanations[0]["done"]:
+            finished = self._explanations.pop(0)
+            if finished["error"]:
+                self._append_to_output(f"# Error explaining command: {finished['error']}", "error_tag")
+            self._append_to_output("\n\n")
+            self.log_to_output("--- END OF EXPLANATION ---", "info_tag")
+            if self._explanations:
+                self._start_explanation_output(self._explanations[0])
+        if not self._explanations:
+            self.explain_button.configure(text="✨ Explain")
+            self.status_bar.configure(text=self._ready_status_text())
+
+    def _start_explanation_output(self, entry):
+        self.log_to_output(f"--- AI EXPLANATION (job #{entry['job'].id}) ---", "info_tag")
+        self._append_to_output("".join(entry["chunks"]))
+        entry["chunks"].clear()
 
     def explain_command_event(self):
         command = self.command_box.get("1.0", "end-1c").strip()
@@ -615,33 +1340,53 @@ class App(ctk.CTk):
             return
             
         self.status_bar.configure(text="AI is explaining...")
-        self.explain_button.configure(state="disabled", text="...")
-        threading.Thread(target=self._explain_command_thread, args=(command,), daemon=True).start()
-
-    # --- (جديد) Execute Command (Threaded) ---
-    def _execute_command_thread(self, command):
-        try:
-            # (جديد) تنفيذ الأمر
-            # shell=True خطير، ولكنه ضروري عشان الأوامر زي | و > تشتغل
-            result = subprocess.run(command, shell=True, capture_output=True, text=True, encoding='utf-8', errors='replace')
-            self.after(0, self._update_ui_after_execute, result.stdout, result.stderr)
-        except Exception as e:
-            self.after(0, self._update_ui_after_execute, None, f"Execution failed: {str(e)}")
-
-    def _update_ui_after_execute(self, stdout, stderr):
-        if stdout:
-            self.log_to_output("--- COMMAND OUTPUT (stdout) ---", "info_tag")
-            self.log_to_output(stdout.strip(), "info_tag")
-            self.log_to_output("--- END OF OUTPUT ---", "info_tag")
-        if stderr:
-            self.log_to_output("--- COMMAND ERROR (stderr) ---", "error_tag")
-            self.log_to_output(stderr.strip(), "error_tag")
-            self.log_to_output("--- END OF ERROR ---", "error_tag")
-        
-        self.log_to_output("Command execution finished.", "info_tag")
+        self.explain_button.configure(text="✨ Explain (running...)")
+        job = self.jobs.submit("explain", self._explain_command_job, command, label=command[:80], timeout=AI_JOB_TIMEOUT,
+                               on_event=self._on_explain_chunk, on_done=self._on_explain_finished,
+                               on_error=self._on_explain_finished)
+        self._explanations.append({"job": job, "chunks": [], "done": False, "error": None})
+        if len(self._explanations) == 1:
+            self._start_explanation_output(self._explanations[0])
+
+    # --- (جديد) Execute Command (streamed, see command_runner.py) ---
+    def _check_command_run(self, job, run):
+        # polled once per frame on the Tk thread (the run reads its pipes on its own threads):
+        # one coalesced batch of output per frame, however fast the command writes
+        done = run.done
+        chunks = run.drain()
+        if chunks:
+            job.post("output", chunks)
+        return done
+
+    def _on_execute_error(self, run, error):
+        run.stop()
+        self.log_to_output(f"Command job ended: {error}", "error_tag")
+        self._update_ui_after_execute(run)
+
+    def _show_command_output(self, run, chunks):
+        # tail retention in the box comes from the output log caps (it drops the oldest lines)
+        for stream, text in chunks:
+            self.output_log.append(text, "error_tag" if stream == STDERR else "info_tag")
+        self._flush_output()
+        if run.omitted and not run.stopped:
+            self.status_bar.configure(text=f"Executing command... ({run.omitted:,} earlier characters trimmed)")
+
+    def _update_ui_after_execute(self, run):
+        self._append_to_output("\n")
+        if run.omitted:
+            self.log_to_output(f"--- {run.omitted:,} characters of earlier output were trimmed "
+                               f"(limit {run.max_chars:,}) ---", "info_tag")
+        if run.stopped:
+            self.log_to_output(f"Command stopped after {run.duration:.1f}s.", "error_tag")
+        else:
+            tag = "info_tag" if run.returncode == 0 else "error_tag"
+            self.log_to_output(f"Command execution finished (exit code {run.returncode}, {run.duration:.1f}s).", tag)
+        self.command_run = None
+        self.command_history.record_run(run.command, None if run.stopped else run.returncode, run.duration)
         
         # رجّع الزراير لحالتها الطبيعية
-        self.execute_button.configure(state="normal", text="🔥 Execute Command")
+        self.execute_button.configure(state="normal", text="🔥 Execute Command", command=self.execute_command_event,
+                                      fg_color=self.COLOR_RED_ACTIVE, hover_color=self.COLOR_RED_ACTIVE_HOVER)
         self.generate_button.configure(state="normal")
         self.status_bar.configure(text="Ready")
 
@@ -652,21 +1397,41 @@ class App(ctk.CTk):
             return
 
         self.log_to_output(f"Executing: {command}", "info_tag")
+        run = CommandRun(command)
+        try:
+            run.start()
+        except OSError as e:
+            self.log_to_output(f"Execution failed: {e}", "error_tag")
+            return
+        self.command_run = run
+        self.jobs.watch("execute", self._check_command_run, run, label=command[:80],
+                        on_event=lambda job, event, chunks: self._show_command_output(run, chunks),
+                        on_done=lambda job, result: self._update_ui_after_execute(run),
+                        on_error=lambda job, error: self._on_execute_error(run, error))
         
-        # (جديد) اقفل الزراير الأساسية أثناء التنفيذ
+        # (جديد) اقفل الزراير الأساسية أثناء التنفيذ، وزرار التنفيذ بقى Stop
         self.status_bar.configure(text="Executing command...")
-        self.execute_button.configure(state="disabled", text="⌛ Executing...")
+        self.execute_button.configure(text="⏹ Stop", command=self.stop_command_event,
+                                      fg_color=self.COLOR_GRAY, hover_color=self.COLOR_GRAY_HOVER)
         self.generate_button.configure(state="disabled")
-        
-        threading.Thread(target=self._execute_command_thread, args=(command,), daemon=True).start()
 
-    # --- Security Scan (Threaded) ---
-    def _security_scan_thread(self):
-        try:
-            response = get_shell_command("run quick scan", system_prompt_override=None)
-            self.after(0, self._update_ui_after_scan, response)
-        except Exception as e:
-            self.after(0, self._update_ui_after_scan, f"# Error: {str(e)}")
+    def _set_execute_enabled(self, enabled):
+        if self.command_run is not None:
+            return # it is the Stop button until the running command ends
+        if enabled:
+            self.execute_button.configure(state="normal", fg_color=self.COLOR_RED_ACTIVE, hover_color=self.COLOR_RED_ACTIVE_HOVER)
+        else:
+            self.execute_button.configure(state="disabled", fg_color=self.COLOR_RED_DISABLED, hover_color=self.COLOR_RED_DISABLED)
+
+    def stop_command_event(self):
+        if self.command_run is not None:
+            self.command_run.stop()
+            self.execute_button.configure(state="disabled", text="⌛ Stopping...")
+            self.status_bar.configure(text="Stopping command...")
+
+    # --- Security Scan (job) ---
+    def _security_scan_job(self, job):
+        return get_shell_command("run quick scan", system_prompt_override=None)
 
     def _update_ui_after_scan(self, response):
         self.log_to_output(response)
@@ -676,7 +1441,9 @@ class App(ctk.CTk):
     def run_security_scan_event(self):
         self.status_bar.configure(text="Running security scan...")
         self.security_button.configure(state="disabled")
-        threading.Thread(target=self._security_scan_thread, daemon=True).start()
+        self.jobs.submit("scan", self._security_scan_job, label="Security scan", timeout=AI_JOB_TIMEOUT,
+                         on_done=lambda job, response: self._update_ui_after_scan(response),
+                         on_error=lambda job, error: self._update_ui_after_scan(f"# Error: {error}"))
 
     # --- Other Utilities ---
     def copy_command(self):
@@ -693,7 +1460,7 @@ class App(ctk.CTk):
         self.command_box.delete("1.0", "end")
         
         # (جديد) نقفل الزراير بعد المسح
-        self.execute_button.configure(state="disabled", fg_color=self.COLOR_RED_DISABLED, hover_color=self.COLOR_RED_DISABLED)
+        self._set_execute_enabled(False)
         self.explain_button.configure(state="disabled")
         
         self.log_to_output("Query and Command boxes cleared.")
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Model backends for ai_shell_helper
+get_shell_command talks to whichever backend is selected here:
+  - gemini : Google Gemini through google.generativeai (needs network + API key)
+  - local  : deterministic rule/template stand-in, no outside services
+
+Pick one with the AI_SHELL_BACKEND environment variable, the "backend" key in
+~/.ai_shell_helper/config.json, or set_backend() from code.
+"""
+
+import os
+import re
+import json
+import time
+import shlex
+import threading
+
+from app_paths import APP_HOME
+
+# This is the API endpoint for the Gemini 2.5 Flash model
+API_KEY = os.environ.get("GEMINI_API_KEY", "YOUR_API_KEY")
+
+MODEL_NAME = "gemini-2.5-flash"
+
+DEFAULT_BACKEND = "gemini"
+CONFIG_FILE = os.path.join(APP_HOME, "config.json")
+
+
+def load_config():
+    try:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+class ModelBackend:
+    """Interface every backend implements. `model_name` is part of the response cache key."""
+
+    name = "base"
+    model_name = "base"
+
+    def generate(self, system_prompt, query):
+        """Return the raw response text for `query`."""
+        raise NotImplementedError
+
+    def stream(self, system_prompt, query):
+        """Yield the raw response text in chunks. Falls back to one chunk."""
+        yield self.generate(system_prompt, query)
+
+
+class GeminiBackend(ModelBackend):
+    name = "gemini"
+
+    def __init__(self, api_key=API_KEY, model_name=MODEL_NAME):
+        self.api_key = api_key
+        self.model_name = model_name
+        self._genai = None
+        # One long-lived model client per system prompt, shared by all worker threads
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _get_genai(self):
+        # the SDK is imported and configured on first use, not at import time
+        if self._genai is None:
+            with self._lock:
+                if self._genai is None:
+                    import google.generativeai as genai
+                    # إعداد المكتبة
+                    genai.configure(api_key=self.api_key)
+                    self._genai = genai
+        return self._genai
+
+    def get_model(self, system_prompt):
+        model = self._models.get(system_prompt)
+        if model is None:
+            genai = self._get_genai()
+            with self._lock:
+                model = self._models.get(system_prompt)
+                if model is None:
+                    model = genai.GenerativeModel(
+                        model_name=self.model_name,
+                        system_instruction=system_prompt
+                    )
+                    self._models[system_prompt] = model
+        return model
+
+    def generate(self, system_prompt, query):
+        return self.get_model(system_prompt).generate_content(query).text
+
+    def stream(self, system_prompt, query):
+        for chunk in self.get_model(system_prompt).generate_content(query, stream=True):
+            yield chunk.text
+
+
+# (pattern, command template) - first match wins, groups are shell-quoted into the template
+LOCAL_RULES = [
+    (r"\b(big|biggest|large|largest)\b.*\bfiles?\b", "find . -type f -exec du -h {{}} + | sort -rh | head -n 10"),
+    (r"\bdisk (usage|space)\b|\bfree space\b", "df -h"),
+    (r"\b(memory|ram)\b", "free -h"),
+    (r"\b(processes|running programs)\b", "ps aux --sort=-%cpu | head -n 15"),
+    (r"\b(ip address|network interfaces?)\b", "ip addr show"),
+    (r"\b(open|listening) ports\b", "ss -tulnp"),
+    (r"\bcurrent (directory|folder)\b|\bwhere am i\b", "pwd"),
+    (r"\bcount lines in (\S+)", "wc -l {0}"),
+    (r"\bfind (?:all )?files named (\S+)", "find . -type f -name {0}"),
+    (r"\bfind (?:all )?(?:\.)?(\w+) files\b", "find . -type f -name '*.{raw0}'"),
+    (r"\bsearch (?:for )?[\"']?(.+?)[\"']? in (?:all )?files\b", "grep -rn {0} ."),
+    (r"\bkill (?:the )?(?:process )?(\S+)", "pkill {0}"),
+    (r"\bmake (?:a )?(?:directory|folder) (\S+)", "mkdir -p {0}"),
+    (r"\b(list|show) (all )?files\b", "ls -la"),
+]
+
+
+class LocalBackend(ModelBackend):
+    """Deterministic offline stand-in with configurable latency, for tests and load testing."""
+
+    name = "local"
+    model_name = "local-rules-v1"
+
+    def __init__(self, latency=None, chunk_size=12, chunk_delay=0.0):
+        if latency is None:
+            latency = float(os.environ.get("AI_SHELL_LOCAL_LATENCY", "0"))
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self._rules = [(re.compile(pattern, re.IGNORECASE), template) for pattern, template in LOCAL_RULES]
+
+    def _command_for(self, query):
+        for pattern, template in self._rules:
+            match = pattern.search(query)
+            if match:
+                groups = match.groups()
+                quoted = [shlex.quote(g) if g else "" for g in groups]
+                raw = {f"raw{i}": g or "" for i, g in enumerate(groups)}
+                return template.format(*quoted, **raw)
+        return "# Cannot fulfill request."
+
+    def _explain(self, command):
+        try:
+            parts = shlex.split(command)
+        except ValueError:
+            parts = command.split()
+        lines = [f"Summary: This command runs `{parts[0] if parts else command}`.", "", "Breakdown:"]
+        for part in parts:
+            kind = "option" if part.startswith("-") else "pipe/operator" if part in ("|", "&&", "||", ">", ">>") else "argument"
+            lines.append(f"  - `{part}`: {kind}.")
+        return "\n".join(lines)
+
+    def _respond(self, system_prompt, query):
+        # explain-style prompts ("your job is to explain it") get a breakdown instead of a command
+        if re.search(r"\bexplain\b", system_prompt, re.IGNORECASE):
+            return self._explain(query)
+        return self._command_for(query)
+
+    def generate(self, system_prompt, query):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(system_prompt, query)
+
+    def stream(self, system_prompt, query):
+        if self.latency:
+            time.sleep(self.latency)
+        text = self._respond(system_prompt, query)
+        for start in range(0, len(text), self.chunk_size):
+            if start and self.chunk_delay:
+                time.sleep(self.chunk_delay)
+            yield text[start:start + self.chunk_size]
+
+
+BACKENDS = {
+    "gemini": GeminiBackend,
+    "local": LocalBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def set_backend(backend, **kwargs):
+    """Select the active backend by name ("gemini", "local") or pass a ModelBackend instance."""
+    global _backend
+    if isinstance(backend, str):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown model backend '{backend}'. Choose one of: {', '.join(BACKENDS)}")
+        backend = BACKENDS[backend](**kwargs)
+    with _backend_lock:
+        _backend = backend
+    return backend
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        name = os.environ.get("AI_SHELL_BACKEND") or load_config().get("backend") or DEFAULT_BACKEND
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown model backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
+        with _backend_lock:
+            if _backend is None:
+                _backend = BACKENDS[name]()
+    return _backend
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Bounded model of the GUI output log
+Messages are appended (from any thread) to a ring buffer capped by line count
+and characters; the GUI takes whatever is pending once per frame and paints it
+with one batch of inserts, trimming the widget to the same caps. When the GUI
+falls behind, the oldest pending text is skipped instead of piling up.
+Everything is also written to a rotating log file on disk, so the full history
+of a long session survives the caps.
+"""
+
+import os
+import threading
+
+DEFAULT_MAX_LINES = int(os.environ.get("AI_SHELL_LOG_MAX_LINES", 5000))
+DEFAULT_MAX_CHARS = int(os.environ.get("AI_SHELL_LOG_MAX_CHARS", 1_000_000))
+SPILL_ENABLED = os.environ.get("AI_SHELL_LOG_SPILL", "1") != "0"
+SPILL_MAX_BYTES = 5 * 1024 * 1024
+SPILL_BACKUPS = 3  # output.log.1 .. output.log.3
+
+
+class RotatingFile:
+    """Append-only text file that rolls over to path.1, path.2, ... past max_bytes."""
+
+    def __init__(self, path, max_bytes=SPILL_MAX_BYTES, backups=SPILL_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._file = None
+
+    def write(self, text):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8", errors="replace")
+        self._file.write(text)
+        self._file.flush()
+        if self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class OutputLog:
+    def __init__(self, max_lines=DEFAULT_MAX_LINES, max_chars=DEFAULT_MAX_CHARS, spill_path=None):
+        self.max_lines = max_lines
+        self.max_chars = max_chars
+        self.spill = RotatingFile(spill_path) if spill_path else None
+        self.skipped = 0  # characters dropped from the ring before they were painted
+        self._pending = []  # (text, tag) in order, one per append()
+        self._pending_lines = 0
+        self._pending_chars = 0
+        self._unspilled = []
+        self._lock = threading.Lock()
+
+    @property
+    def spill_path(self):
+        """Where the full log goes, or None when spilling is off (or was given up on)."""
+        return self.spill.path if self.spill is not None else None
+
+    def append(self, text, tag):
+        """Queue text for the next frame. Safe to call from any thread."""
+        if not text:
+            return
+        with self._lock:
+            self._pending.append((text, tag))
+            self._pending_lines += text.count("\n")
+            self._pending_chars += len(text)
+            self._unspilled.append(text)
+            while len(self._pending) > 1 and (self._pending_lines > self.max_lines
+                                              or self._pending_chars > self.max_chars):
+                dropped = self._pending.pop(0)[0]
+                self._pending_lines -= dropped.count("\n")
+                self._pending_chars -= len(dropped)
+                self.skipped += len(dropped)
+
+    def take(self):
+        """Pending [(text, tag), ...] (runs of one tag merged) plus the characters skipped since the last call.
+
+        Also writes everything appended since the last call to the spill file."""
+        with self._lock:
+            chunks, self._pending = self._pending, []
+            self._pending_lines = self._pending_chars = 0
+            skipped, self.skipped = self.skipped, 0
+            unspilled, self._unspilled = self._unspilled, []
+        if self.spill is not None and unspilled:
+            try:
+                self.spill.write("".join(unspilled))
+            except OSError:
+                self.spill = None  # disk full, read-only home...: keep the GUI going without it
+        merged = []
+        for text, tag in chunks:
+            if merged and merged[-1][1] == tag:
+                merged[-1][0].append(text)
+            else:
+                merged.append(([text], tag))
+        return [("".join(parts), tag) for parts, tag in merged], skipped
+
+    def close(self):
+        if self.spill is not None:
+            self.spill.close()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of EDA reports and their summary statistics
+Entries are keyed on the CSV content hash plus the report configuration, so the
+same data profiled with the same settings is never profiled twice. A
+(path, size, mtime) -> hash fingerprint gives a fast path that skips re-hashing.
+Least recently used entries are evicted once the cache exceeds its size cap.
+EDA runs in several processes (batch mode, the GUI's worker pool) share the
+cache, so there is no shared index file to lose updates on: every entry keeps
+its metadata in its own folder (<key>/entry.json) and every fingerprint has its
+own small file, each written with an atomic replace. The size accounting and
+eviction are rebuilt from the folder listing.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+
+from app_paths import app_path
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+HASH_BLOCK_SIZE = 1024 * 1024
+CONFIG_VERSION = 3  # 2: frames are dtype-compacted before profiling, 3: streaming reports gain matrices
+ENTRY_FILE = "entry.json"
+STALE_SECONDS = 3600  # an entry folder without entry.json this old is a crashed store()
+
+
+def report_config(mode, **options):
+    """Settings that change the report content. Anything else must not go in here."""
+    config = {"version": CONFIG_VERSION, "mode": mode}
+    config.update(options)
+    return config
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _is_key(name):
+    return len(name) == 64 and all(c in "0123456789abcdef" for c in name)
+
+
+class ReportCache:
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root or os.path.dirname(app_path("eda_reports", ENTRY_FILE))
+        self.max_bytes = max_bytes
+        self.fingerprint_dir = os.path.join(self.root, "fingerprints")
+        os.makedirs(self.fingerprint_dir, exist_ok=True)
+
+    def _fingerprint_path(self, abs_path):
+        return os.path.join(self.fingerprint_dir, hashlib.sha256(abs_path.encode("utf-8")).hexdigest() + ".json")
+
+    def _entry_path(self, key):
+        return os.path.join(self.root, key, ENTRY_FILE)
+
+    def content_hash(self, path, fast_only=False):
+        """sha256 of the file, reusing the last result while size and mtime are unchanged.
+
+        With fast_only=True returns None instead of hashing an unknown file.
+        """
+        st = os.stat(path)
+        fingerprint = [st.st_size, st.st_mtime_ns]
+        abs_path = os.path.abspath(path)
+        fingerprint_path = self._fingerprint_path(abs_path)
+        known = _read_json(fingerprint_path)
+        if known and known["path"] == abs_path and known["fingerprint"] == fingerprint:
+            return known["sha256"]
+        if fast_only:
+            return None
+        digest = _file_sha256(path)
+        _write_json(fingerprint_path, {"path": abs_path, "fingerprint": fingerprint, "sha256": digest})
+        return digest
+
+    def make_key(self, path, config, fast_only=False):
+        digest = self.content_hash(path, fast_only=fast_only)
+        if digest is None:
+            return None
+        config_hash = hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()
+        return hashlib.sha256(f"{digest}:{config_hash}".encode("utf-8")).hexdigest()
+
+    def lookup(self, path, config, fast_only=False):
+        """Return {"report": <html path>, "files": [<report and its sidecars>], "summary": {...}} or None."""
+        key = self.make_key(path, config, fast_only=fast_only)
+        if key is None:
+            return None
+        entry = _read_json(self._entry_path(key))
+        if entry is None:
+            return None
+        entry_dir = os.path.join(self.root, key)
+        files = [os.path.join(entry_dir, name) for name in entry["files"]]
+        if not all(os.path.exists(file) for file in files):
+            shutil.rmtree(entry_dir, ignore_errors=True)  # half evicted by another process
+            return None
+        entry["used"] = time.time()
+        _write_json(self._entry_path(key), entry)
+        return {"report": files[0], "files": files, "summary": entry.get("summary", {})}
+
+    def store(self, path, config, report_file, summary=None, extra_files=()):
+        """Copy report_file (and sidecars such as its .json) into the cache and evict if over the cap."""
+        key = self.make_key(path, config)
+        entry_dir = os.path.join(self.root, key)
+        os.makedirs(entry_dir, exist_ok=True)
+        names = []
+        for file in [report_file, *extra_files]:
+            names.append(os.path.basename(file))
+            shutil.copyfile(file, os.path.join(entry_dir, names[-1]))
+        # entry.json goes last: an entry is only visible once all its files are in place
+        _write_json(self._entry_path(key), {
+            "report": names[0],
+            "files": names,
+            "source": os.path.abspath(path),
+            "config": config,
+            "summary": summary or {},
+            "size": sum(os.path.getsize(file) for file in [report_file, *extra_files]),
+            "used": time.time(),
+        })
+        self._evict(keep=key)
+        return key
+
+    def _entries(self):
+        """{key: entry} of every complete entry; removes the folders of crashed stores."""
+        entries = {}
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return entries
+        for name in names:
+            if not _is_key(name):
+                continue
+            entry = _read_json(self._entry_path(name))
+            if entry is not None:
+                entries[name] = entry
+                continue
+            entry_dir = os.path.join(self.root, name)
+            try:
+                if time.time() - os.path.getmtime(entry_dir) > STALE_SECONDS:
+                    shutil.rmtree(entry_dir, ignore_errors=True)
+            except OSError:
+                pass  # removed by another process meanwhile
+        return entries
+
+    def _evict(self, keep=None):
+        entries = self._entries()
+        total = sum(entry["size"] for entry in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]["used"]):
+            if total <= self.max_bytes or len(entries) <= 1:
+                break
+            if key == keep:
+                continue
+            total -= entries.pop(key)["size"]
+            shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+
+    def total_bytes(self):
+        return sum(entry["size"] for entry in self._entries().values())
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate query lookup for past (query -> command) pairs
+"list big files", "show largest files" and "find the biggest files" should
+reuse one answer instead of costing three model calls. Each query is turned
+into a hashed vector of character n-grams (plus its words), after lower-casing,
+dropping articles and politeness words (never prepositions: "to" and "from"
+point opposite ways) and mapping a few common synonyms onto one word. All
+vectors are L2-normalized rows of one matrix, so a lookup is a single
+matrix-vector product (cosine similarity against every past query).
+Similarity is only a hint ("port 8080" and "port 3000" score high too), so a
+past command is reused without asking the model only when both queries read
+the same after that normalization, word for word and in order, and neither
+names a path, file or number ("move a.txt to b.txt" must never reuse the
+command of "move b.txt to a.txt"). Anything else above the threshold is just
+suggested. Needs numpy; without it callers skip the lookup.
+"""
+
+import os
+import re
+import zlib
+import importlib.util
+
+SIMILARITY_AVAILABLE = (importlib.util.find_spec("numpy") is not None
+                        and os.environ.get("AI_SHELL_SIMILAR", "1") != "0")
+
+DIMS = 1024
+MAX_QUERIES = 10_000  # most recent distinct queries kept (DIMS * 4 bytes each)
+NGRAM_SIZES = (3, 4)
+WORD_WEIGHT = 2.0  # whole words count more than their n-grams
+SUGGEST_THRESHOLD = float(os.environ.get("AI_SHELL_SIMILAR_THRESHOLD", 0.75))  # cosine similarity
+
+# only articles and politeness: prepositions, "all", "here"... carry direction or scope
+# ("copy notes to backup" vs "copy notes from backup", "list files" vs "list all files")
+_STOPWORDS = {
+    "a", "an", "the", "me", "please", "can", "could", "you", "i", "want", "would", "like",
+    "how", "do", "command",
+}
+# only spellings of the same ask: "new" vs "modified" or "kill" vs "terminate" stay apart
+_SYNONYMS = {
+    "show": "list", "display": "list", "print": "list", "view": "list", "find": "list",
+    "search": "list", "locate": "list", "ls": "list",
+    "largest": "big", "biggest": "big", "large": "big", "huge": "big",
+    "smallest": "small", "tiny": "small",
+    "delete": "remove", "erase": "remove", "rm": "remove", "del": "remove",
+    "newest": "recent", "latest": "recent",
+    "file": "files", "folder": "directories", "folders": "directories", "directory": "directories",
+    "dir": "directories", "dirs": "directories", "process": "processes", "proc": "processes",
+}
+_TOKEN = re.compile(r"[a-z0-9_.\-/*]+")
+_LITERAL = re.compile(r"[0-9./*]")  # paths, file names, globs, sizes, ports...
+
+
+def normalize(query):
+    """Lower-cased content words of query, synonyms mapped onto one spelling."""
+    words = _TOKEN.findall(query.lower())
+    return [_SYNONYMS.get(word, word) for word in words if word not in _STOPWORDS]
+
+
+def query_key(query):
+    """Queries with the same key ask for the same thing ("show largest files" == "list big files")."""
+    return " ".join(normalize(query))
+
+
+def has_literals(query):
+    """True if query names a path, file, glob or number (its command can't be reused blindly)."""
+    return any(_LITERAL.search(word) for word in normalize(query))
+
+
+def _bucket(feature):
+    return zlib.crc32(feature.encode("utf-8")) % DIMS
+
+
+def vectorize(query):
+    """Hashed, L2-normalized feature vector of query (float32, DIMS long)."""
+    import numpy as np
+    vector = np.zeros(DIMS, dtype=np.float32)
+    for word in normalize(query):
+        vector[_bucket("w:" + word)] += WORD_WEIGHT
+        padded = f" {word} "
+        for n in NGRAM_SIZES:
+            for i in range(len(padded) - n + 1):
+                vector[_bucket(padded[i:i + n])] += 1.0
+    np.log1p(vector, out=vector)  # damp repeated n-grams
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SimilarQueryIndex:
+    def __init__(self, capacity=MAX_QUERIES):
+        import numpy as np
+        self.capacity = capacity
+        self._matrix = np.zeros((min(capacity, 256), DIMS), dtype=np.float32)
+        self.queries = []
+        self.commands = []
+        self._rows = {}  # normalized query -> row
+        self._next = 0  # row to overwrite once the index is full (the oldest)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def add(self, query, command):
+        """Remember query -> command (error answers are skipped)."""
+        import numpy as np
+        if not query or not command or command.startswith("#"):
+            return
+        key = query_key(query)
+        row = self._rows.get(key)
+        if row is not None:
+            self.queries[row], self.commands[row] = query, command
+            return
+        if len(self.queries) < self.capacity:
+            row = len(self.queries)
+            if row == len(self._matrix):
+                grown = np.zeros((min(self.capacity, 2 * len(self._matrix)), DIMS), dtype=np.float32)
+                grown[:row] = self._matrix
+                self._matrix = grown
+            self.queries.append(query)
+            self.commands.append(command)
+        else:
+            row = self._next
+            self._next = (self._next + 1) % self.capacity
+            del self._rows[query_key(self.queries[row])]
+            self.queries[row], self.commands[row] = query, command
+        self._rows[key] = row
+        self._matrix[row] = vectorize(query)
+
+    def search(self, query, k=3):
+        """Up to k (similarity, past query, command) tuples, most similar first."""
+        import numpy as np
+        if not self.queries:
+            return []
+        scores = self._matrix[:len(self.queries)] @ vectorize(query)
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(float(scores[i]), self.queries[i], self.commands[i]) for i in best]
+
+    def same(self, query):
+        """(past query, command) asking exactly the same as query, or None.
+
+        Queries with paths or numbers never match: only suggest those (similar())."""
+        if has_literals(query):
+            return None
+        row = self._rows.get(query_key(query))
+        return None if row is None else (self.queries[row], self.commands[row])
+
+    def similar(self, query, threshold=SUGGEST_THRESHOLD):
+        """Most similar (similarity, past query, command) at or above threshold, or None."""
+        best = self.search(query, k=1)
+        return best[0] if best and best[0][0] >= threshold else None
+
+    @classmethod
+    def from_pairs(cls, pairs, capacity=MAX_QUERIES):
+        """Build from (query, command) pairs given newest first (see CommandHistory.pairs())."""
+        index = cls(capacity)
+        for query, command in reversed(list(pairs)[:capacity]):
+            index.add(query, command)
+        return index
@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# the app modules are flat scripts in Main/ that import each other by name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Main"))
+# read by app_paths at import time: keep every cache of the test run out of ~/.ai_shell_helper
+os.environ["AI_SHELL_HELPER_HOME"] = tempfile.mkdtemp(prefix="ai_shell_helper_tests_")
@@ -0,0 +1,87 @@
+import pytest
+
+import ai_shell_helper
+from ai_shell_helper import read_batch_queries
+from command_cache import CommandCache
+
+
+def test_read_batch_queries_skips_malformed_lines():
+    lines = ["list files\n", "\n", "# a comment\n", '{"id": 7, "query": "show disk usage"}\n',
+             '{"id": 8, "query":\n', '{"id": 9}\n', "[1, 2]\n"]
+    skipped = []
+    items = read_batch_queries(lines, skipped)
+    assert items == [{"id": None, "query": "list files"}, {"id": 7, "query": "show disk usage"},
+                     {"id": None, "query": "[1, 2]"}]
+    assert [number for number, reason in skipped] == [5, 6]
+    assert skipped[0][1].startswith("invalid JSON")
+
+
+def test_queries_may_contain_dashes(monkeypatch, capsys):
+    asked = []
+    monkeypatch.setattr(ai_shell_helper, "get_shell_command", lambda query: asked.append(query) or "ls")
+    assert ai_shell_helper.main(["list", "files", "-la"]) == 0
+    assert ai_shell_helper.main(["--", "-rf", "means what"]) == 0
+    assert asked == ["list files -la", "-rf means what"]
+
+
+class _CountingBackend:
+    model_name = "counting"
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = 0
+
+    def generate(self, system_prompt, query):
+        self.calls += 1
+        return self.answer
+
+    def stream(self, system_prompt, query):
+        yield self.generate(system_prompt, query)
+
+
+def test_refusals_and_errors_are_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(ai_shell_helper, "CACHE_ENABLED", True)
+    monkeypatch.setattr(ai_shell_helper, "response_cache", CommandCache(path=str(tmp_path / "cache.json")))
+    refusing = _CountingBackend("# Cannot fulfill request.")
+    monkeypatch.setattr(ai_shell_helper, "get_backend", lambda: refusing)
+    for _ in range(2):
+        assert ai_shell_helper.get_shell_command("wipe the disk") == "# Cannot fulfill request."
+        assert "".join(ai_shell_helper.stream_shell_command("wipe the disk")) == "# Cannot fulfill request."
+    assert refusing.calls == 4
+
+    answering = _CountingBackend("du -sh *")
+    monkeypatch.setattr(ai_shell_helper, "get_backend", lambda: answering)
+    for _ in range(2):
+        assert ai_shell_helper.get_shell_command("disk usage") == "du -sh *"
+    assert answering.calls == 1
+
+
+class _BrokenStreamBackend(_CountingBackend):
+    def stream(self, system_prompt, query):
+        self.calls += 1
+        yield "rm -rf /tmp/build"
+        raise ConnectionResetError("connection reset")
+
+
+def test_failure_mid_stream_is_not_a_command(tmp_path, monkeypatch):
+    monkeypatch.setattr(ai_shell_helper, "CACHE_ENABLED", True)
+    monkeypatch.setattr(ai_shell_helper, "response_cache", CommandCache(path=str(tmp_path / "cache.json")))
+    backend = _BrokenStreamBackend(None)
+    monkeypatch.setattr(ai_shell_helper, "get_backend", lambda: backend)
+    chunks = []
+    with pytest.raises(ai_shell_helper.StreamError, match="connection reset"):
+        for chunk in ai_shell_helper.stream_shell_command("clean the build"):
+            chunks.append(chunk)
+    assert chunks == ["rm -rf /tmp/build"]
+    with pytest.raises(ai_shell_helper.StreamError):
+        list(ai_shell_helper.stream_shell_command("clean the build"))
+    assert backend.calls == 2  # nothing was cached
+
+
+def test_bad_backend_setting_is_an_error_answer(monkeypatch):
+    import model_backends
+    monkeypatch.setattr(model_backends, "_backend", None)
+    monkeypatch.setenv("AI_SHELL_BACKEND", "nope")
+    streamed = "".join(ai_shell_helper.stream_shell_command("list files"))
+    assert streamed.startswith("# Error: Unknown model backend 'nope'")
+    assert ai_shell_helper.get_shell_command("list files") == streamed
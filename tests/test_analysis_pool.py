@@ -0,0 +1,101 @@
+import os
+import time
+
+import pytest
+
+pytest.importorskip("pandas")
+
+import EDA_final
+import analysis_pool
+from analysis_pool import AnalysisPool, AnalysisJob, DONE, FAILED, CANCELLED
+
+
+class FakeConn:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(message)
+
+    def recv(self):
+        raise AssertionError("a worker that failed to start must not wait for jobs")
+
+
+def write_csv(tmp_path, name="numbers.csv"):
+    path = tmp_path / name
+    path.write_text("a,b\n1,2\n2,4\n3,7\n")
+    return str(path)
+
+
+def wait_ready(pool, timeout=60):
+    deadline = time.time() + timeout
+    while not all(worker.ready for worker in pool._workers) and time.time() < deadline:
+        time.sleep(0.05)
+    assert all(worker.ready for worker in pool._workers)
+
+
+def test_worker_that_fails_to_import_never_reports_ready(monkeypatch):
+    def broken(with_profiler=False):
+        raise EDA_final.EdaError("ydata_profiling is not installed")
+    monkeypatch.setattr(EDA_final, "import_libraries", broken)
+    conn = FakeConn()
+    analysis_pool._worker_main(conn)
+    assert conn.sent == [("error", None, "ydata_profiling is not installed")]
+
+
+def test_failed_job_reports_its_error(tmp_path):
+    pool = AnalysisPool(workers=1, preload_profiler=False)
+    try:
+        job = pool.submit(str(tmp_path / "missing.csv"), mode="lite", output_dir=str(tmp_path))
+        assert job.wait(60)
+        assert job.status == FAILED and "File not found" in job.error
+    finally:
+        pool.shutdown()
+
+
+def test_send_to_a_dead_worker_fails_the_job_and_respawns_it(tmp_path):
+    # no pool thread: drive _dispatch() by hand so the dead pipe is hit on send
+    pool = AnalysisPool(workers=1, preload_profiler=False)
+    worker = analysis_pool._Worker(pool._context, preload_profiler=False)
+    pool._workers = [worker]
+    assert worker.conn.recv()[0] == "ready"
+    worker.ready = True
+    worker.process.kill()
+    worker.process.join()
+    job = AnalysisJob(1, write_csv(tmp_path), {"mode": "lite"}, timeout=60)
+    pool._pending.append(job)
+    pool._dispatch()
+    assert job.wait(0) and job.status == FAILED
+    assert pool._workers[0] is not worker and pool._workers[0].process.is_alive()
+    pool._workers[0].kill()
+
+
+def test_pool_survives_a_killed_worker(tmp_path):
+    pool = AnalysisPool(workers=1, preload_profiler=False).start()
+    try:
+        wait_ready(pool)
+        pool._workers[0].process.kill()
+        first = pool.submit(write_csv(tmp_path), mode="lite", output_dir=str(tmp_path), use_cache=False)
+        assert first.wait(60)  # fails or runs on the respawned worker, but never hangs
+        second = pool.submit(write_csv(tmp_path), mode="lite", output_dir=str(tmp_path), use_cache=False)
+        assert second.wait(60) and second.status == DONE
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="needs a named pipe")
+def test_shutdown_finishes_running_and_queued_jobs(tmp_path):
+    # opening a FIFO with no writer blocks: the job stays running until the pool shuts down
+    fifo = str(tmp_path / "never.csv")
+    os.mkfifo(fifo)
+    pool = AnalysisPool(workers=1, preload_profiler=False)
+    running = pool.submit(fifo, mode="lite", output_dir=str(tmp_path), use_cache=False)
+    queued = pool.submit(fifo, mode="lite", output_dir=str(tmp_path), use_cache=False)
+    deadline = time.time() + 60
+    while running.status != "running" and time.time() < deadline:
+        time.sleep(0.05)
+    assert running.status == "running"
+    pool.shutdown()
+    assert running.wait(10) and queued.wait(10)
+    assert running.status == queued.status == CANCELLED
+    assert running.error == "Pool shut down"
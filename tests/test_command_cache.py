@@ -0,0 +1,62 @@
+import os
+import time
+
+from command_cache import CommandCache
+
+PROMPT = "system prompt"
+MODEL = "model"
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = CommandCache(path=str(tmp_path / "cache.json"), max_entries=2)
+    cache.put("list files", PROMPT, MODEL, "ls")
+    cache.put("disk usage", PROMPT, MODEL, "df -h")
+    assert cache.get("list files", PROMPT, MODEL) == "ls"  # now the most recently used
+    cache.put("show processes", PROMPT, MODEL, "ps aux")
+    assert cache.get("disk usage", PROMPT, MODEL) is None
+    assert cache.get("list  files", PROMPT, MODEL) == "ls"  # whitespace is normalized
+    assert cache.get("show processes", PROMPT, MODEL) == "ps aux"
+    assert cache.stats()["entries"] == 2
+
+
+def test_expired_entries_are_dropped(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.json")
+    cache = CommandCache(path=path, ttl_seconds=60)
+    cache.put("list files", PROMPT, MODEL, "ls")
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.get("list files", PROMPT, MODEL) is None
+    assert cache.stats() == {"hits": 0, "misses": 1, "entries": 0, "hit_rate": 0.0}
+
+    monkeypatch.setattr(time, "time", lambda: now)
+    CommandCache(path=path, ttl_seconds=60).put("disk usage", PROMPT, MODEL, "df -h")
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    reloaded = CommandCache(path=path, ttl_seconds=60)
+    reloaded._load()
+    assert not reloaded._entries  # expired entries aren't even loaded
+
+
+def test_entries_persist_and_are_keyed_on_prompt_and_model(tmp_path):
+    path = str(tmp_path / "cache.json")
+    CommandCache(path=path).put("list files", PROMPT, MODEL, "ls")
+    cache = CommandCache(path=path)
+    assert cache.get("list files", PROMPT, MODEL) == "ls"
+    assert cache.get("list files", "other prompt", MODEL) is None
+    assert cache.get("list files", PROMPT, "other model") is None
+    assert cache.get("List files", PROMPT, MODEL) is None  # case matters
+
+
+def test_two_processes_sharing_the_file_keep_each_others_entries(tmp_path):
+    path = str(tmp_path / "cache.json")
+    gui, batch = CommandCache(path=path), CommandCache(path=path)
+    assert gui.get("list files", PROMPT, MODEL) is None and batch.get("list files", PROMPT, MODEL) is None
+    gui.put("list files", PROMPT, MODEL, "ls")
+    batch.put("disk usage", PROMPT, MODEL, "df -h")
+    gui.flush()
+    fresh = CommandCache(path=path)
+    assert fresh.get("list files", PROMPT, MODEL) == "ls"
+    assert fresh.get("disk usage", PROMPT, MODEL) == "df -h"
+    assert [name for name in os.listdir(tmp_path)] == ["cache.json"]
+
+    fresh.clear()
+    assert CommandCache(path=path).get("list files", PROMPT, MODEL) is None
@@ -0,0 +1,50 @@
+import time
+import itertools
+
+import pytest
+
+from command_history import CommandHistory
+
+
+@pytest.fixture(params=["fts", "like"])
+def history(tmp_path, monkeypatch, request):
+    clock = itertools.count(1000)
+    monkeypatch.setattr(time, "time", lambda: float(next(clock)))
+    history = CommandHistory(path=str(tmp_path / "history.sqlite3"))
+    if request.param == "fts":
+        if not history.fts:
+            pytest.skip("no FTS5 trigram tokenizer in this SQLite build")
+    else:
+        history.fts = False  # what builds without the trigram tokenizer get
+    yield history
+    history.close()
+
+
+def test_search_matches_substrings_of_every_term(history):
+    ls = history.add("list files", "ls -la")
+    du = history.add("disk usage of logs", "du -sh /var/log")
+    grep = history.add("find errors in logs", "grep -r ERROR /var/log")
+    assert history.search("") == [grep, du, ls]  # most recently used first
+    assert history.search("var/lo") == [grep, du]
+    assert history.search("/var/log error") == [grep]  # every term must match
+    assert history.search("ERR usage") == []
+    assert history.search("du") == [du]  # short terms scan with LIKE
+    assert history.search("-la") == [ls]
+    assert history.search("100%") == []  # LIKE wildcards are escaped
+
+
+def test_adding_a_known_command_updates_it(history):
+    ls = history.add("list files", "ls -la")
+    du = history.add("disk usage", "du -sh")
+    assert history.add("show all files", "ls -la") == ls
+    assert history.add(None, "ls -la") == ls  # keeps the last query
+    assert len(history) == 2
+    assert history.search("") == [ls, du]
+    row = history.rows([ls])[ls]
+    assert (row["query"], row["uses"]) == ("show all files", 3)
+    assert history.search("show") == [ls]  # the index follows the update
+
+    history.record_run("du -sh", 0, 0.5)
+    assert history.search("")[0] == du
+    assert history.rows([du])[du]["exit_code"] == 0
+    assert history.pairs(10) == [("disk usage", "du -sh"), ("show all files", "ls -la")]
@@ -0,0 +1,69 @@
+import sys
+import time
+
+import pytest
+
+from command_runner import CommandRun, STDOUT, STOP_GRACE_SECONDS
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="POSIX shell commands")
+
+
+def wait_done(run, timeout):
+    deadline = time.time() + timeout
+    while not run.done and time.time() < deadline:
+        time.sleep(0.02)
+    return run.done
+
+
+def output(run):
+    return "".join(text for stream, text in run.drain() if stream == STDOUT)
+
+
+def test_streams_output_and_exit_code():
+    run = CommandRun("echo one; echo two >&2; exit 3").start()
+    assert wait_done(run, 5)
+    assert run.returncode == 3 and not run.stopped
+    chunks = dict(run.drain())
+    assert chunks["stdout"] == "one\n" and chunks["stderr"] == "two\n"
+
+
+def test_output_cap_keeps_the_tail():
+    run = CommandRun("seq 1 10000", max_chars=100).start()
+    assert wait_done(run, 5)
+    text = output(run)
+    assert len(text) <= 100 and text.endswith("10000\n") and run.omitted > 0
+
+
+def test_stop_kills_the_process_group():
+    run = CommandRun("sleep 30 | cat").start()
+    time.sleep(0.2)
+    run.stop()
+    assert wait_done(run, 5) and run.stopped
+
+
+def test_stop_after_the_shell_exited_kills_background_children():
+    run = CommandRun("sleep 30 & echo hi").start()
+    deadline = time.time() + 5
+    while run.process.poll() is None and time.time() < deadline:
+        time.sleep(0.02)
+    assert run.process.poll() is not None and not run.done  # the child still holds the pipes
+    run.stop()
+    assert run.stopped
+    assert wait_done(run, 2)
+    assert output(run) == "hi\n"
+
+
+def test_stop_escalates_to_sigkill():
+    run = CommandRun("trap '' TERM; sleep 30").start()
+    time.sleep(0.2)
+    started = time.time()
+    run.stop()
+    assert wait_done(run, STOP_GRACE_SECONDS + 3)
+    assert time.time() - started >= STOP_GRACE_SECONDS - 0.1
+
+
+def test_stop_when_done_is_a_no_op():
+    run = CommandRun("true").start()
+    assert wait_done(run, 5)
+    run.stop()
+    assert not run.stopped
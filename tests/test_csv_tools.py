@@ -0,0 +1,100 @@
+import os
+import json
+
+import pytest
+
+import csv_tools
+from csv_tools import detect_dialect, sniff_csv, count_rows, cached_row_count, RowIndex
+
+
+def write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_detect_dialect_delimiter_and_encoding():
+    dialect = detect_dialect("a;b;c\n1;2;3\n4;5;6\n".encode("utf-8"))
+    assert (dialect["delimiter"], dialect["encoding"], dialect["columns"]) == (";", "utf-8", 3)
+    assert detect_dialect("x\tprix\n1\tcaf\xe9\n".encode("cp1252"))["delimiter"] == "\t"
+    assert detect_dialect("x,y\n1,caf\xe9\n".encode("cp1252"))["encoding"] == "cp1252"
+    assert detect_dialect(b"\xef\xbb\xbfx,y\n1,2\n")["encoding"] == "utf-8-sig"
+
+
+def test_all_text_csv_keeps_its_header(tmp_path):
+    # csv.Sniffer().has_header() says False for this one
+    path = write(tmp_path, "people.csv", b"name,city\nalice,paris\nbob,rome\ncarol,oslo\n")
+    dialect = sniff_csv(path)
+    assert dialect["has_header"] is True
+    assert count_rows(path, dialect) == 3
+    assert RowIndex(path, dialect).header == ["name", "city"]
+    assert sniff_csv(path, has_header=False)["has_header"] is False
+    assert count_rows(path, sniff_csv(path, has_header=False)) == 4
+
+
+def test_row_count_cache_does_not_depend_on_the_header_flag(tmp_path):
+    path = write(tmp_path, "numbers.csv", b"1,2\n3,4\n5,6\n")
+    index = RowIndex(path, sniff_csv(path, has_header=False))
+    assert index.build()
+    assert index.rows == 3
+    assert cached_row_count(path) == 2
+    assert cached_row_count(path, sniff_csv(path, has_header=False)) == 3
+
+
+def test_load_dataset_header_and_encoding_fallback(tmp_path):
+    pytest.importorskip("pandas")
+    from EDA_final import load_dataset
+
+    loaded = load_dataset(write(tmp_path, "people.csv", b"name,city\nalice,paris\nbob,rome\n"), log=lambda *a: None)
+    assert list(loaded["df"].columns) == ["name", "city"] and loaded["rows"] == 2
+
+    # utf-8 in the sniffed prefix, a cp1252 byte far past it
+    rows = b"".join(b"%d,plain ascii text\n" % i for i in range(40_000))
+    path = write(tmp_path, "late_cp1252.csv", b"id,text\n" + rows + "1,caf\xe9\n".encode("cp1252"))
+    assert sniff_csv(path)["encoding"] == "utf-8"
+    loaded = load_dataset(path, log=lambda *a: None)
+    assert loaded["rows"] == 40_001
+    assert loaded["df"]["text"].iloc[-1] == "caf\xe9"
+    assert loaded["dialect"]["encoding"] == "latin-1"
+
+
+def test_count_rows_skips_quoted_newlines_across_blocks(tmp_path):
+    import csv
+    import io
+
+    rows = [["id", "note"]] + [[str(i), f'line one\nline "two"\r\nend {i}' if i % 3 == 0 else f"plain {i}"]
+                                for i in range(200)]
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    data = buffer.getvalue().encode("utf-8")
+    path = write(tmp_path, "notes.csv", data.rstrip(b"\n"))  # last record without its newline
+    dialect = sniff_csv(path)
+    # tiny blocks split quoted fields, escaped "" pairs and \r\n at every possible place
+    for block_bytes in (1, 2, 3, 7, 64, 1 << 20):
+        assert count_rows(path, dialect, block_bytes=block_bytes, use_cache=False) == 200
+    assert count_rows(path, dialect) == 200
+    assert cached_row_count(path, dialect) == 200
+
+
+def test_dialect_cache_merges_other_writers_and_is_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(csv_tools, "_DIALECT_CACHE_FILE", str(tmp_path / "csv_dialects.json"))
+    monkeypatch.setattr(csv_tools, "_dialect_cache", {})
+    paths = [write(tmp_path, f"{name}.csv", b"a,b\n1,2\n") for name in "abcd"]
+    sniff_csv(paths[0])
+    # another process stores an entry meanwhile
+    with open(csv_tools._DIALECT_CACHE_FILE, encoding="utf-8") as f:
+        on_disk = json.load(f)
+    other = tmp_path / "other.csv"
+    on_disk[str(other)] = {"signature": [str(other), 1, 8], "records": 2, "stored": 1.0}
+    with open(csv_tools._DIALECT_CACHE_FILE, "w", encoding="utf-8") as f:
+        json.dump(on_disk, f)
+    sniff_csv(paths[1])
+    with open(csv_tools._DIALECT_CACHE_FILE, encoding="utf-8") as f:
+        assert set(json.load(f)) == {paths[0], paths[1], str(other)}
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+    monkeypatch.setattr(csv_tools, "MAX_CACHED_FILES", 2)
+    sniff_csv(paths[2])
+    sniff_csv(paths[3])
+    with open(csv_tools._DIALECT_CACHE_FILE, encoding="utf-8") as f:
+        assert set(json.load(f)) == {paths[2], paths[3]}
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from dtype_compaction import compact_frame, categorize
+
+
+def test_numbers_are_downcast_only_losslessly():
+    df = pd.DataFrame({
+        "small": np.array([0, 1, 255], dtype=np.int64),
+        "signed": np.array([-128, 0, 127], dtype=np.int64),
+        "wide": np.array([0, 70_000, -1], dtype=np.int64),
+        "halves": [0.5, 1.25, np.nan],
+        "precise": [0.1, 1.0, 2.0],  # 0.1 is not exact in float32
+        "big": [1e300, 0.0, 1.0],
+        "flag": [True, False, True],
+    })
+    original = df.copy()
+    report = compact_frame(df, categories=False)
+    assert df.dtypes.astype(str).to_dict() == {
+        "small": "uint8", "signed": "int8", "wide": "int32", "halves": "float32",
+        "precise": "float64", "big": "float64", "flag": "bool",
+    }
+    pd.testing.assert_frame_equal(df.astype(original.dtypes), original)  # every value round-trips
+    assert report.loc["wide", "dtype before"] == "int64" and report.loc["wide", "dtype after"] == "int32"
+    assert report.attrs["bytes_after"] < report.attrs["bytes_before"]
+
+
+def test_categorize_respects_unique_and_ratio_limits():
+    rows = 100
+    df = pd.DataFrame({
+        "smoking": ["yes", "no"] * (rows // 2),
+        "half": [f"v{i % 50}" for i in range(rows)],  # 50 distinct in 100 rows: exactly at the ratio
+        "ids": [f"id{i}" for i in range(rows)],  # one per row
+        "many": [f"m{i % 40}" for i in range(rows)],
+        "number": range(rows),
+    })
+    assert categorize(df.copy()) == ["smoking", "half", "many"]
+    assert categorize(df.copy(), max_ratio=0.45) == ["smoking", "many"]
+    assert categorize(df.copy(), max_unique=40) == ["smoking", "many"]
+    converted = df.copy()
+    categorize(converted, max_unique=2)
+    assert str(converted["smoking"].dtype) == "category" and converted["half"].dtype == object
+    assert list(converted["smoking"]) == list(df["smoking"])
+
+
+def test_compact_frame_reports_every_column():
+    df = pd.DataFrame({"grade": ["low", "high", "low", "low"], "score": [1.5, 2.5, 3.5, 4.5]})
+    report = compact_frame(df)
+    assert list(report.index) == ["grade", "score"]
+    assert report["dtype after"].to_dict() == {"grade": "category", "score": "float32"}
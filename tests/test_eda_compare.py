@@ -0,0 +1,36 @@
+import os
+import json
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from EDA_final import batch_labels, run_batch
+
+
+def test_labels_are_relative_to_the_common_folder(tmp_path):
+    paths = [str(tmp_path / "2024-01" / "data.csv"), str(tmp_path / "2024-02" / "data.csv")]
+    assert batch_labels(paths) == [os.path.join("2024-01", "data.csv"), os.path.join("2024-02", "data.csv")]
+    assert batch_labels([str(tmp_path / "a.csv"), str(tmp_path / "b.csv")]) == ["a.csv", "b.csv"]
+
+
+def test_same_named_files_stay_apart_in_the_comparison(tmp_path):
+    paths = []
+    for day, missing in (("mon", False), ("tue", True)):
+        folder = tmp_path / "drops" / day
+        folder.mkdir(parents=True)
+        frame = pd.DataFrame({"x": range(100), "y": [None if missing and i % 2 else i for i in range(100)]})
+        frame.to_csv(folder / "data.csv", index=False)
+        paths.append(str(folder / "data.csv"))
+    out = tmp_path / "out"
+    out.mkdir()
+
+    batch = run_batch(paths, mode="lite", workers=1, output_dir=str(out), log=lambda *a: None, use_cache=False)
+    reports = [result["report"] for _, result, _ in batch["results"]]
+    assert len(set(reports)) == 2 and all(os.path.exists(report) for report in reports)
+
+    with open(batch["comparison"][:-len(".html")] + ".json", encoding="utf-8") as f:
+        comparison = json.load(f)
+    labels = [os.path.join("mon", "data.csv"), os.path.join("tue", "data.csv")]
+    assert [entry["file"] for entry in comparison["files"]] == labels
+    assert comparison["missing_changes"][0]["file"] == labels[1]
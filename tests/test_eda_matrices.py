@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from eda_matrices import compute_matrices, matrices_html
+
+
+def make_frame(rows=500, seed=0):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(size=rows)
+    frame = pd.DataFrame({
+        "x": x,
+        "y": 2 * x + rng.normal(scale=0.5, size=rows),
+        "z": rng.integers(0, 10, rows).astype(float),
+        "full": rng.normal(size=rows),
+        "label": rng.choice(["a", "b"], rows),
+    })
+    frame.loc[rng.random(rows) < 0.2, "x"] = np.nan
+    frame.loc[rng.random(rows) < 0.1, "y"] = np.nan
+    frame.loc[frame["x"].isna() & (rng.random(rows) < 0.5), "z"] = np.nan  # missing together with x
+    return frame
+
+
+@pytest.mark.parametrize("block_rows", [7, 1 << 20])
+def test_matrices_match_pandas(block_rows):
+    frame = make_frame()
+    result = compute_matrices(frame, block_rows=block_rows)
+    numeric = frame.drop(columns="label")
+    pd.testing.assert_frame_equal(result["pearson"], numeric.corr(), atol=1e-9)
+
+    nullity = frame.isna().astype(float).corr()
+    missing = ["x", "y", "z"]
+    pd.testing.assert_frame_equal(result["nullity"].loc[missing, missing], nullity.loc[missing, missing], atol=1e-9)
+    assert result["nullity"][["full", "label"]].isna().all().all()  # never missing
+    assert result["missing"]["missing"].to_dict() == frame.isna().sum().to_dict()
+
+
+def test_spearman_matches_pandas_without_missing_values():
+    frame = make_frame().drop(columns="label").dropna()
+    result = compute_matrices(frame)
+    pd.testing.assert_frame_equal(result["spearman"], frame.corr("spearman"), atol=1e-9)
+
+
+def test_column_names_are_escaped():
+    frame = pd.DataFrame({"<script>alert(1)</script>": [1.0, 2.0, np.nan, 4.0], "b&c": [2.0, 1.0, 4.0, np.nan]})
+    html = matrices_html(compute_matrices(frame))
+    assert "<script>" not in html
+    assert "&lt;script&gt;alert(1)&lt;/script&gt;" in html and "b&amp;c" in html
+
+
+def test_stats_report_escapes_the_title(tmp_path):
+    from EDA_final import save_stats_report
+
+    frame = pd.DataFrame({"<b>": [1.0, 2.0, 3.0]})
+    tables = {"summary": {"rows": 3, "columns": 1}, "describe": frame.describe(), "missing": frame.isna().sum(),
+              "dtypes": frame.dtypes, "distinct": None}
+    output = save_stats_report(tables, "<img src=x onerror=alert(1)> - Statistics", str(tmp_path / "r.html"),
+                               compute_matrices(frame))
+    text = open(output, encoding="utf-8").read()
+    assert "<img" not in text and "<b>" not in text
+    assert "&lt;img src=x onerror=alert(1)&gt; - Statistics" in text
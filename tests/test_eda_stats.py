@@ -0,0 +1,111 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from eda_stats import (stream_csv_stats, save_stream_state, load_stream_state, stream_state_path,
+                       file_checkpoint)
+from eda_matrices import StreamingMatrices
+
+
+def make_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        "x": rng.normal(10, 3, rows),
+        "n": rng.integers(0, 50, rows),
+        "label": rng.choice(["a", "b", "c"], rows),
+    })
+    frame.loc[rng.random(rows) < 0.1, "x"] = np.nan
+    return frame
+
+
+class Exploit:
+    def __reduce__(self):
+        return (os.system, ("touch pwned",))
+
+
+def test_state_round_trip_and_resume(tmp_path):
+    path = tmp_path / "data.csv"
+    make_frame(3000).to_csv(path, index=False)
+    matrices = StreamingMatrices()
+    stats = stream_csv_stats(str(path), chunksize=700, consumers=[matrices], seed=1)
+    state_file = stream_state_path(str(path))
+    assert state_file.endswith(".npz") and not state_file.startswith(str(tmp_path))
+    save_stream_state(state_file, {"stats": stats, "matrices": matrices, "dialect": {"delimiter": ","},
+                                   "columns": list(stats.columns),
+                                   "checkpoint": file_checkpoint(str(path), os.path.getsize(path))})
+
+    loaded = load_stream_state(state_file)
+    restored = loaded["stats"]
+    assert restored.rows == 3000 and list(restored.columns) == ["x", "n", "label"]
+    pd.testing.assert_frame_equal(restored.describe_frame(), stats.describe_frame())
+    pd.testing.assert_series_equal(restored.distinct_series(), stats.distinct_series())
+    pd.testing.assert_series_equal(restored.dtypes_series(), stats.dtypes_series())
+    pd.testing.assert_frame_equal(restored.preview, stats.preview)
+    pd.testing.assert_frame_equal(loaded["matrices"].results()["pearson"], matrices.results()["pearson"])
+    assert loaded["columns"] == ["x", "n", "label"]
+
+    # the restored state keeps accumulating like the original
+    more = tmp_path / "more.csv"
+    make_frame(500, seed=2).to_csv(more, index=False, header=False)
+    for target, target_matrices in ((restored, loaded["matrices"]), (stats, matrices)):
+        stream_csv_stats(str(more), chunksize=200, stats=target, names=["x", "n", "label"],
+                         consumers=[target_matrices])
+    assert restored.rows == stats.rows == 3500
+    pd.testing.assert_frame_equal(restored.describe_frame().drop(["25%", "50%", "75%"]),
+                                  stats.describe_frame().drop(["25%", "50%", "75%"]))
+
+
+def test_pickles_are_never_loaded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    state_file = tmp_path / "state.npz"
+    state_file.write_bytes(pickle.dumps({"version": 2, "stats": Exploit()}))
+    assert load_stream_state(str(state_file)) is None
+    assert load_stream_state(str(tmp_path / "missing.npz")) is None
+    assert not (tmp_path / "pwned").exists()
+
+
+def test_incremental_run_matches_a_full_run(tmp_path):
+    from EDA_final import run_analysis
+
+    path = tmp_path / "grow.csv"
+    frame = make_frame(4000)
+    frame.iloc[:3000].to_csv(path, index=False)
+    quiet = {"log": lambda *a: None, "output_dir": str(tmp_path)}
+    run_analysis(str(path), mode="streaming", incremental=True, chunksize=1000, **quiet)
+    assert os.path.exists(stream_state_path(str(path)))
+    assert not any(name.endswith(".state") for name in os.listdir(tmp_path))
+    frame.iloc[3000:].to_csv(path, index=False, header=False, mode="a")
+    resumed = run_analysis(str(path), mode="streaming", incremental=True, chunksize=1000, **quiet)
+    assert resumed["summary"]["rows"] == 4000
+    full = run_analysis(str(path), mode="streaming", use_cache=False, chunksize=1000, **quiet)
+    assert resumed["summary"]["missing"] == full["summary"]["missing"]
+
+
+def test_merged_chunk_stats_match_describe():
+    from eda_stats import StreamingStats
+
+    frame = make_frame(20_000, seed=3)
+    # two independent runs over different row ranges, merged, as incremental runs do
+    first, second = StreamingStats(seed=1), StreamingStats(seed=2)
+    for start in range(0, 12_000, 5_000):
+        first.update(frame.iloc[start:min(start + 5_000, 12_000)])
+    for start in range(12_000, 20_000, 3_000):
+        second.update(frame.iloc[start:start + 3_000])
+    first.merge(second)
+
+    expected = frame.describe()
+    described = first.describe_frame()
+    assert list(described.columns) == ["x", "n"]
+    assert first.rows == 20_000
+    for name in ("x", "n"):
+        for stat in ("count", "mean", "std", "min", "max"):
+            assert described.at[stat, name] == pytest.approx(expected.at[stat, name], rel=1e-9)
+        spread = expected.at["75%", name] - expected.at["25%", name]
+        for stat in ("25%", "50%", "75%"):
+            # sampled quantiles: within a few percent of the interquartile range
+            assert abs(described.at[stat, name] - expected.at[stat, name]) <= 0.05 * spread
+    assert first.missing_series().to_dict() == frame.isnull().sum().to_dict()
@@ -0,0 +1,90 @@
+import time
+import threading
+
+from job_manager import JobManager, DONE, FAILED, CANCELLED, TIMED_OUT, QUEUED
+
+
+def poll_until(manager, condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        manager.poll()
+        time.sleep(0.01)
+    return condition()
+
+
+def test_results_events_and_failures_reach_the_polling_thread():
+    manager = JobManager(workers=2)
+    seen = []
+
+    def work(job, n):
+        job.post("step", n)
+        return n * 2
+
+    ok = manager.submit("x", work, 21, on_event=lambda job, event, data: seen.append((event, data)),
+                        on_done=lambda job, result: seen.append(("done", result)))
+    bad = manager.submit("x", lambda job: 1 / 0, on_error=lambda job, error: seen.append(("error", error)))
+    assert poll_until(manager, lambda: ok.status == DONE and bad.status == FAILED)
+    assert ("step", 21) in seen and ("done", 42) in seen
+    assert ("error", "ZeroDivisionError: division by zero") in seen
+
+
+def test_a_stuck_job_that_times_out_frees_its_slot():
+    manager = JobManager(workers=1)
+    release = threading.Event()
+    stuck = manager.submit("model", lambda job: release.wait(10), timeout=0.1)
+    after = manager.submit("model", lambda job: "ran")
+    assert poll_until(manager, lambda: after.status == DONE)
+    assert stuck.status == TIMED_OUT and after.result == "ran"
+    release.set()
+
+
+def test_queued_jobs_time_out_too():
+    manager = JobManager(workers=1)
+    release = threading.Event()
+    blocker = manager.submit("x", lambda job: release.wait(10))
+    queued = manager.submit("x", lambda job: "never", timeout=0.1)
+    assert poll_until(manager, lambda: queued.status == TIMED_OUT)
+    assert "queue" in queued.error and queued.started is None
+    release.set()
+    assert poll_until(manager, lambda: blocker.status == DONE)
+
+
+def test_cancel_a_queued_job():
+    manager = JobManager(workers=1)
+    release = threading.Event()
+    manager.submit("x", lambda job: release.wait(10))
+    queued = manager.submit("x", lambda job: "never")
+    assert queued.status == QUEUED
+    manager.cancel(queued.id)
+    assert poll_until(manager, lambda: queued.status == CANCELLED)
+    release.set()
+
+
+def test_watched_work_takes_no_worker():
+    manager = JobManager(workers=1)
+    state = {"polls": 0}
+    output = []
+
+    def check(job):
+        state["polls"] += 1
+        job.post("output", state["polls"])
+        return state["polls"] >= 3
+
+    watched = manager.watch("execute", check, on_event=lambda job, event, n: output.append(n))
+    other = manager.submit("x", lambda job: "ran")  # not blocked by the watched job
+    assert poll_until(manager, lambda: watched.status == DONE and other.status == DONE)
+    assert output == [1, 2, 3]
+
+
+def test_stuck_threads_are_capped():
+    manager = JobManager(workers=1, max_stuck=1)
+    release = threading.Event()
+    stuck = [manager.submit("model", lambda job: release.wait(10), timeout=0.1) for _ in range(2)]
+    assert poll_until(manager, lambda: all(job.status == TIMED_OUT for job in stuck))
+    # both threads are still blocked: the cap of workers + max_stuck = 2 threads is reached
+    waiting = manager.submit("model", lambda job: "ran")
+    time.sleep(0.1)
+    manager.poll()
+    assert waiting.status == QUEUED
+    release.set()
+    assert poll_until(manager, lambda: waiting.status == DONE)
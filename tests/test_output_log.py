@@ -0,0 +1,65 @@
+import os
+
+from output_log import OutputLog, RotatingFile
+
+
+def test_pending_text_is_capped_oldest_first():
+    log = OutputLog(max_lines=3, max_chars=1000)
+    for i in range(5):
+        log.append(f"line {i}\n", "info_tag")
+    chunks, skipped = log.take()
+    assert chunks == [("line 2\nline 3\nline 4\n", "info_tag")]
+    assert skipped == 2 * len("line 0\n")
+    assert log.take() == ([], 0)
+
+    log = OutputLog(max_lines=100, max_chars=10)
+    log.append("abcdef", "info_tag")
+    log.append("ghijkl", "info_tag")
+    assert log.take() == ([("ghijkl", "info_tag")], 6)
+    log.append("x" * 50, "info_tag")  # a single oversized append is kept whole
+    assert log.take() == ([("x" * 50, "info_tag")], 0)
+
+
+def test_take_merges_runs_of_one_tag():
+    log = OutputLog()
+    for text, tag in (("12:00 ", "timestamp_tag"), ("a\n", "info_tag"), ("b\n", "info_tag"), ("oops\n", "error_tag"),
+                      ("c\n", "info_tag")):
+        log.append(text, tag)
+    log.append("", "info_tag")
+    assert log.take() == ([("12:00 ", "timestamp_tag"), ("a\nb\n", "info_tag"), ("oops\n", "error_tag"),
+                           ("c\n", "info_tag")], 0)
+
+
+def test_everything_is_spilled_even_what_was_skipped(tmp_path):
+    path = str(tmp_path / "output.log")
+    log = OutputLog(max_lines=1, spill_path=path)
+    assert log.spill_path == path
+    log.append("first\n", "info_tag")
+    log.append("second\n", "info_tag")
+    assert log.take() == ([("second\n", "info_tag")], len("first\n"))
+    log.close()
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "first\nsecond\n"
+    assert OutputLog().spill_path is None
+
+    broken = OutputLog(spill_path=str(tmp_path))  # a folder: the first write fails
+    broken.append("text\n", "info_tag")
+    assert broken.take() == ([("text\n", "info_tag")], 0)
+    assert broken.spill_path is None  # so the GUI stops pointing at a log file
+
+
+def test_rotating_file_keeps_a_fixed_number_of_backups(tmp_path):
+    path = str(tmp_path / "output.log")
+    spill = RotatingFile(path, max_bytes=10, backups=2)
+    for i in range(4):
+        spill.write(f"chunk {i} ..\n")  # 11 bytes: every write rolls the file over
+    spill.write("tail\n")
+    spill.close()
+    assert sorted(os.listdir(tmp_path)) == ["output.log", "output.log.1", "output.log.2"]
+    contents = [open(f"{path}{suffix}", encoding="utf-8").read() for suffix in ("", ".1", ".2")]
+    assert contents == ["tail\n", "chunk 3 ..\n", "chunk 2 ..\n"]
+
+    spill = RotatingFile(path, max_bytes=10, backups=0)
+    spill.write("x" * 20)
+    spill.close()
+    assert not os.path.exists(path)
@@ -0,0 +1,95 @@
+import os
+import time
+import multiprocessing
+
+import pytest
+
+from report_cache import ReportCache, report_config
+
+
+def write(path, data):
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_key_depends_on_content_and_config_not_path(tmp_path):
+    cache = ReportCache(root=str(tmp_path / "cache"))
+    a = write(tmp_path / "a.csv", b"x,y\n1,2\n")
+    b = write(tmp_path / "b.csv", b"x,y\n1,2\n")
+    c = write(tmp_path / "c.csv", b"x,y\n1,3\n")
+    full = report_config("full")
+    assert cache.make_key(a, full) == cache.make_key(b, full)
+    assert cache.make_key(a, full) != cache.make_key(c, full)
+    assert cache.make_key(a, full) != cache.make_key(a, report_config("fast", sample_rows=5000))
+    # fast_only never hashes: known files only
+    assert cache.make_key(write(tmp_path / "d.csv", b"new"), full, fast_only=True) is None
+    assert cache.make_key(a, full, fast_only=True) == cache.make_key(a, full)
+
+
+def test_changed_file_is_rehashed(tmp_path):
+    cache = ReportCache(root=str(tmp_path / "cache"))
+    path = write(tmp_path / "a.csv", b"x\n1\n")
+    first = cache.content_hash(path)
+    write(tmp_path / "a.csv", b"x\n2\n")
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert cache.content_hash(path, fast_only=True) is None
+    assert cache.content_hash(path) != first
+
+
+def test_store_and_lookup_with_sidecars(tmp_path):
+    cache = ReportCache(root=str(tmp_path / "cache"))
+    data = write(tmp_path / "a.csv", b"x\n1\n")
+    report = write(tmp_path / "a_eda_lite.html", b"<html></html>")
+    sidecar = write(tmp_path / "a_eda_lite.json", b"{}")
+    config = report_config("lite")
+    assert cache.lookup(data, config) is None
+    cache.store(data, config, report, {"rows": 1}, extra_files=[sidecar])
+    hit = cache.lookup(data, config)
+    assert hit["summary"] == {"rows": 1}
+    assert [os.path.basename(f) for f in hit["files"]] == ["a_eda_lite.html", "a_eda_lite.json"]
+    assert hit["report"] == hit["files"][0]
+
+
+def test_lru_eviction_keeps_the_size_cap(tmp_path):
+    cache = ReportCache(root=str(tmp_path / "cache"), max_bytes=2500)
+    report = write(tmp_path / "r.html", b"x" * 1000)
+    paths = [write(tmp_path / f"{i}.csv", b"%d\n" % i) for i in range(4)]
+    config = report_config("full")
+    for path in paths[:2]:
+        cache.store(path, config, report)
+        time.sleep(0.01)
+    cache.lookup(paths[0], config)  # 0 is now more recent than 1
+    time.sleep(0.01)
+    cache.store(paths[2], config, report)
+    assert cache.total_bytes() <= 2500
+    assert cache.lookup(paths[1], config) is None
+    assert cache.lookup(paths[0], config) is not None and cache.lookup(paths[2], config) is not None
+
+
+def _store(root, path, report):
+    ReportCache(root=root).store(path, report_config("full"), report)
+
+
+def test_concurrent_stores_from_processes_are_all_kept(tmp_path):
+    root = str(tmp_path / "cache")
+    report = write(tmp_path / "r.html", b"<html></html>")
+    paths = [write(tmp_path / f"{i}.csv", b"%d\n" % i) for i in range(16)]
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        pool.starmap(_store, [(root, path, report) for path in paths])
+    cache = ReportCache(root=root)
+    assert all(cache.lookup(path, report_config("full"), fast_only=True) for path in paths)
+    assert cache.total_bytes() == 16 * os.path.getsize(report)
+
+
+def test_cached_lite_report_restores_its_json(tmp_path):
+    pytest.importorskip("pandas")
+    from EDA_final import run_analysis
+
+    data = write(tmp_path / "numbers.csv", b"a,b\n1,2\n2,4\n3,7\n")
+    os.makedirs(tmp_path / "one")
+    os.makedirs(tmp_path / "two")
+    first = run_analysis(data, mode="lite", output_dir=str(tmp_path / "one"), log=lambda *a: None)
+    assert first["status"] == "ok"
+    second = run_analysis(data, mode="lite", output_dir=str(tmp_path / "two"), log=lambda *a: None)
+    assert second["status"] == "cached"
+    assert sorted(os.listdir(tmp_path / "two")) == ["numbers_eda_lite.html", "numbers_eda_lite.json"]
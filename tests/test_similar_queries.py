@@ -0,0 +1,67 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from similar_queries import SimilarQueryIndex, query_key, has_literals
+
+
+def test_query_key_keeps_word_order():
+    assert query_key("move a.txt to b.txt") != query_key("move b.txt to a.txt")
+    assert query_key("copy src into dst") != query_key("copy dst into src")
+
+
+def test_query_key_merges_only_spellings_of_the_same_ask():
+    assert query_key("show largest files") == query_key("list the biggest files")
+    assert query_key("find new files") != query_key("find modified files")
+    assert query_key("kill processes") != query_key("terminate processes")
+
+
+def test_literals():
+    assert has_literals("move a.txt to b.txt")
+    assert has_literals("kill process on port 8080")
+    assert has_literals("list files in /var/log")
+    assert not has_literals("show largest files")
+
+
+def test_same_never_reuses_commands_with_paths_or_numbers():
+    index = SimilarQueryIndex()
+    index.add("move a.txt to b.txt", "mv a.txt b.txt")
+    index.add("kill process on port 8080", "fuser -k 8080/tcp")
+    index.add("list big files", "du -ah . | sort -rh | head -20")
+    assert index.same("move a.txt to b.txt") is None
+    assert index.same("move b.txt to a.txt") is None
+    assert index.same("kill process on port 3000") is None
+    assert index.same("show the largest files") == ("list big files", "du -ah . | sort -rh | head -20")
+
+
+def test_similar_suggests_above_threshold():
+    index = SimilarQueryIndex()
+    index.add("kill process on port 8080", "fuser -k 8080/tcp")
+    score, past_query, command = index.similar("kill process on port 3000", threshold=0.5)
+    assert past_query == "kill process on port 8080" and 0.5 <= score < 1
+    assert index.similar("compress the logs", threshold=0.5) is None
+
+
+def test_error_answers_are_not_indexed_and_oldest_is_evicted():
+    index = SimilarQueryIndex(capacity=2)
+    index.add("broken", "# Error: quota exceeded")
+    assert len(index) == 0
+    for query in ("list big files", "list small files", "list hidden files"):
+        index.add(query, query.upper())
+    assert len(index) == 2
+    assert index.same("list big files") is None
+    assert index.same("list hidden files") == ("list hidden files", "LIST HIDDEN FILES")
+
+
+def test_reversed_or_rescoped_queries_never_match():
+    index = SimilarQueryIndex()
+    index.add("copy notes to backup", "cp -r notes backup")
+    index.add("list files on src", "ls src")
+    index.add("list files", "ls")
+    assert index.same("copy notes from backup") is None
+    assert index.same("copy notes into backup") is None
+    assert index.same("list files for src") is None
+    assert index.same("list files in src") is None
+    assert index.same("list all files") is None
+    assert index.same("please copy the notes to backup") == ("copy notes to backup", "cp -r notes backup")
+    assert index.same("can you list the files on src") == ("list files on src", "ls src")